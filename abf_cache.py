@@ -0,0 +1,148 @@
+"""
+Disk cache of decompressed Abiotic Factor world archives
+
+The abiotic-factor handler has to Oodle-decompress the whole bundled world archive
+every time a game is extracted, even in watch mode or repeated runs where the world
+did not change. The cache keeps the TOC entries and the decompressed payload of each
+archive, keyed by the blob's GUID, size, modification time and the SHA-256 of its
+contents, so an unchanged world is written straight from the cache without Oodle.
+
+An entry is one file: MAGIC, the length of a JSON header (entries and the SHA-256 of
+the payload), the header and the payload. The payload is checked against its hash
+on every read; entries that don't match are deleted and count as misses. Like the
+converted save cache of convert_to_steam.py, the cache is capped at max_bytes and
+evicts the least recently used entries, reading an entry marks it as used.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import manifest
+import snapshots
+import throttle
+
+DEFAULT_DIR = Path(os.path.expanduser("~")) / ".cache" / "abf_extract"
+DEFAULT_MAX_MB = 2048
+
+MAGIC = b"ABFCACHE1\n"
+# Bump when the entry layout or the extraction changes, so older entries are not reused
+CACHE_VERSION = "1"
+
+
+class ExtractCache:
+    """Decompressed ABF archives by blob identity, capped at max_bytes"""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "corrupt": 0}
+
+    @staticmethod
+    def key_for(source, guid: bytes) -> str:
+        """Key of a bundled archive blob (a Path or snapshots.ArchivePath) and its GUID
+
+        Hashes the blob, which is much cheaper than decompressing it and catches a
+        rewrite that kept the size and modification time.
+        """
+        if isinstance(source, snapshots.ArchivePath):
+            size, mtime_ns = source.size(), int(source.mtime().timestamp() * 1e9)
+            with source.open("rb") as f:
+                digest = manifest.hash_stream(throttle.reader(f))
+        else:
+            st = os.stat(source)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+            with open(source, "rb") as f:
+                digest = manifest.hash_stream(throttle.reader(f))
+        h = hashlib.sha256()
+        for part in (CACHE_VERSION, guid.hex(), str(size), str(mtime_ns), digest):
+            encoded = part.encode("utf-8")
+            h.update(len(encoded).to_bytes(4, "little"))
+            h.update(encoded)
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.abf"
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], bytes]]:
+        """(TOC entries, decompressed payload) of a cached archive, None if not cached"""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                data = throttle.reader(f).read()
+        except OSError:
+            self._count("misses")
+            return None
+        try:
+            if not data.startswith(MAGIC):
+                raise ValueError("bad magic")
+            start = len(MAGIC) + 4
+            header_size, = struct.unpack_from("<I", data, len(MAGIC))
+            header = json.loads(data[start:start + header_size])
+            payload = data[start + header_size:]
+            if hashlib.sha256(payload).hexdigest() != header["sha256"]:
+                raise ValueError("payload hash mismatch")
+            entries = header["entries"]
+        except (ValueError, KeyError, struct.error):
+            # Damaged or truncated entry: drop it and decompress again
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+            self._count("corrupt")
+            self._count("misses")
+            return None
+        try:
+            # Mark as recently used
+            os.utime(entry)
+        except OSError:
+            pass
+        self._count("hits")
+        return entries, payload
+
+    def put(self, key: str, entries: List[Dict[str, Any]], payload: bytes):
+        header = json.dumps({
+            "entries": [{"path": entry["path"], "size": entry["size"]} for entry in entries],
+            "sha256": hashlib.sha256(payload).hexdigest(),
+        }).encode("utf-8")
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            throttle.writer(f).write(payload)
+        os.replace(tmp_path, entry)
+        self._count("stores")
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in self.root.glob("*/*.abf"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions"] += 1
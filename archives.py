@@ -0,0 +1,340 @@
+"""
+Commands that check the archives main.py wrote
+
+    main.py verify PATH...   check archives against their SHA256SUMS manifests
+    main.py diff OLD NEW     list the save files that differ between two archives
+
+PATH can be an archive (zip, tar.zst, a dir archive, or a tar file of the stdout
+format, which holds one manifest per archive) or a directory that is searched for
+archives. Members of zip, tar and dir archives are hashed on a thread pool, where
+zlib and hashlib run without the GIL; tar.zst archives can only be read in order, so
+each is checked by one thread.
+
+diff compares the member lists first: sizes, the CRC-32s of zip archives and the
+manifest hashes. Only members whose metadata can't tell (e.g. a zip without a
+manifest against a dir archive) are read and hashed.
+"""
+
+import argparse
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, List, Tuple
+
+import backends
+import manifest
+import snapshots
+
+ARCHIVE_SUFFIXES = (".zip", ".tar.zst") + snapshots.ARCHIVE_SUFFIXES
+
+
+def find_archives(paths: List[Path]) -> List[Path]:
+    """The archives given, and the archives found in the directories given"""
+    found = []
+    for path in paths:
+        if path.is_file() or (path / manifest.MANIFEST_NAME).is_file():
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(dirs):
+                if (Path(root) / name / manifest.MANIFEST_NAME).is_file():
+                    found.append(Path(root) / name)
+            # Don't look into dir archives
+            dirs[:] = [name for name in dirs if not (Path(root) / name / manifest.MANIFEST_NAME).is_file()]
+            found.extend(Path(root) / name for name in sorted(files) if name.lower().endswith(ARCHIVE_SUFFIXES))
+    return found
+
+
+def _members(root) -> Iterator[Tuple[str, object]]:
+    """(member name, path) of every file of a dir archive or an opened snapshots archive"""
+    if isinstance(root, snapshots.ArchivePath):
+        for name in root.archive.files:
+            yield name, root / name
+        return
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = Path(dirpath) / name
+            yield path.relative_to(root).as_posix(), path
+
+
+def _hash_member(path) -> str:
+    """SHA-256 of a member, reading a zip member to the end also checks its CRC-32"""
+    with (path.open("rb") if isinstance(path, snapshots.ArchivePath) else open(path, "rb")) as f:
+        return manifest.hash_stream(f)
+
+
+def _compare(manifests: Dict[str, Dict[str, str]], hashes: Dict[str, str | Exception]) -> List[str]:
+    """Problems found comparing {manifest directory: manifest} to {member: hash or error}"""
+    problems = []
+    listed = set()
+    for prefix, expected in sorted(manifests.items()):
+        for name, digest in sorted(expected.items()):
+            member = f"{prefix}/{name}" if prefix else name
+            listed.add(member)
+            actual = hashes.get(member)
+            if actual is None:
+                problems.append(f"{member}: missing")
+            elif isinstance(actual, Exception):
+                problems.append(f"{member}: {actual}")
+            elif actual != digest:
+                problems.append(f"{member}: SHA-256 mismatch")
+    for member in sorted(hashes):
+        # Anything below a manifest's directory must be listed, also in subdirectories
+        covered = any(prefix == "" or member.startswith(prefix + "/") for prefix in manifests)
+        if member not in listed and covered:
+            problems.append(f"{member}: not in {manifest.MANIFEST_NAME}")
+    return problems
+
+
+def _split_manifests(contents: Dict[str, bytes]) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """{manifest directory: manifest} of {manifest member: data}, and the unreadable ones"""
+    manifests, problems = {}, []
+    for member, data in contents.items():
+        prefix = PurePosixPath(member).parent.as_posix()
+        try:
+            manifests["" if prefix == "." else prefix] = manifest.parse_manifest(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            problems.append(f"{member}: {e}")
+    return manifests, problems
+
+
+def _is_manifest(member: str) -> bool:
+    return PurePosixPath(member).name == manifest.MANIFEST_NAME
+
+
+class Check:
+    """Verification of one archive, run as jobs on a shared pool"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.problems: List[str] = []
+        self.files = 0
+        self.manifests = 0
+        self.root = None
+        self.jobs = {}
+
+    def start(self, pool: ThreadPoolExecutor):
+        """Submit the hashing jobs"""
+        if self.path.name.lower().endswith(".tar.zst"):
+            self.jobs["stream"] = pool.submit(self._check_stream)
+            return
+        try:
+            self.root = self.path if self.path.is_dir() else snapshots.open_root(self.path)
+        except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+            self.problems.append(f"can't open: {e}")
+            return
+        for name, path in _members(self.root):
+            self.jobs[name] = pool.submit(_hash_member, path)
+
+    def _check_stream(self) -> Tuple[Dict[str, bytes], Dict[str, str | Exception]]:
+        contents, hashes = {}, {}
+        with backends.zstd_reader(open(self.path, "rb")) as raw, tarfile.open(fileobj=raw, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = snapshots.member_name(member.name)
+                f = tar.extractfile(member)
+                if _is_manifest(name):
+                    contents[name] = f.read()
+                else:
+                    hashes[name] = manifest.hash_stream(f)
+        return contents, hashes
+
+    def finish(self) -> str:
+        """Wait for the jobs, returns "ok", "failed" or "unverified" (no manifest)"""
+        if "stream" in self.jobs:
+            try:
+                contents, hashes = self.jobs["stream"].result()
+            except Exception as e:
+                self.problems.append(f"can't read: {e}")
+                return "failed"
+        else:
+            contents, hashes = {}, {}
+            for name, job in self.jobs.items():
+                try:
+                    digest = job.result()
+                except Exception as e:
+                    digest = e
+                if _is_manifest(name) and not isinstance(digest, Exception):
+                    contents[name] = None
+                hashes[name] = digest
+            for name in contents:
+                del hashes[name]
+                contents[name] = (self.root / name).read_bytes()
+        self.files = len(hashes)
+        manifests, problems = _split_manifests(contents)
+        self.manifests = len(manifests)
+        self.problems += problems + _compare(manifests, hashes)
+        if not manifests and not self.problems:
+            # Reading every zip member to the end still checked their CRC-32s
+            self.problems = [f"{name}: {error}" for name, error in hashes.items() if isinstance(error, Exception)]
+            return "failed" if self.problems else "unverified"
+        return "failed" if self.problems else "ok"
+
+
+def verify(paths: List[Path], workers: int, require_manifest: bool = False) -> bool:
+    """Check archives and print the results, returns whether all are intact"""
+    archives = find_archives(paths)
+    if not archives:
+        print("No archives found")
+        return False
+    counts = {"ok": 0, "failed": 0, "unverified": 0}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        checks = [Check(path) for path in archives]
+        for check in checks:
+            check.start(pool)
+        for check in checks:
+            status = check.finish() if not check.problems else "failed"
+            counts[status] += 1
+            if status == "ok":
+                print(f"OK          {check.path} ({check.files} files)")
+            elif status == "unverified":
+                note = "CRC-32s checked" if check.path.suffix.lower() == ".zip" else "files readable"
+                print(f"NO MANIFEST {check.path} ({check.files} files, {note})")
+            else:
+                print(f"FAILED      {check.path}")
+                for problem in check.problems:
+                    print(f"  - {problem}")
+    print()
+    print(f"{len(archives)} archive(s): {counts['ok']} ok, {counts['failed']} failed, "
+          f"{counts['unverified']} without a manifest")
+    return counts["failed"] == 0 and not (require_manifest and counts["unverified"])
+
+
+def verify_command(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py verify",
+        description="Check archives written by main.py against their SHA256SUMS manifests"
+    )
+    parser.add_argument("paths", type=Path, nargs="+", metavar="PATH",
+                        help="Archive, or directory to search for archives")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                        help="Hash with up to N threads (default: %(default)s)")
+    parser.add_argument("--require-manifest", action="store_true",
+                        help="Fail archives without a manifest (written before manifests were added, "
+                             "or with --no-manifest)")
+    args = parser.parse_args(argv)
+    return 0 if verify(args.paths, args.workers, args.require_manifest) else 1
+
+
+class Listing:
+    """Member sizes of an archive, with the CRC-32s of a zip and the manifest hashes
+
+    Reads only the member list and the manifests, except for tar.zst archives, which
+    have to be decompressed to list them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sizes: Dict[str, int] = {}
+        self.crcs: Dict[str, int] = {}
+        self.hashes: Dict[str, str] = {}
+        # Members read to hash them
+        self.read = 0
+        self._root = None
+        contents = {}
+        if path.name.lower().endswith(".tar.zst"):
+            for name, member, f in self._stream():
+                if _is_manifest(name):
+                    contents[name] = f.read()
+                else:
+                    self.sizes[name] = member.size
+        else:
+            self._root = path if path.is_dir() else snapshots.open_root(path)
+            for name, member_path in _members(self._root):
+                if _is_manifest(name):
+                    contents[name] = member_path.read_bytes()
+                elif isinstance(member_path, snapshots.ArchivePath):
+                    self.sizes[name] = member_path.size()
+                else:
+                    self.sizes[name] = member_path.stat().st_size
+            if isinstance(self._root, snapshots.ArchivePath):
+                self.crcs = {name: crc for name, crc in self._root.archive.crcs.items() if name in self.sizes}
+        manifests, problems = _split_manifests(contents)
+        for problem in problems:
+            print(f"Ignoring {path}: {problem}")
+        for prefix, hashes in manifests.items():
+            for name, digest in hashes.items():
+                self.hashes[f"{prefix}/{name}" if prefix else name] = digest
+
+    def _stream(self) -> Iterator[Tuple[str, tarfile.TarInfo, object]]:
+        """(name, member, file) of each file of a tar.zst archive, in order"""
+        with backends.zstd_reader(open(self.path, "rb")) as raw, tarfile.open(fileobj=raw, mode="r|") as tar:
+            for member in tar:
+                if member.isfile():
+                    yield snapshots.member_name(member.name), member, tar.extractfile(member)
+
+    def hash_members(self, names: List[str], pool: ThreadPoolExecutor):
+        """Add the SHA-256 of the named members that have none to hashes"""
+        needed = {name for name in names if name not in self.hashes}
+        if not needed:
+            return
+        self.read += len(needed)
+        if self._root is None:
+            for name, _, f in self._stream():
+                if name in needed:
+                    self.hashes[name] = manifest.hash_stream(f)
+            return
+        jobs = {name: pool.submit(_hash_member, self._root / name) for name in needed}
+        for name, job in jobs.items():
+            self.hashes[name] = job.result()
+
+
+def diff(old: Path, new: Path, workers: int) -> bool:
+    """Print the save files added, removed and changed from old to new, returns whether
+    the archives hold the same files"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        left, right = [job.result() for job in [pool.submit(Listing, old), pool.submit(Listing, new)]]
+        common = sorted(left.sizes.keys() & right.sizes.keys())
+        added = sorted(right.sizes.keys() - left.sizes.keys())
+        removed = sorted(left.sizes.keys() - right.sizes.keys())
+        changed, undecided = [], []
+        for name in common:
+            if left.sizes[name] != right.sizes[name]:
+                changed.append(name)
+            elif name in left.hashes and name in right.hashes:
+                if left.hashes[name] != right.hashes[name]:
+                    changed.append(name)
+            elif name in left.crcs and name in right.crcs:
+                if left.crcs[name] != right.crcs[name]:
+                    changed.append(name)
+            else:
+                undecided.append(name)
+        if undecided:
+            for listing in (left, right):
+                listing.hash_members(undecided, pool)
+            changed += [name for name in undecided if left.hashes[name] != right.hashes[name]]
+
+    print(f"--- {old}")
+    print(f"+++ {new}")
+    for name in added:
+        print(f"A  {name} ({right.sizes[name]} bytes)")
+    for name in removed:
+        print(f"D  {name}")
+    for name in sorted(changed):
+        print(f"M  {name} ({left.sizes[name]} -> {right.sizes[name]} bytes)")
+    print()
+    print(f"{len(common) - len(changed)} unchanged, {len(added)} added, {len(removed)} removed, "
+          f"{len(changed)} changed ({left.read + right.read} files read)")
+    return not (added or removed or changed)
+
+
+def diff_command(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py diff",
+        description="List the save files that differ between two archives written by main.py. "
+                    "The exit status is 0 if they hold the same files, 1 if not, and 2 on errors"
+    )
+    parser.add_argument("old", type=Path, help="Archive of the earlier run")
+    parser.add_argument("new", type=Path, help="Archive of the later run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                        help="Hash with up to N threads when the metadata isn't enough (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        return 0 if diff(args.old, args.new, args.workers) else 1
+    except (OSError, tarfile.TarError, zipfile.BadZipFile, RuntimeError) as e:
+        print(f"Can't compare the archives: {e}")
+        return 2
@@ -0,0 +1,402 @@
+"""
+Output formats for the extracted saves (--format)
+
+Every archive holds one user's saves of one game, under the file names the handlers
+produce:
+
+    zip      ZIP file with DEFLATE compression (the default)
+    tar.zst  tar file compressed with Zstandard, using compression.zstd on Python
+             3.14+ or else the zstandard package
+    dir      plain directory tree, nothing compressed
+    stdout   a single uncompressed tar stream on stdout for the whole run, with each
+             archive as a top-level directory, for piping to remote storage
+
+Writers come from open_writer() and are used as context managers. Sources can be
+real paths or snapshots.ArchivePath files.
+
+Archive files and directories are written under their name plus PARTIAL_SUFFIX and
+renamed once they are complete, so an interrupted run leaves no archive that looks
+finished.
+
+The "install" writer (--install-to) is not an archive format: it places the files
+straight into an existing save directory, replacing each one atomically.
+"""
+
+import io
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from collections import Counter
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, Optional, Tuple
+
+import fastcopy
+import manifest
+import profiler
+import snapshots
+import throttle
+
+DEFAULT_FORMAT = "zip"
+# Valid --compress-level range of the compressed formats
+COMPRESS_LEVELS = {"zip": (0, 9), "tar.zst": (1, 22)}
+COPY_BUFFER = 1024 * 1024
+PARTIAL_SUFFIX = ".partial"
+
+# The tar stream of the stdout format, shared by all writers of the run
+_stream: Optional[tarfile.TarFile] = None
+_stream_file: Optional[BinaryIO] = None
+_stream_lock = threading.Lock()
+
+
+def _open_source(source) -> BinaryIO:
+    if isinstance(source, snapshots.ArchivePath):
+        return source.open("rb")
+    return open(source, "rb")
+
+
+def _stat(source) -> Tuple[int, float]:
+    """Size and modification time (a timestamp) of a source file"""
+    if isinstance(source, snapshots.ArchivePath):
+        return source.size(), source.mtime().timestamp()
+    st = os.stat(source)
+    return st.st_size, st.st_mtime
+
+
+def _add_to_tar(tar: tarfile.TarFile, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+    """Add a file as a plain 0644 member, returns its size"""
+    info = tarfile.TarInfo(arcname)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    tar.addfile(info, src)
+    return info.size
+
+
+def _target_path(root: Path, arcname: str) -> Path:
+    """root/arcname, refusing names that would escape root"""
+    relative = PurePosixPath(arcname)
+    if relative.is_absolute() or ".." in relative.parts:
+        raise ValueError(f"Refusing to write {arcname!r} outside of {root}")
+    return root.joinpath(*relative.parts)
+
+
+def remove_path(path: Path):
+    """Delete a file or directory tree if it exists"""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _zstd():
+    """compression.zstd (Python 3.14+), or else the zstandard package"""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise RuntimeError("The tar.zst format needs Python 3.14+ or the zstandard package "
+                           "(pip install zstandard)") from None
+
+
+def check_format(output_format: str):
+    """Raise RuntimeError if the format can't be written with this Python"""
+    if output_format == "tar.zst":
+        _zstd()
+
+
+def zstd_writer(fileobj: BinaryIO, level: Optional[int] = None) -> BinaryIO:
+    """Writable Zstandard stream over fileobj, which is closed with it"""
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdCompressor(level=3 if level is None else level).stream_writer(fileobj)
+
+    class _ZstdFile(zstd.ZstdFile):
+        def close(self):
+            try:
+                super().close()
+            finally:
+                fileobj.close()
+
+    return _ZstdFile(fileobj, "w", level=level)
+
+
+def zstd_reader(fileobj: BinaryIO) -> BinaryIO:
+    """Readable Zstandard stream over fileobj, which is closed with it"""
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdDecompressor().stream_reader(fileobj, closefd=True)
+
+    class _ZstdFile(zstd.ZstdFile):
+        def close(self):
+            try:
+                super().close()
+            finally:
+                fileobj.close()
+
+    return _ZstdFile(fileobj)
+
+
+class ArchiveWriter:
+    """One archive: filled with add(), finished with close()
+
+    With manifest=True the files are hashed while they are written, and the archive
+    gets a SHA256SUMS member (see manifest.py) when the writer exits without error.
+    """
+
+    extension = ""
+    # Whether the archive is written to partial_path and renamed to path when done
+    staged = True
+
+    def __init__(self, base: Path, level: Optional[int] = None, manifest: bool = False):
+        self.path = base.with_name(base.name + self.extension)
+        if self.staged:
+            if self.path.exists():
+                raise FileExistsError(f"{self.path} already exists")
+            self.partial_path = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+        else:
+            self.partial_path = self.path
+        self.level = level
+        self.files = 0
+        self.bytes_archived = 0
+        # Size of the finished archive
+        self.archive_bytes = 0
+        # Member name: SHA-256, None without a manifest
+        self.hashes: Optional[Dict[str, str]] = {} if manifest else None
+
+    def add(self, source, arcname):
+        """Add a file under arcname (a str or a relative PurePath)"""
+        name = PurePosixPath(arcname).as_posix()
+        size, mtime = _stat(source)
+        with _open_source(source) as f:
+            f = throttle.reader(f)
+            if self.hashes is None:
+                size = self._add(f, size, mtime, name)
+            else:
+                reader = manifest.HashingReader(f)
+                size = self._add(reader, size, mtime, name)
+                self.hashes[name] = reader.hexdigest()
+        self.files += 1
+        self.bytes_archived += size
+        profiler.count(bytes_read=size, files=1)
+
+    def _add(self, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+        """Write a member from src, returns its size"""
+        raise NotImplementedError
+
+    def close(self) -> int:
+        """Finish the archive, returns its size"""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            try:
+                # A save file with the manifest's name can't be listed in it
+                if exc_type is None and self.hashes and manifest.MANIFEST_NAME not in self.hashes:
+                    data = manifest.format_manifest(self.hashes)
+                    self._add(io.BytesIO(data), len(data), time.time(), manifest.MANIFEST_NAME)
+            finally:
+                try:
+                    self.archive_bytes = self.close()
+                except Exception:
+                    # After a failed write, report what failed rather than the close
+                    if exc_type is None:
+                        raise
+            if self.staged and exc_type is None:
+                # Don't replace an archive that appeared meanwhile, as "x" mode would not
+                if self.path.exists():
+                    raise FileExistsError(f"{self.path} already exists")
+                os.rename(self.partial_path, self.path)
+        except BaseException:
+            if self.staged:
+                remove_path(self.partial_path)
+            raise
+        if self.staged and exc_type is not None:
+            remove_path(self.partial_path)
+        profiler.count(bytes_written=self.archive_bytes, files=1)
+
+
+class ZipWriter(ArchiveWriter):
+    extension = ".zip"
+
+    def __init__(self, base: Path, level: Optional[int] = None, manifest: bool = False):
+        super().__init__(base, level, manifest)
+        self._raw = open(self.partial_path, "xb")
+        self._zip = zipfile.ZipFile(throttle.writer(self._raw), "w", zipfile.ZIP_DEFLATED, compresslevel=level)
+
+    def _add(self, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+        # ZIP can't store times before 1980
+        info = zipfile.ZipInfo(arcname, max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0)))
+        info.external_attr = 0o100644 << 16
+        info.compress_type = self._zip.compression
+        # Renamed from the private _compresslevel in Python 3.13
+        if hasattr(info, "compress_level"):
+            info.compress_level = self.level
+        else:
+            info._compresslevel = self.level
+        with self._zip.open(info, "w", force_zip64=size > zipfile.ZIP64_LIMIT) as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+        return info.file_size
+
+    def close(self) -> int:
+        try:
+            self._zip.close()
+        finally:
+            self._raw.close()
+        return os.path.getsize(self.partial_path)
+
+
+class TarZstWriter(ArchiveWriter):
+    extension = ".tar.zst"
+
+    def __init__(self, base: Path, level: Optional[int] = None, manifest: bool = False):
+        super().__init__(base, level, manifest)
+        raw = open(self.partial_path, "xb")
+        try:
+            self._zstd = zstd_writer(throttle.writer(raw), level)
+        except Exception:
+            raw.close()
+            self.partial_path.unlink()
+            raise
+        # Stream mode, the compressor can't seek
+        self._tar = tarfile.open(fileobj=self._zstd, mode="w|")
+        self._tar.copybufsize = COPY_BUFFER
+
+    def _add(self, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+        return _add_to_tar(self._tar, src, size, mtime, arcname)
+
+    def close(self) -> int:
+        self._tar.close()
+        self._zstd.close()
+        return os.path.getsize(self.partial_path)
+
+
+class DirectoryWriter(ArchiveWriter):
+    def __init__(self, base: Path, level: Optional[int] = None, manifest: bool = False):
+        super().__init__(base, level, manifest)
+        self.partial_path.mkdir()
+
+    def _add(self, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+        target = _target_path(self.partial_path, arcname)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as dst:
+            shutil.copyfileobj(src, throttle.writer(dst), COPY_BUFFER)
+            return dst.tell()
+
+    def close(self) -> int:
+        return self.bytes_archived
+
+
+class StreamWriter(ArchiveWriter):
+    """Adds the files to the run's stdout tar stream, under the archive's name"""
+
+    staged = False
+
+    def __init__(self, base: Path, level: Optional[int] = None, manifest: bool = False):
+        super().__init__(base, level, manifest)
+        if _stream is None:
+            raise RuntimeError("The stdout format needs start_stream() first")
+        self._written = 0
+
+    def _add(self, src: BinaryIO, size: int, mtime: float, arcname: str) -> int:
+        # Members of concurrently extracted games interleave, but each member is whole
+        with _stream_lock:
+            offset = _stream.offset
+            size = _add_to_tar(_stream, src, size, mtime, f"{self.path.as_posix()}/{arcname}")
+            self._written += _stream.offset - offset
+        return size
+
+    def close(self) -> int:
+        return self._written
+
+
+class InstallWriter(ArchiveWriter):
+    """Places the files into the directory base, replacing existing ones
+
+    Each file is written next to its target and renamed over it. Files are cloned
+    or copied in the kernel when the filesystem allows, hardlinked with link=True,
+    and moved if they are under scratch (files the handlers made for this run).
+    methods counts how each file got there.
+    """
+
+    staged = False
+
+    def __init__(self, base: Path, level: Optional[int] = None, link: bool = False,
+                 scratch: Optional[Path] = None):
+        super().__init__(base, level)
+        self.link = link
+        self.scratch = scratch
+        self.methods: Counter = Counter()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def add(self, source, arcname):
+        # fastcopy counts the profiler bytes it really copies
+        size = self._place(source, PurePosixPath(arcname).as_posix())
+        self.files += 1
+        self.bytes_archived += size
+
+    def _place(self, source, arcname: str) -> int:
+        target = _target_path(self.path, arcname)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with fastcopy.atomic_target(target) as tmp:
+            if isinstance(source, snapshots.ArchivePath):
+                with source.open("rb") as src:
+                    fastcopy.write_stream(throttle.reader(src), tmp)
+                method = "stream"
+            elif self.scratch is not None and Path(source).is_relative_to(self.scratch):
+                method = fastcopy.move_file(source, tmp)
+            else:
+                method = fastcopy.copy_file(source, tmp, link=self.link)
+        self.methods[method] += 1
+        return os.path.getsize(target)
+
+    def close(self) -> int:
+        return self.bytes_archived
+
+    def __exit__(self, *exc_info):
+        self.archive_bytes = self.close()
+
+
+WRITERS = {"zip": ZipWriter, "tar.zst": TarZstWriter, "dir": DirectoryWriter, "stdout": StreamWriter}
+FORMATS = tuple(WRITERS)
+
+
+def open_writer(output_format: str, base: Path, level: Optional[int] = None,
+                manifest: bool = True) -> ArchiveWriter:
+    """Writer for an archive named base plus the format's extension"""
+    return WRITERS[output_format](base, level, manifest)
+
+
+def open_installer(target: Path, link: bool = False, scratch: Optional[Path] = None) -> InstallWriter:
+    """Writer that installs the files into the directory target"""
+    return InstallWriter(target, link=link, scratch=scratch)
+
+
+def start_stream(fileobj: BinaryIO):
+    """Start the tar stream of the stdout format on fileobj"""
+    global _stream, _stream_file
+    _stream_file = fileobj
+    _stream = tarfile.open(fileobj=throttle.writer(fileobj), mode="w|")
+    _stream.copybufsize = COPY_BUFFER
+
+
+def finish_stream():
+    """Write the end of the tar stream"""
+    global _stream
+    stream, _stream = _stream, None
+    if stream is not None:
+        stream.close()
+        _stream_file.flush()
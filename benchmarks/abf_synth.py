@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Synthetic Abiotic Factor ABF_SAVE_VERSION archives
+
+Builds archives in the layout parse_toc() and extract_archive() expect, with a
+configurable number and size of entries. The Oodle DLL is Windows-only, so the data
+is stored with a stand-in codec instead: "store" (no compression) or "zlib". The
+matching decompress function has the OodleLZ_Decompress calling convention and can be
+passed to extract_abf_saves.extract_archive(decompress_func=...).
+
+Usage:
+    python benchmarks/abf_synth.py OUTPUT.sav [--entries 31] [--entry-size 1048576] [--codec zlib]
+"""
+
+import argparse
+import ctypes
+import struct
+import zlib
+from pathlib import Path
+
+MAGIC = "ABF_SAVE_VERSION"
+CODECS = ("store", "zlib")
+# Compression format byte and the 3 bytes after it; reading these as a TOC path
+# length gives a value > 500, which ends TOC parsing
+FORMAT_HEADER = {"store": b"\x00\x0a\x00\x00", "zlib": b"\x8c\x0a\x00\x00"}
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _len_str(value: str) -> bytes:
+    encoded = value.encode("utf-8") + b"\0"
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def entry_names(count: int):
+    """Entry paths and classes like a real world archive: MetaData, world saves, players"""
+    names = [("Erebus/WorldSave_MetaData", "/Game/Blueprints/Saves/Abiotic_WorldMetadataSave.Abiotic_WorldMetadataSave_C")]
+    for i in range(1, count):
+        if i % 10 == 0:
+            names.append((f"Erebus/PlayerData/Player_{76561190000000000 + i}",
+                          "/Game/Blueprints/Saves/Abiotic_CharacterSave.Abiotic_CharacterSave_C"))
+        else:
+            names.append((f"Erebus/WorldSave_Facility_{i}", "/Game/Blueprints/Saves/Abiotic_WorldSave.Abiotic_WorldSave_C"))
+    return names
+
+
+def entry_chunks(index: int, size: int):
+    """Deterministic GVAS-looking entry data, yielded in chunks"""
+    pattern = (f"GVAS-entry-{index:05d}-".encode() + bytes(range(256))) * 64
+    yield b"GVAS"
+    remaining = size - 4
+    while remaining > 0:
+        chunk = pattern[:min(remaining, len(pattern))]
+        # Vary the data so zlib has real work to do
+        yield chunk.replace(b"\x00", struct.pack("B", remaining & 0xFF))
+        remaining -= len(chunk)
+
+
+def write_archive(path: Path, entries: int = 31, entry_size: int = 1024 * 1024, codec: str = "zlib") -> dict:
+    """Write a synthetic archive, returns its TOC entries and sizes"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec}")
+    total = entries * entry_size
+    if total >= 1 << 32:
+        raise ValueError("ABF archives store sizes as 32-bit values, keep the total under 4 GiB")
+
+    names = entry_names(entries)
+    toc = bytearray()
+    toc += _len_str(MAGIC)
+    toc += struct.pack("<I", 1)
+    toc += struct.pack("<I", total)
+    toc += struct.pack("<I", entries)
+    for i, (entry_path, class_path) in enumerate(names):
+        if i == 0:
+            # The first entry has an extra leading length field
+            toc += struct.pack("<I", 0)
+        toc += _len_str(entry_path)
+        toc += struct.pack("<I", entry_size)
+        toc += _len_str(class_path)
+        toc += struct.pack("<I", 0)
+
+    with open(path, "wb") as f:
+        f.write(toc)
+        f.write(FORMAT_HEADER[codec])
+        size_offset = f.tell()
+        f.write(struct.pack("<I", 0))
+
+        compressor = zlib.compressobj(1) if codec == "zlib" else None
+        comp_size = 0
+        for i in range(entries):
+            for chunk in entry_chunks(i, entry_size):
+                out = compressor.compress(chunk) if compressor else chunk
+                f.write(out)
+                comp_size += len(out)
+        if compressor:
+            out = compressor.flush()
+            f.write(out)
+            comp_size += len(out)
+
+        f.seek(size_offset)
+        f.write(struct.pack("<I", comp_size))
+
+    return {
+        "entries": [{"path": p, "size": entry_size, "class": c} for p, c in names],
+        "uncompressed_size": total,
+        "compressed_size": comp_size,
+        "archive_size": path.stat().st_size,
+    }
+
+
+def make_decompress(codec: str):
+    """Stand-in for OodleLZ_Decompress for archives written with `codec`"""
+
+    def decompress(compressed_data, compressed_size, output_buffer, output_size, *_):
+        data = ctypes.string_at(compressed_data, compressed_size)
+        if codec == "zlib":
+            data = zlib.decompress(data, bufsize=output_size)
+        size = min(len(data), output_size)
+        ctypes.memmove(output_buffer, data, size)
+        return size
+
+    return decompress
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Write a synthetic ABF_SAVE_VERSION archive")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--entries", type=int, default=31, help="Number of entries (default: %(default)s)")
+    parser.add_argument("--entry-size", type=int, default=1024 * 1024, help="Bytes per entry (default: %(default)s)")
+    parser.add_argument("--codec", choices=CODECS, default="zlib", help="Stand-in codec (default: %(default)s)")
+    args = parser.parse_args()
+
+    info = write_archive(args.output, args.entries, args.entry_size, args.codec)
+    print(f"Wrote {args.output}: {len(info['entries'])} entries, "
+          f"{info['uncompressed_size']:,} bytes uncompressed, {info['archive_size']:,} bytes on disk")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+ABF pipeline benchmark
+
+Builds synthetic ABF_SAVE_VERSION archives of growing size (see abf_synth.py) and
+times each phase of extract_abf_saves: reading the archive, parse_toc,
+decompress_oodle (with the stand-in codec) and writing the entries. A second pass
+runs the whole extract_archive under tracemalloc to record peak memory.
+
+Usage:
+    python benchmarks/bench_abf.py [--sizes 16M,64M,256M] [--entries 31] [--codec zlib]
+                                   [--output benchmarks/results/abf.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import abf_synth  # noqa: E402
+import extract_abf_saves  # noqa: E402
+
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "abf.json"
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def bench_size(work_dir: Path, total_size: int, entries: int, codec: str) -> Dict[str, Any]:
+    entry_size = total_size // entries
+    archive = work_dir / "archive.sav"
+    out_dir = work_dir / "out"
+    out_dir.mkdir(exist_ok=True)
+
+    started = time.perf_counter()
+    info = abf_synth.write_archive(archive, entries, entry_size, codec)
+    build_s = time.perf_counter() - started
+    decompress_func = abf_synth.make_decompress(codec)
+    uncompressed = info["uncompressed_size"]
+
+    # The pipeline prints progress, which would only add noise to the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        with open(archive, "rb") as f:
+            data = f.read()
+        read_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        toc_entries, data_offset, expected_size = extract_abf_saves.parse_toc(data)
+        toc_s = time.perf_counter() - started
+
+        data_section = data[data_offset:]
+        comp_size = int.from_bytes(data_section[4:8], "little")
+        compressed = data_section[8:8 + comp_size]
+        started = time.perf_counter()
+        decompressed = extract_abf_saves.decompress_oodle(decompress_func, compressed, expected_size)
+        decompress_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        extract_abf_saves.write_entries(toc_entries, decompressed, str(out_dir))
+        write_s = time.perf_counter() - started
+
+        del data, data_section, compressed, decompressed
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        ok = extract_abf_saves.extract_archive(str(archive), str(out_dir), decompress_func=decompress_func)
+        extract_s = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if not ok or len(toc_entries) != entries:
+        raise RuntimeError(f"Extraction of the {total_size:,} byte archive failed")
+
+    return {
+        "uncompressed_bytes": uncompressed,
+        "archive_bytes": info["archive_size"],
+        "entries": entries,
+        "build_s": round(build_s, 4),
+        "read_s": round(read_s, 4),
+        "parse_toc_s": round(toc_s, 6),
+        "decompress_s": round(decompress_s, 4),
+        "decompress_mb_per_s": round(uncompressed / 1e6 / max(decompress_s, 1e-9), 1),
+        "write_s": round(write_s, 4),
+        "write_per_entry_ms": round(write_s / entries * 1000, 3),
+        "extract_archive_s": round(extract_s, 4),
+        "peak_traced_bytes": peak,
+        "peak_to_uncompressed": round(peak / uncompressed, 2),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the ABF extraction pipeline on synthetic archives")
+    parser.add_argument("--sizes", default="16M,64M,256M",
+                        help="Comma-separated uncompressed archive sizes, up to 4G (default: %(default)s)")
+    parser.add_argument("--entries", type=int, default=31, help="Entries per archive (default: %(default)s)")
+    parser.add_argument("--codec", choices=abf_synth.CODECS, default="zlib",
+                        help="Stand-in codec (default: %(default)s)")
+    parser.add_argument("--work-dir", type=Path, help="Where to write the archives (default: a temp dir)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp:
+        for size in [parse_size(s) for s in args.sizes.split(",")]:
+            result = bench_size(Path(tmp), size, args.entries, args.codec)
+            results.append(result)
+            print(f"{size / 1e6:>8.0f} MB  toc {result['parse_toc_s'] * 1000:7.3f} ms  "
+                  f"decompress {result['decompress_mb_per_s']:8.1f} MB/s  "
+                  f"write {result['write_per_entry_ms']:8.3f} ms/entry  "
+                  f"peak {result['peak_traced_bytes'] / 1e6:8.1f} MB ({result['peak_to_uncompressed']}x)")
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": {"sizes": args.sizes, "entries": args.entries, "codec": args.codec},
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Output format benchmark
+
+Collects the save files of every supported game in a Packages tree, like main.py
+does before writing archives, and writes them with each output format of
+backends.py (and a few compression levels). Reports write throughput (MB of saves
+per second) and compression ratio per format. The tree is a synthetic profile (see
+wgs_synth.py) unless --corpus points at a real Packages directory or a snapshot of
+one. The stdout format writes into a byte counter instead of a pipe. Archives include
+the SHA256SUMS manifest, as main.py writes them by default.
+
+tar.zst configs are skipped when neither compression.zstd (Python 3.14+) nor the
+zstandard package is available.
+
+Usage:
+    python benchmarks/bench_backends.py [--corpus PACKAGES] [--containers 50] [--file-size 262144]
+                                        [--repeat 3] [--output benchmarks/results/backends.json]
+"""
+
+import argparse
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import wgs_synth  # noqa: E402
+from bench_extract import SKIPPED_HANDLERS, timed  # noqa: E402
+from wgs_synth import main  # noqa: E402
+
+import backends  # noqa: E402
+import snapshots  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "backends.json"
+
+# (label, format, compression level)
+CONFIGS = [
+    ("zip-1", "zip", 1),
+    ("zip-6", "zip", 6),
+    ("zip-9", "zip", 9),
+    ("tar.zst-1", "tar.zst", 1),
+    ("tar.zst-3", "tar.zst", 3),
+    ("tar.zst-9", "tar.zst", 9),
+    ("tar.zst-19", "tar.zst", 19),
+    ("dir", "dir", None),
+    ("stdout", "stdout", None),
+]
+
+
+class _Counter(io.RawIOBase):
+    """Write-only sink that counts bytes"""
+
+    def __init__(self):
+        self.count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.count += len(data)
+        return len(data)
+
+
+def collect_saves(root, games: Dict[str, Any], temp_dir: Path) -> List[Tuple[str, List[Tuple[Any, Any]]]]:
+    """(archive name, save paths) for every user of every supported game in root
+
+    Files the handlers create are left in temp_dir.
+    """
+    collected = []
+    for pkg_name in main.discover_games(games, root):
+        if games[pkg_name]["handler"] in SKIPPED_HANDLERS:
+            continue
+        for user, user_dir in main.find_user_containers(pkg_name, root):
+            store_pkg_name, containers = main.read_user_containers(user_dir)
+            # Not a TemporaryDirectory, it would be removed once it is garbage collected
+            handler_dir = SimpleNamespace(name=tempfile.mkdtemp(dir=temp_dir))
+            save_paths = main.get_save_paths(games, store_pkg_name, containers, handler_dir)
+            if save_paths:
+                collected.append((f"{pkg_name}_{user}", save_paths))
+    return collected
+
+
+def write_all(output_format: str, level, work_dir: Path, collected) -> int:
+    """Write every archive with one format, returns the total output size"""
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir()
+    counter = None
+    if output_format == "stdout":
+        counter = _Counter()
+        backends.start_stream(counter)
+    total = 0
+    try:
+        for name, save_paths in collected:
+            with backends.open_writer(output_format, work_dir / name, level) as writer:
+                for file_name, file_path in save_paths:
+                    writer.add(file_path, file_name)
+            total += writer.archive_bytes
+    finally:
+        if counter is not None:
+            backends.finish_stream()
+    # The stdout total includes the end of archive blocks
+    return counter.count if counter is not None else total
+
+
+def run(corpus, containers: int, file_size: int, users: int, repeat: int) -> Dict[str, Any]:
+    games = main.read_game_list()
+    if games is None:
+        raise SystemExit("Failed to read game list")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if corpus is None:
+            root = tmp / "Packages"
+            wgs_synth.generate_profile(root, games, containers, file_size, users)
+        elif snapshots.is_archive(corpus):
+            root = snapshots.open_root(corpus)
+        else:
+            root = corpus
+        staging = tmp / "staging"
+        staging.mkdir()
+        collected = collect_saves(root, games, staging)
+        input_bytes = sum(
+            path.size() if isinstance(path, snapshots.ArchivePath) else Path(path).stat().st_size
+            for _, save_paths in collected for _, path in save_paths
+        )
+        if not collected:
+            raise SystemExit("No saves found in the corpus")
+
+        results = {}
+        for label, output_format, level in CONFIGS:
+            try:
+                backends.check_format(output_format)
+            except RuntimeError as e:
+                results[label] = {"skipped": str(e)}
+                continue
+            written = timed(lambda: write_all(output_format, level, tmp / "out", collected), repeat)
+            output_bytes = written["result"]
+            results[label] = {
+                "format": output_format,
+                "level": level,
+                "best_s": written["best_s"],
+                "median_s": written["median_s"],
+                "mb_per_s": round(input_bytes / 1e6 / max(written["best_s"], 1e-9), 2),
+                "output_bytes": output_bytes,
+                "ratio": round(input_bytes / max(output_bytes, 1), 4),
+            }
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": {"corpus": str(corpus) if corpus else "synthetic", "containers": containers,
+                   "file_size": file_size, "users": users, "repeat": repeat},
+        "archives": len(collected),
+        "input_bytes": input_bytes,
+        "configs": results,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the output formats on a save corpus")
+    parser.add_argument("--corpus", type=Path,
+                        help="Packages directory or snapshot to read the saves from (default: a synthetic profile)")
+    parser.add_argument("--containers", type=int, default=50, help="Synthetic saves per game (default: %(default)s)")
+    parser.add_argument("--file-size", type=int, default=256 * 1024,
+                        help="Synthetic bytes per blob (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=1, help="Synthetic users per game (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.containers, args.file_size, args.users, args.repeat)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    print(f"{results['archives']} archives, {results['input_bytes'] / 1e6:.1f} MB of saves")
+    print(f"{'config':<12} {'best_s':>9} {'MB/s':>9} {'ratio':>8}")
+    for label, r in results["configs"].items():
+        if "skipped" in r:
+            print(f"{label:<12} skipped: {r['skipped']}")
+            continue
+        print(f"{label:<12} {r['best_s']:>9.4f} {r['mb_per_s']:>9.1f} {r['ratio']:>8.3f}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
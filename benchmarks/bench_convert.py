@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Conversion benchmark
+
+Runs AbioticConverter.convert end-to-end on synthetic worlds (30 world saves and N
+players by default) against a synthetic dedicated server template, using the
+deterministic uesave stand-in from fake_uesave.py. For several converter
+configurations it reports wall time per stage, the number of uesave subprocesses and
+the JSON bytes written and read.
+
+POSIX only: the stand-in is installed as a `uesave` shell wrapper on PATH.
+
+Usage:
+    python benchmarks/bench_convert.py [--players 4] [--save-size 262144] [--latency-ms 20]
+                                       [--output benchmarks/results/convert.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import fake_uesave  # noqa: E402
+from convert_to_steam import AbioticConverter, ResultCache  # noqa: E402
+from main import ABIOTIC_SAVE_TYPES  # noqa: E402
+
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "convert.json"
+
+
+def install_standin(bin_dir: Path):
+    """Put a `uesave` wrapper around fake_uesave.py first on PATH"""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    wrapper = bin_dir / "uesave"
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{BENCH_DIR / "fake_uesave.py"}" "$@"\n')
+    wrapper.chmod(0o755)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+
+def _data(rng: random.Random, size: int) -> list:
+    return list(rng.randbytes(size))
+
+
+def write_template(template_dir: Path, rng: random.Random, save_size: int):
+    """Steam dedicated server world to use as conversion template"""
+    prefix = fake_uesave.header_prefix()
+    (template_dir / "PlayerData").mkdir(parents=True)
+    (template_dir / "WorldSave_MetaData.sav").write_bytes(fake_uesave.encode_save(
+        prefix, ABIOTIC_SAVE_TYPES["metadata"], {"ElapsedMinutes": 10, "Data": _data(rng, 256)}))
+    (template_dir / "WorldSave_Facility.sav").write_bytes(fake_uesave.encode_save(
+        prefix, ABIOTIC_SAVE_TYPES["world"], {"Data": _data(rng, save_size)}))
+    (template_dir / "PlayerData" / "Player_76561190000000001.sav").write_bytes(fake_uesave.encode_save(
+        prefix, ABIOTIC_SAVE_TYPES["player"], {"Data": _data(rng, save_size // 4)}, {"variant": "None"}))
+
+
+def write_world_zip(zip_path: Path, rng: random.Random, world_saves: int, players: int, save_size: int):
+    """Xbox extraction ZIP as produced by main.py's abiotic-factor handler"""
+    # Raw Xbox saves are a wrapper byte followed by the properties
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("Erebus/WorldSave_MetaData.sav", b"\x01" + fake_uesave.encode_body(
+            {"bHasBeenCompressed_0": True, "ElapsedMinutes": 600, "Data": _data(rng, 256)}))
+        for i in range(world_saves - 1):
+            zf.writestr(f"Erebus/WorldSave_Facility_{i}.sav", b"\x01" + fake_uesave.encode_body(
+                {"Data": _data(rng, save_size)}))
+        for i in range(players):
+            zf.writestr(f"Erebus/PlayerData/Player_{76561190000000100 + i}.sav", b"\x01" + fake_uesave.encode_body(
+                {"Data": _data(rng, save_size // 4)}, {"variant": "Xbox"}))
+        zf.writestr("Erebus/SandboxSettings.ini", "[SandboxSettings]\n")
+
+
+def read_log(log_path: Path) -> Dict[str, int]:
+    counts = {"subprocesses": 0, "to_json": 0, "from_json": 0, "json_bytes_read": 0, "json_bytes_written": 0}
+    if not log_path.exists():
+        return counts
+    for line in log_path.read_text().splitlines():
+        call = json.loads(line)
+        counts["subprocesses"] += 1
+        if call["command"] == "to-json":
+            counts["to_json"] += 1
+            counts["json_bytes_read"] += call["bytes_out"]
+        else:
+            counts["from_json"] += 1
+            counts["json_bytes_written"] += call["bytes_in"]
+    return counts
+
+
+def run_config(work: Path, name: str, zip_path: Path, template_dir: Path, options: Dict[str, Any],
+               warm: bool = False) -> Dict[str, Any]:
+    """Convert the world once with the given converter options"""
+    cache_dir = work / f"cache-{name}"
+    output_dir = work / f"out-{name}"
+    log_path = work / f"uesave-{name}.log"
+
+    def convert() -> AbioticConverter:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        log_path.unlink(missing_ok=True)
+        result_cache = ResultCache(cache_dir) if options.get("result_cache") else None
+        converter = AbioticConverter(zip_path, template_dir, output_dir, cache_dir=cache_dir,
+                                     interactive=False, stream=options.get("stream", False),
+                                     file_workers=options.get("workers", 1), result_cache=result_cache,
+                                     verify=options.get("verify"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not converter.convert():
+                raise RuntimeError(f"Conversion failed in config {name}: {converter.errors}")
+        return converter
+
+    if warm:
+        # Fill the template and result caches first
+        convert()
+    started = time.perf_counter()
+    converter = convert()
+    wall_s = time.perf_counter() - started
+
+    return {
+        "options": options,
+        "warm_caches": warm,
+        "wall_s": round(wall_s, 3),
+        "stages_s": {title: round(seconds, 3) for title, seconds in converter.timings.items()},
+        **read_log(log_path),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark convert_to_steam.py with a uesave stand-in")
+    parser.add_argument("--world-saves", type=int, default=30, help="World saves per world (default: %(default)s)")
+    parser.add_argument("--players", type=int, default=4, help="Player saves per world (default: %(default)s)")
+    parser.add_argument("--save-size", type=int, default=256 * 1024, help="Bytes per world save (default: %(default)s)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Stand-in delay per uesave call (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=8, help="Workers for the parallel configs (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    configs = [
+        ("sequential", {"workers": 1}, False),
+        ("parallel", {"workers": args.workers}, False),
+        ("parallel+stream", {"workers": args.workers, "stream": True}, False),
+        ("parallel+stream+verify", {"workers": args.workers, "stream": True, "verify": "full"}, False),
+        ("result-cache-warm", {"workers": args.workers, "stream": True, "result_cache": True}, True),
+    ]
+
+    rng = random.Random(0)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        install_standin(work / "bin")
+        os.environ["UESAVE_STANDIN_LATENCY_MS"] = str(args.latency_ms)
+        template_dir = work / "template" / "Erebus"
+        write_template(template_dir, rng, args.save_size)
+        zip_path = work / "abiotic_factor_bench.zip"
+        write_world_zip(zip_path, rng, args.world_saves, args.players, args.save_size)
+
+        for name, options, warm in configs:
+            os.environ["UESAVE_STANDIN_LOG"] = str(work / f"uesave-{name}.log")
+            result = run_config(work, name, zip_path, template_dir, options, warm)
+            results[name] = result
+            print(f"{name:<24} {result['wall_s']:8.2f}s  {result['subprocesses']:4d} uesave calls  "
+                  f"{result['json_bytes_written'] / 1e6:8.1f} MB JSON written")
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "params": {"world_saves": args.world_saves, "players": args.players, "save_size": args.save_size,
+                   "latency_ms": args.latency_ms, "workers": args.workers},
+        "configs": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
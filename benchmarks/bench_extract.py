@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark
+
+Generates a synthetic WGS profile (see wgs_synth.py) and times the extraction path of
+main.py on it: find_user_containers, read_user_containers, get_save_paths and ZIP
+writing, per handler. Results are written as JSON so they can be committed and
+compared in review.
+
+Usage:
+    python benchmarks/bench_extract.py [--containers 50] [--file-size 262144] [--repeat 3]
+                                       [--output benchmarks/results/extract.json]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import wgs_synth  # noqa: E402
+from wgs_synth import main  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "extract.json"
+
+# Handlers that need more than the Python standard library to run
+SKIPPED_HANDLERS = {"abiotic-factor": "needs the Oodle DLL"}
+
+
+def timed(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run func `repeat` times, returns best/median seconds and the last result"""
+    samples: List[float] = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return {"best_s": round(min(samples), 6), "median_s": round(statistics.median(samples), 6), "result": result}
+
+
+def write_zip(zip_path: Path, save_paths) -> int:
+    if zip_path.exists():
+        zip_path.unlink()
+    with zipfile.ZipFile(zip_path, "x", zipfile.ZIP_DEFLATED) as save_zip:
+        for file_name, file_path in save_paths:
+            save_zip.write(file_path, arcname=file_name)
+    return zip_path.stat().st_size
+
+
+def bench_game(root: Path, work_dir: Path, games: Dict[str, Any], pkg_name: str, repeat: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+
+    found = timed(lambda: main.find_user_containers(pkg_name, root), repeat)
+    result["find_user_containers"] = {k: v for k, v in found.items() if k != "result"}
+    _, user_dir = found["result"][0]
+
+    read = timed(lambda: main.read_user_containers(user_dir), repeat)
+    result["read_user_containers"] = {k: v for k, v in read.items() if k != "result"}
+    store_pkg_name, containers = read["result"]
+
+    handler = games[pkg_name]["handler"]
+    if handler in SKIPPED_HANDLERS:
+        result["skipped"] = SKIPPED_HANDLERS[handler]
+        return result
+
+    temp_dirs = []
+
+    def save_paths():
+        temp_dir = tempfile.TemporaryDirectory(dir=work_dir, ignore_cleanup_errors=True)
+        temp_dirs.append(temp_dir)
+        return main.get_save_paths(games, store_pkg_name, containers, temp_dir)
+
+    paths = timed(save_paths, repeat)
+    result["get_save_paths"] = {k: v for k, v in paths.items() if k != "result"}
+    save_meta = paths["result"]
+
+    input_bytes = sum(Path(p).stat().st_size for _, p in save_meta)
+    zip_path = work_dir / f"{pkg_name}.zip"
+    zipped = timed(lambda: write_zip(zip_path, save_meta), repeat)
+    result["zip_write"] = {k: v for k, v in zipped.items() if k != "result"}
+    result["saves"] = len(save_meta)
+    result["input_bytes"] = input_bytes
+    result["zip_bytes"] = zipped["result"]
+    result["zip_mb_per_s"] = round(input_bytes / 1e6 / max(zipped["best_s"], 1e-9), 2)
+
+    for temp_dir in temp_dirs:
+        temp_dir.cleanup()
+    return result
+
+
+def run(containers: int, file_size: int, users: int, repeat: int) -> Dict[str, Any]:
+    games = main.read_game_list()
+    if games is None:
+        raise SystemExit("Failed to read game list")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "Packages"
+        work_dir = Path(tmp) / "work"
+        work_dir.mkdir()
+        started = time.perf_counter()
+        generated = wgs_synth.generate_profile(root, games, containers, file_size, users)
+        generate_s = time.perf_counter() - started
+
+        results = {}
+        for pkg_name, info in generated.items():
+            results[info["handler"]] = {"package": pkg_name, **info, **bench_game(root, work_dir, games, pkg_name, repeat)}
+
+    totals = {
+        stage: round(sum(r[stage]["best_s"] for r in results.values() if stage in r), 6)
+        for stage in ("find_user_containers", "read_user_containers", "get_save_paths", "zip_write")
+    }
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": {"containers": containers, "file_size": file_size, "users": users, "repeat": repeat},
+        "generate_s": round(generate_s, 3),
+        "totals_best_s": totals,
+        "handlers": results,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction path on a synthetic WGS profile")
+    parser.add_argument("--containers", type=int, default=50, help="Saves per game (default: %(default)s)")
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="Bytes per blob (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=1, help="Users per game (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = run(args.containers, args.file_size, args.users, args.repeat)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    print(f"{'handler':<20} {'read_idx':>10} {'save_paths':>11} {'zip':>9} {'MB/s':>8}")
+    for handler, r in results["handlers"].items():
+        if "skipped" in r:
+            print(f"{handler:<20} {r['read_user_containers']['best_s']:>10.4f}  skipped: {r['skipped']}")
+            continue
+        print(f"{handler:<20} {r['read_user_containers']['best_s']:>10.4f} {r['get_save_paths']['best_s']:>11.4f} "
+              f"{r['zip_write']['best_s']:>9.4f} {r['zip_mb_per_s']:>8.1f}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
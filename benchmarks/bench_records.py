@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Container record memory benchmark
+
+Writes synthetic users with many containers (see wgs_synth.py), reads all of them with
+main.read_user_containers and measures with tracemalloc how much memory the returned
+records keep alive, like a batch run holding several users at once. For comparison
+it builds the list of dicts that read_user_containers returned before records.py
+(UUID and datetime objects, and a Path for every file) from the same data and
+measures that too.
+
+Usage:
+    python benchmarks/bench_records.py [--containers 5000] [--files 4] [--users 4] [--repeat 3]
+                                       [--output benchmarks/results/records.json]
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import wgs_synth  # noqa: E402
+from bench_extract import timed  # noqa: E402
+from wgs_synth import main  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "records.json"
+FILE_NAMES = ["data", "meta", "icon", "thumbnail", "header", "extra", "backup", "index"]
+
+
+def legacy_dicts(containers) -> List[Dict[str, Any]]:
+    """The containers in the dict shape read_user_containers returned before records.py"""
+    copy = lambda value: value.encode().decode()  # noqa: E731 (own strings, like a fresh parse)
+    result = []
+    for container in containers:
+        container_path = container.path
+        result.append({
+            "name": copy(container.name),
+            "number": container.number,
+            "guid": uuid.UUID(bytes=container.guid),
+            "modified": container.modified,
+            "files": [{"name": copy(file.name), "guid": uuid.UUID(bytes=file.guid),
+                       "path": container_path / file.guid.hex().upper()}
+                      for file in container.files],
+        })
+    return result
+
+
+def retained(build: Callable[[], Any]) -> int:
+    """Bytes still allocated after build() returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(containers: int, files: int, users: int, repeat: int) -> Dict[str, Any]:
+    rng = random.Random(0)
+    when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    layout = [(f"Slot{i}", FILE_NAMES[:files]) for i in range(containers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_dirs = []
+        for user in range(users):
+            user_dir = Path(tmp) / f"{0x0009000000000000 + user:016X}_{wgs_synth.TITLE_ID}"
+            wgs_synth.write_user_containers(user_dir, "Bench.Records_0000000000000", layout, 1, rng, when)
+            user_dirs.append(user_dir)
+
+        read_all = lambda: [main.read_user_containers(user_dir)[1] for user_dir in user_dirs]  # noqa: E731
+        records_bytes = retained(read_all)
+        loaded = read_all()
+        legacy_bytes = retained(lambda: [legacy_dicts(user) for user in loaded])
+        read = timed(read_all, repeat)
+        paths = timed(lambda: [file.path for user in loaded for container in user for file in container.files],
+                      repeat)
+
+    total_files = containers * files * users
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": {"containers": containers, "files": files, "users": users, "repeat": repeat},
+        "files": total_files,
+        "records_bytes": records_bytes,
+        "legacy_bytes": legacy_bytes,
+        "records_bytes_per_file": round(records_bytes / total_files, 1),
+        "legacy_bytes_per_file": round(legacy_bytes / total_files, 1),
+        "saving": round(1 - records_bytes / legacy_bytes, 3),
+        "read_user_containers_s": read["best_s"],
+        "all_paths_s": paths["best_s"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Measure the memory of the container records")
+    parser.add_argument("--containers", type=int, default=5000, help="Containers per user (default: %(default)s)")
+    parser.add_argument("--files", type=int, default=4, choices=range(1, len(FILE_NAMES) + 1),
+                        metavar="N", help="Files per container (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=4, help="Users read at once (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = run(args.containers, args.files, args.users, args.repeat)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    print(f"{results['files']} files in {args.containers * args.users} containers")
+    print(f"records: {results['records_bytes'] / 1e6:8.2f} MB ({results['records_bytes_per_file']} B/file)")
+    print(f"dicts:   {results['legacy_bytes'] / 1e6:8.2f} MB ({results['legacy_bytes_per_file']} B/file)")
+    print(f"saving:  {results['saving']:.1%}")
+    print(f"read_user_containers {results['read_user_containers_s']:.4f}s, "
+          f"every blob path {results['all_paths_s']:.4f}s")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for uesave-rs
+
+Implements the two commands convert_to_steam.py uses:
+    fake_uesave.py to-json -i SAVE            (JSON on stdout)
+    fake_uesave.py from-json -i JSON -o SAVE
+
+It only understands the synthetic saves written by encode_save(): a real GVAS header
+(magic, engine and custom versions, save_game_type) followed by a body holding the
+properties as compact JSON. Like uesave, byte data is expanded into JSON integer
+arrays, so the JSON is several times larger than the save.
+
+Environment:
+    UESAVE_STANDIN_LATENCY_MS   extra delay per call, to mimic real decode time
+    UESAVE_STANDIN_LOG          append one JSON line per call (command, bytes in/out)
+"""
+
+import base64
+import json
+import os
+import struct
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from convert_to_steam import parse_gvas_header  # noqa: E402
+
+# The template header slicing in convert_to_steam looks for this property name
+FIRST_PROPERTY = "SaveVersion"
+
+
+def _fstring(value: str) -> bytes:
+    encoded = value.encode("utf-8") + b"\0"
+    return struct.pack("<i", len(encoded)) + encoded
+
+
+def header_prefix(custom_versions: int = 74) -> bytes:
+    """GVAS header up to (not including) save_game_type, like Abiotic Factor's UE 5.4 saves"""
+    prefix = bytearray(b"GVAS")
+    prefix += struct.pack("<iii", 3, 522, 1012)
+    prefix += struct.pack("<HHHI", 5, 4, 4, 0x800F424C)
+    prefix += _fstring("++DF+ABF")
+    prefix += struct.pack("<ii", 3, custom_versions)
+    for i in range(custom_versions):
+        prefix += uuid.UUID(int=i * 0x9E3779B97F4A7C15).bytes + struct.pack("<i", i % 7)
+    return bytes(prefix)
+
+
+def encode_body(properties: dict, af_data: dict | None = None) -> bytes:
+    """Save body: first property name, then properties with byte data as base64"""
+    props = dict(properties)
+    if "Data" in props:
+        props["Data"] = base64.b64encode(bytes(props["Data"])).decode("ascii")
+    payload = {"properties": props}
+    if af_data is not None:
+        payload["af_data"] = af_data
+    encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    return _fstring(FIRST_PROPERTY) + struct.pack("<I", len(encoded)) + encoded
+
+
+def encode_save(prefix: bytes, save_game_type: str, properties: dict, af_data: dict | None = None) -> bytes:
+    return prefix + _fstring(save_game_type) + encode_body(properties, af_data)
+
+
+def decode_save(data: bytes) -> dict:
+    header = parse_gvas_header(data)
+    body = data[header["end"]:]
+    name_len = struct.unpack("<i", body[:4])[0]
+    if body[4:4 + name_len - 1].decode() != FIRST_PROPERTY:
+        raise ValueError("Unexpected first property")
+    offset = 4 + name_len
+    payload_len = struct.unpack("<I", body[offset:offset + 4])[0]
+    payload = json.loads(body[offset + 4:offset + 4 + payload_len])
+    props = payload["properties"]
+    if "Data" in props:
+        props["Data"] = list(base64.b64decode(props["Data"]))
+    root = {"save_game_type": header["save_game_type"], "properties": props}
+    if "af_data" in payload:
+        root["af_data"] = payload["af_data"]
+    return {"header": {"prefix": data[:header["type_offset"]].hex()}, "root": root}
+
+
+def _log(command: str, bytes_in: int, bytes_out: int):
+    log_path = os.environ.get("UESAVE_STANDIN_LOG")
+    if log_path:
+        with open(log_path, "a") as f:
+            f.write(json.dumps({"command": command, "bytes_in": bytes_in, "bytes_out": bytes_out}) + "\n")
+
+
+def main_cli(argv):
+    if len(argv) < 3 or argv[0] not in ("to-json", "from-json") or "-i" not in argv:
+        print("usage: uesave to-json -i SAVE | from-json -i JSON -o SAVE", file=sys.stderr)
+        return 2
+    latency = float(os.environ.get("UESAVE_STANDIN_LATENCY_MS", "0"))
+    if latency:
+        time.sleep(latency / 1000)
+
+    input_path = Path(argv[argv.index("-i") + 1])
+    raw = input_path.read_bytes()
+    try:
+        if argv[0] == "to-json":
+            out = json.dumps(decode_save(raw), indent=2)
+            sys.stdout.write(out)
+            _log("to-json", len(raw), len(out))
+        else:
+            data = json.loads(raw)
+            root = data["root"]
+            save = bytes.fromhex(data["header"]["prefix"]) + _fstring(root["save_game_type"])
+            save += encode_body(root["properties"], root.get("af_data"))
+            Path(argv[argv.index("-o") + 1]).write_bytes(save)
+            _log("from-json", len(raw), len(save))
+    except (ValueError, KeyError, IndexError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli(sys.argv[1:]))
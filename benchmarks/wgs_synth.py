@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Synthetic WGS profile generator
+
+Writes a fake %LOCALAPPDATA%\\Packages tree with SystemAppData/wgs/<user>_<title>/
+containers.index, container.N and blob files for every handler type in games.json,
+so the extractor can be exercised and benchmarked on any OS.
+
+Usage:
+    python benchmarks/wgs_synth.py OUTPUT_DIR [--containers 20] [--file-size 65536] [--users 1]
+"""
+
+import argparse
+import json
+import random
+import struct
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import main  # noqa: E402
+
+TITLE_ID = "00000000000000000000000000000000"
+
+# A container is (name, [file names])
+Layout = List[Tuple[str, List[str]]]
+
+
+def handler_layout(handler: str, count: int) -> Layout:
+    """Container/file layout that the given handler expects, with `count` saves"""
+    if handler == "1c1f":
+        return [(f"Save{i}", ["data"]) for i in range(count)]
+    if handler == "1cnf":
+        return [("Saves", [f"Slot{i}" for i in range(count)])]
+    if handler == "1cnf-folder":
+        return [(f"Folder{i}", ["save.dat", "meta.dat"]) for i in range(count)]
+    if handler == "control":
+        return [(f"Slot{i}", ["meta", "data"]) for i in range(count)]
+    if handler == "starfield":
+        saves = [(f"Saves/Save{i}_A1B2C3D4_Player_Cydonia_000{i}.sfs",
+                  ["toc"] + [f"BlobData{j}" for j in range(3)]) for i in range(count)]
+        # Non-save containers are skipped by the handler
+        return saves + [("Settings/StarfieldPrefs.ini", ["data"])]
+    if handler == "lies-of-p":
+        return [(f"{76561190000000000 + i}SaveData{i}", ["data"]) for i in range(count)]
+    if handler == "palworld":
+        world = "0123456789ABCDEF0123456789ABCDEF"
+        layout = [(f"{world}-Level", ["data"]), (f"{world}-LevelMeta", ["data"])]
+        return layout + [(f"{world}-Players-{i:032X}", ["data"]) for i in range(count)]
+    if handler == "like-a-dragon":
+        layout = [(f"slot{i}/datasav", ["data", "icon"]) for i in range(count)]
+        return layout + [("system/datasys", ["data"])]
+    if handler == "cricket-24":
+        return [(f"Career{i}", [f"Save{j}.CHUNK0" for j in range(2)]) for i in range(count)]
+    if handler == "forza":
+        return [(f"Profile{i}", ["Data", "Header"]) for i in range(count)]
+    if handler == "arcade-paradise":
+        return [("RATSaveData", ["data"])]
+    if handler == "state-of-decay-2":
+        return [("SaveGames", [f"Saves/Slot{i}" for i in range(count)])]
+    if handler == "railway-empire-2":
+        return [(f"save{i}.sav", ["savegame", "description"]) for i in range(count)]
+    if handler == "coral-island":
+        layout = [(f"Slot{i}", ["data"]) for i in range(count)]
+        return layout + [(f"BackupSlot{i}", ["data"]) for i in range(count)]
+    if handler == "abiotic-factor":
+        return [("Erebus-WC", ["data"])]
+    raise ValueError(f"No synthetic layout for handler {handler}")
+
+
+def _utf16_str(value: str) -> bytes:
+    encoded = value.encode("utf-16-le")
+    return struct.pack("<i", len(encoded) // 2) + encoded
+
+
+def _filetime(when: datetime) -> bytes:
+    delta = when - main.filetime_epoch
+    return struct.pack("<Q", int(delta.total_seconds() * 10_000_000))
+
+
+def _payload(rng: random.Random, size: int) -> bytes:
+    """Half incompressible, half repetitive data, roughly like real saves"""
+    noise = rng.randbytes(size // 2)
+    pattern = b"SaveProperty\0\x01\x00\x00\x00" * (size // 34 + 1)
+    return (noise + pattern)[:size]
+
+
+def write_user_containers(user_dir: Path, store_pkg_name: str, layout: Layout, file_size: int,
+                          rng: random.Random, when: datetime) -> int:
+    """Write containers.index, container files and blobs, returns bytes written"""
+    user_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+
+    index = bytearray()
+    index += struct.pack("<i", 0x0E)
+    index += struct.pack("<i", len(layout))
+    index += _utf16_str("")
+    index += _utf16_str(f"{store_pkg_name}!App")
+    index += _filetime(when)
+    index += struct.pack("<i", 0)
+    index += _utf16_str(str(uuid.UUID(int=rng.getrandbits(128))))
+    index += bytes(8)
+
+    for container_name, file_names in layout:
+        container_num = rng.randint(1, 200)
+        container_guid = uuid.UUID(int=rng.getrandbits(128))
+        index += _utf16_str(container_name)
+        index += _utf16_str(container_name)
+        index += _utf16_str(f'"0x8D{rng.getrandbits(48):012X}"')
+        index += struct.pack("B", container_num)
+        index += struct.pack("<i", 1)
+        index += container_guid.bytes_le
+        index += _filetime(when)
+        index += bytes(16)
+
+        container_dir = user_dir / container_guid.hex.upper()
+        container_dir.mkdir(exist_ok=True)
+        container_file = bytearray(struct.pack("<i", 4) + struct.pack("<i", len(file_names)))
+        for file_name in file_names:
+            file_guid = uuid.UUID(int=rng.getrandbits(128))
+            container_file += file_name.encode("utf-16-le").ljust(128, b"\0")
+            container_file += file_guid.bytes_le * 2
+            data = _payload(rng, file_size)
+            (container_dir / file_guid.hex.upper()).write_bytes(data)
+            written += len(data)
+        (container_dir / f"container.{container_num}").write_bytes(container_file)
+        written += len(container_file)
+
+    (user_dir / "containers.index").write_bytes(index)
+    return written + len(index)
+
+
+def generate_profile(packages_root: Path, games: Dict[str, Any], containers: int = 20,
+                     file_size: int = 64 * 1024, users: int = 1, all_games: bool = False,
+                     seed: int = 0) -> Dict[str, Any]:
+    """Generate a Packages tree with one game per handler (or every game)
+
+    Returns a description of what was written, keyed by package name.
+    """
+    rng = random.Random(seed)
+    when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    seen_handlers = set()
+    generated = {}
+
+    for pkg_name, game in games.items():
+        handler = game["handler"]
+        if handler in seen_handlers and not all_games:
+            continue
+        seen_handlers.add(handler)
+
+        layout = handler_layout(handler, containers)
+        wgs_dir = packages_root / pkg_name / "SystemAppData" / "wgs"
+        (wgs_dir / "t").mkdir(parents=True, exist_ok=True)
+        total = 0
+        for user in range(users):
+            user_dir = wgs_dir / f"{0x0009000000000000 + user:016X}_{TITLE_ID}"
+            total += write_user_containers(user_dir, pkg_name, layout, file_size, rng, when)
+        generated[pkg_name] = {
+            "name": game["name"],
+            "handler": handler,
+            "containers": len(layout),
+            "files": sum(len(files) for _, files in layout),
+            "users": users,
+            "bytes": total,
+        }
+
+    return generated
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Generate a synthetic WGS Packages tree")
+    parser.add_argument("output", type=Path, help="Directory to use as the Packages root")
+    parser.add_argument("--containers", type=int, default=20, help="Saves per game (default: %(default)s)")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="Bytes per blob (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=1, help="Users per game (default: %(default)s)")
+    parser.add_argument("--all-games", action="store_true", help="Every game in games.json, not one per handler")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    games = main.read_game_list()
+    if games is None:
+        print("Failed to read game list")
+        sys.exit(1)
+    generated = generate_profile(args.output, games, args.containers, args.file_size,
+                                 args.users, args.all_games, args.seed)
+    print(json.dumps(generated, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,316 @@
+"""
+SQLite catalog of the saves seen by main.py (--catalog)
+
+Every extraction run records the games, users, containers and files it reads, with
+the container times from containers.index (as FILETIMEs, 100 ns units since 1601),
+the blob paths and sizes, and the archives written with the SHA-256 of each save file
+from their manifests. The catalog is updated incrementally: a container whose GUID,
+time and file number are unchanged since the last run keeps its rows, so its blobs
+aren't even stat()ed again.
+
+    main.py list    print the catalog's users and containers
+    main.py query   run an SQL query on the catalog
+
+Like metrics.py, the recording functions are no-ops unless start() was called.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+import records
+import snapshots
+
+DEFAULT_PATH = Path("xgp-catalog.sqlite")
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,          -- --packages-root profile, '' for the local user
+    package TEXT NOT NULL,
+    game TEXT NOT NULL,
+    UNIQUE (profile, package)
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    package_id INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,          -- hex, from the wgs directory name
+    user TEXT NOT NULL,             -- gamertag, or the decimal user ID
+    path TEXT NOT NULL,
+    store_package TEXT NOT NULL,
+    scanned INTEGER NOT NULL,       -- FILETIME
+    UNIQUE (package_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS containers (
+    id INTEGER PRIMARY KEY,
+    user_ref INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    guid TEXT NOT NULL,
+    modified INTEGER NOT NULL,      -- FILETIME from containers.index
+    UNIQUE (user_ref, name)
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    container_id INTEGER NOT NULL REFERENCES containers (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    guid TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,         -- FILETIME
+    UNIQUE (container_id, name)
+);
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY,
+    user_ref INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    format TEXT NOT NULL,
+    created INTEGER NOT NULL,       -- FILETIME
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    archive_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_files (
+    archive_id INTEGER NOT NULL REFERENCES archives (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (archive_id, name)
+);
+CREATE INDEX IF NOT EXISTS packages_game ON packages (game);
+CREATE INDEX IF NOT EXISTS containers_modified ON containers (modified);
+CREATE INDEX IF NOT EXISTS archives_created ON archives (user_ref, created);
+CREATE INDEX IF NOT EXISTS archive_files_sha256 ON archive_files (sha256);
+"""
+
+_db: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def to_filetime(time: datetime) -> int:
+    return (time - FILETIME_EPOCH) // timedelta(microseconds=1) * 10
+
+
+def from_filetime(filetime: int) -> datetime:
+    return FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
+
+
+def connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        db = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    else:
+        db = sqlite3.connect(path, check_same_thread=False)
+        # Readers (list, query) don't block a running extraction
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")
+        db.executescript(SCHEMA)
+    db.execute("PRAGMA foreign_keys = ON")
+    return db
+
+
+def start(path: Path):
+    global _db
+    _db = connect(path)
+
+
+def enabled() -> bool:
+    return _db is not None
+
+
+def _file_stat(path) -> tuple:
+    """Size and mtime (FILETIME) of a blob"""
+    if isinstance(path, snapshots.ArchivePath):
+        return path.size(), to_filetime(path.mtime().astimezone(timezone.utc))
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns // 100 + to_filetime(datetime(1970, 1, 1, tzinfo=timezone.utc))
+
+
+def record_user(profile: Optional[str], package: str, game: str, user: Any, user_dir,
+                store_package: str, containers: List[records.ContainerRecord],
+                partial: bool = False) -> Optional[int]:
+    """Update the catalog with the containers read for a user, returns the user's row ID
+
+    partial means containers may be missing because of a filter, so containers that
+    are gone from the list are kept.
+    """
+    if _db is None:
+        return None
+    user_id = user_dir.name.split("_")[0].lower()
+    now = to_filetime(datetime.now(timezone.utc))
+    with _lock, _db:
+        _db.execute("INSERT INTO packages (profile, package, game) VALUES (?, ?, ?) "
+                    "ON CONFLICT (profile, package) DO UPDATE SET game = excluded.game",
+                    (profile or "", package, game))
+        package_ref = _db.execute("SELECT id FROM packages WHERE profile = ? AND package = ?",
+                                  (profile or "", package)).fetchone()[0]
+        _db.execute("INSERT INTO users (package_id, user_id, user, path, store_package, scanned) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (package_id, user_id) DO UPDATE SET "
+                    "user = excluded.user, path = excluded.path, store_package = excluded.store_package, "
+                    "scanned = excluded.scanned",
+                    (package_ref, user_id, str(user), str(user_dir), store_package, now))
+        user_ref = _db.execute("SELECT id FROM users WHERE package_id = ? AND user_id = ?",
+                               (package_ref, user_id)).fetchone()[0]
+
+        # The container file number goes up whenever the container is written
+        known = {name: (number, guid, modified) for name, number, guid, modified in _db.execute(
+            "SELECT name, number, guid, modified FROM containers WHERE user_ref = ?", (user_ref,))}
+        for container in containers:
+            guid = container.guid.hex()
+            if known.get(container.name) == (container.number, guid, container.filetime):
+                continue
+            _db.execute("INSERT INTO containers (user_ref, name, number, guid, modified) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (user_ref, name) DO UPDATE SET number = excluded.number, "
+                        "guid = excluded.guid, modified = excluded.modified",
+                        (user_ref, container.name, container.number, guid, container.filetime))
+            container_ref = _db.execute("SELECT id FROM containers WHERE user_ref = ? AND name = ?",
+                                        (user_ref, container.name)).fetchone()[0]
+            _db.execute("DELETE FROM files WHERE container_id = ?", (container_ref,))
+            _db.executemany(
+                "INSERT INTO files (container_id, name, guid, path, size, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+                [(container_ref, file.name, file.guid.hex(), str(file.path), *_file_stat(file.path))
+                 for file in container.files]
+            )
+        if not partial:
+            gone = set(known) - {container.name for container in containers}
+            _db.executemany("DELETE FROM containers WHERE user_ref = ? AND name = ?",
+                            [(user_ref, name) for name in gone])
+    return user_ref
+
+
+def record_archive(user_ref: Optional[int], output_format: str, path: str, writer):
+    """Add a written archive, with the hashes of its manifest if it has one"""
+    if _db is None or user_ref is None:
+        return
+    with _lock, _db:
+        archive_ref = _db.execute(
+            "INSERT INTO archives (user_ref, path, format, created, files, bytes, archive_bytes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user_ref, path, output_format, to_filetime(datetime.now(timezone.utc)), writer.files,
+             writer.bytes_archived, writer.archive_bytes)
+        ).lastrowid
+        _db.executemany("INSERT INTO archive_files (archive_id, name, sha256) VALUES (?, ?, ?)",
+                        [(archive_ref, name, digest) for name, digest in (writer.hashes or {}).items()])
+
+
+def finish():
+    global _db
+    db, _db = _db, None
+    if db is not None:
+        db.close()
+
+
+def _format_time(filetime: Optional[int]) -> str:
+    if filetime is None:
+        return "-"
+    return from_filetime(filetime).astimezone().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _print_table(header: List[str], rows: List[List[Any]]):
+    rows = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max([len(title)] + [len(row[i]) for row in rows]) for i, title in enumerate(header)]
+    for row in [header] + rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def list_saves(db: sqlite3.Connection, games: List[str], users: List[str], since: Optional[datetime],
+               containers: bool = False):
+    """Print the users (or containers) in the catalog, newest saves first"""
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("c.modified >= ?")
+        params.append(to_filetime(since))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    if containers:
+        query = f"""
+            SELECT p.game, p.package, p.profile, u.user, u.user_id, c.name, COUNT(f.id), SUM(f.size), c.modified
+            FROM containers c JOIN users u ON u.id = c.user_ref JOIN packages p ON p.id = u.package_id
+            LEFT JOIN files f ON f.container_id = c.id
+            {where} GROUP BY c.id ORDER BY c.modified DESC"""
+        header = ["GAME", "PROFILE", "USER", "CONTAINER", "FILES", "BYTES", "SAVED"]
+    else:
+        query = f"""
+            SELECT p.game, p.package, p.profile, u.user, u.user_id, COUNT(DISTINCT c.id), COUNT(f.id),
+                   SUM(f.size), MAX(c.modified),
+                   (SELECT MAX(a.created) FROM archives a WHERE a.user_ref = u.id)
+            FROM users u JOIN packages p ON p.id = u.package_id
+            JOIN containers c ON c.user_ref = u.id LEFT JOIN files f ON f.container_id = c.id
+            {where} GROUP BY u.id ORDER BY MAX(c.modified) DESC"""
+        header = ["GAME", "PROFILE", "USER", "CONTAINERS", "FILES", "BYTES", "NEWEST SAVE", "LAST ARCHIVE"]
+
+    patterns = [pattern.casefold() for pattern in games]
+    wanted_users = {user.casefold() for user in users}
+    rows = []
+    for game, package, profile, user, user_id, *values in db.execute(query, params):
+        if patterns and not any(fnmatch.fnmatchcase(game.casefold(), pattern)
+                                or fnmatch.fnmatchcase(package.casefold(), pattern) for pattern in patterns):
+            continue
+        if wanted_users and not {user.casefold(), user_id, str(int(user_id, 16))} & wanted_users:
+            continue
+        if containers:
+            name, files, size, modified = values
+            rows.append([game, profile or "(local)", user, name, files, size or 0, _format_time(modified)])
+        else:
+            count, files, size, modified, archived = values
+            rows.append([game, profile or "(local)", user, count, files, size or 0,
+                         _format_time(modified), _format_time(archived)])
+    if not rows:
+        print("Nothing in the catalog matches")
+        return
+    _print_table(header, rows)
+
+
+def list_command(argv: List[str], parse_since: Callable[[str], datetime]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py list",
+        description="List the saves recorded in the catalog by \"main.py --catalog\", newest first"
+    )
+    parser.add_argument("--catalog", type=Path, default=DEFAULT_PATH, metavar="FILE",
+                        help="Catalog database (default: %(default)s)")
+    parser.add_argument("--game", action="append", default=[], metavar="GLOB",
+                        help="Only games whose name or package name matches (can be given several times)")
+    parser.add_argument("--user", action="append", default=[], metavar="USER",
+                        help="Only this Xbox user: gamertag or user ID (can be given several times)")
+    parser.add_argument("--since", type=parse_since, metavar="TIME",
+                        help="Only containers saved at or after TIME: a duration before now (30m, 1h, 2d) "
+                             "or an ISO 8601 time")
+    parser.add_argument("--containers", action="store_true", help="List each container instead of each user")
+    args = parser.parse_args(argv)
+    if not args.catalog.is_file():
+        print(f"No catalog at {args.catalog}, create it with \"main.py --catalog {args.catalog}\"")
+        return 1
+    with contextlib.closing(connect(args.catalog, readonly=True)) as db:
+        list_saves(db, args.game, args.user, args.since, args.containers)
+    return 0
+
+
+def query_command(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py query",
+        description="Run a read-only SQL query on the catalog and print the rows. The tables are "
+                    "packages, users, containers, files, archives and archive_files; times are "
+                    "FILETIMEs, which the filetime(X) function turns into local time"
+    )
+    parser.add_argument("sql", help="SQL query, e.g. \"SELECT game, COUNT(*) FROM packages GROUP BY game\"")
+    parser.add_argument("--catalog", type=Path, default=DEFAULT_PATH, metavar="FILE",
+                        help="Catalog database (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if not args.catalog.is_file():
+        print(f"No catalog at {args.catalog}, create it with \"main.py --catalog {args.catalog}\"")
+        return 1
+    with contextlib.closing(connect(args.catalog, readonly=True)) as db:
+        db.create_function("filetime", 1, lambda value: None if value is None else _format_time(value),
+                           deterministic=True)
+        try:
+            cursor = db.execute(args.sql)
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}")
+            return 1
+        header = [column[0] for column in cursor.description or []]
+        _print_table(header, cursor.fetchall())
+    return 0
@@ -17,6 +17,21 @@ Usage:
     # Specify extracted folder
     python convert_to_steam.py --input "extracted/WorldName" --template "path/to/server/save"
 
+    # Stream saves straight from the ZIP into the output folder
+    python convert_to_steam.py --stream --input "abiotic_factor_xxx.zip"
+
+    # Re-analyze the template instead of using the cached analysis
+    python convert_to_steam.py --refresh-template
+
+    # Convert many worlds against one template, 4 at a time, without prompting
+    python convert_to_steam.py --batch "exports/*.zip" --template "path/to/server/save" --jobs 4
+
+    # Write per-step time, I/O and uesave call counts to profile.json
+    python convert_to_steam.py --profile
+
+    # Leave Prometheus metrics for node_exporter's textfile collector
+    python convert_to_steam.py --batch "exports/*.zip" --metrics-file /var/lib/node_exporter/textfile/abf.prom
+
 Requirements:
 - uesave-rs: cargo install --git https://github.com/trumank/uesave-rs --branch patch-abiotic-factor
 - Working Steam dedicated server save as template
@@ -30,14 +45,25 @@ Note: Singleplayer Steam saves are NOT used as templates and are incompatible.
 
 import os
 import sys
+import glob
 import json
+import time
+import hashlib
+import random
+import threading
+import contextvars
 import shutil
 import zipfile
 import argparse
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any
+
+import fastcopy
+import metrics
+import profiler
 
 # Common Steam locations to check for templates
 STEAM_TEMPLATE_PATHS = [
@@ -49,21 +75,313 @@ STEAM_TEMPLATE_PATHS = [
     Path(os.path.expanduser("~")) / "AppData/LocalLow/Deep Field Games/Abiotic Factor/Saved/SaveGames",
 ]
 
+# Analyzed template headers, save types and converted saves are cached here between runs
+CACHE_DIR = Path(os.path.expanduser("~")) / ".cache" / "abf_convert"
+TEMPLATE_CACHE_FILE = "templates.json"
+RESULT_CACHE_DIR = "results"
+DEFAULT_RESULT_CACHE_MB = 1024
+
+# Time budget for decoding saves in "sample" verification mode
+DEFAULT_VERIFY_BUDGET = 30.0
+
+# Bump when the conversion steps change, so cached results from older versions are not reused
+CONVERTER_VERSION = "1"
+
+# Serializes output from concurrently converted worlds
+_print_lock = threading.Lock()
+# Output of the conversion stage running in the current context, printed when it ends
+_stage_output: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("stage_output", default=None)
+
+
+def run_stages(stages: List[Tuple[str, List[str], Any]], run_stage) -> bool:
+    """Run (title, dependencies, function) stages as soon as their dependencies are done
+
+    run_stage(number, title, function) runs a single stage and returns whether it
+    succeeded. After a failure no new stages are started.
+    """
+    numbers = {title: number for number, (title, _, _) in enumerate(stages, start=1)}
+    pending = {title: (deps, func) for title, deps, func in stages}
+    done = set()
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        running = {}
+        while pending or running:
+            if not failed:
+                for title, (deps, func) in list(pending.items()):
+                    if all(dep in done for dep in deps):
+                        del pending[title]
+                        future = pool.submit(contextvars.copy_context().run, run_stage, numbers[title], title, func)
+                        running[future] = title
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                title = running.pop(future)
+                if future.result():
+                    done.add(title)
+                else:
+                    failed = True
+
+    return not failed and not pending
+
+
+def run_uesave(args: List[str]) -> subprocess.CompletedProcess:
+    """Run a uesave command with captured text output, raising CalledProcessError on failure"""
+    with profiler.phase(f"uesave {args[0]}"):
+        result = subprocess.run(['uesave', *args], capture_output=True, text=True, check=True)
+        profiler.count(subprocesses=1, bytes_read=len(result.stdout))
+    return result
+
+
+def _read_fstring(data: bytes, offset: int) -> Tuple[str, int]:
+    """Read an Unreal FString, returns the string and the offset after it"""
+    length = int.from_bytes(data[offset:offset + 4], "little", signed=True)
+    offset += 4
+    if length == 0:
+        return "", offset
+    if length < 0:
+        end = offset - length * 2
+        return data[offset:end].decode("utf-16-le").rstrip("\0"), end
+    end = offset + length
+    if end > len(data):
+        raise ValueError("FString runs past the end of the data")
+    return data[offset:end].decode("utf-8").rstrip("\0"), end
+
+
+def parse_gvas_header(data: bytes) -> Dict[str, Any]:
+    """Parse the fixed part of a GVAS header
+
+    Returns the save_game_type, the offset where its FString starts (everything before
+    it is engine and custom version data shared by all saves of a template) and the
+    offset after it.
+    """
+    if data[:4] != b'GVAS':
+        raise ValueError("Missing GVAS magic")
+    save_game_version = int.from_bytes(data[4:8], "little")
+    # UE4 package version, plus the UE5 one from save game version 3 on
+    offset = 16 if save_game_version >= 3 else 12
+    # Engine version: major, minor, patch (u16), changelist (u32), branch
+    offset += 10
+    _, offset = _read_fstring(data, offset)
+    # Custom versions: format, count, then (GUID, version) pairs
+    custom_version_count = int.from_bytes(data[offset + 4:offset + 8], "little")
+    offset += 8 + custom_version_count * 20
+    if offset > len(data):
+        raise ValueError("Custom version table runs past the end of the data")
+    type_offset = offset
+    save_game_type, offset = _read_fstring(data, offset)
+    return {"save_game_type": save_game_type, "type_offset": type_offset, "end": offset}
+
+
+def file_fingerprint(path: Path) -> Dict[str, Any]:
+    """Return size, mtime and SHA-256 of a file"""
+    stat = path.stat()
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha.hexdigest()}
+
+
+class TemplateCache:
+    """On-disk cache of template analysis results
+
+    Entries are keyed by the size, mtime and content hash of the template files, so
+    editing or replacing any of them invalidates the entry. There is one entry per
+    template folder: a live server save changes on every autosave, and its older
+    entries are replaced rather than kept.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / TEMPLATE_CACHE_FILE
+
+    @staticmethod
+    def make_key(template_files: List[Path]) -> str:
+        fingerprints = [file_fingerprint(p) for p in template_files]
+        return hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode()).hexdigest()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        entry = self._load().get(key)
+        if not entry:
+            return None
+        try:
+            return bytes.fromhex(entry["header"]), entry["world_type"], entry["player_type"]
+        except (KeyError, ValueError):
+            return None
+
+    def put(self, key: str, template_path: Path, gvas_header: bytes, world_type: str, player_type: str):
+        folder = os.path.normcase(os.path.abspath(template_path))
+        entries = {old_key: entry for old_key, entry in self._load().items()
+                   if os.path.normcase(os.path.abspath(entry.get("template", ""))) != folder}
+        entries[key] = {
+            "template": str(template_path),
+            "header": gvas_header.hex(),
+            "world_type": world_type,
+            "player_type": player_type,
+        }
+        # Write atomically so a concurrent or interrupted run never sees a torn file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ResultCache:
+    """Content-addressed cache of converted save files
+
+    Each entry holds the final bytes of one converted save, keyed by the hash of the
+    save before the uesave fixes, the template header, the target save type and the
+    converter version. Entries are evicted least recently used first once the cache
+    grows past max_bytes. Safe to share between concurrently converted worlds.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_RESULT_CACHE_MB * 1024 * 1024):
+        self.root = cache_dir / RESULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(save_data: bytes, gvas_header: bytes, target_type: str) -> str:
+        sha = hashlib.sha256()
+        for part in (hashlib.sha256(save_data).digest(), hashlib.sha256(gvas_header).digest(),
+                     target_type.encode(), CONVERTER_VERSION.encode()):
+            sha.update(len(part).to_bytes(4, "little"))
+            sha.update(part)
+        return sha.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.sav"
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'rb') as f:
+                data = f.read()
+            # Mark as recently used
+            os.utime(entry)
+        except OSError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return data
+
+    def put(self, key: str, data: bytes):
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, entry)
+        self._count("stores")
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in self.root.glob("*/*.sav"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions"] += 1
+
 
 class AbioticConverter:
     """Convert extracted Xbox saves to Steam format"""
 
-    def __init__(self, input_path: Optional[Path], template_path: Optional[Path], output_dir: Path):
+    def __init__(self, input_path: Optional[Path], template_path: Optional[Path], output_dir: Path,
+                 cache_dir: Optional[Path] = CACHE_DIR, refresh_template: bool = False,
+                 interactive: bool = True, overwrite: bool = False,
+                 template_analysis: Optional[Tuple[bytes, str, str]] = None,
+                 output_claims: Optional["OutputClaims"] = None, log_prefix: str = "",
+                 stream: bool = False, file_workers: int = os.cpu_count() or 1,
+                 result_cache: Optional[ResultCache] = None, verify: Optional[str] = None,
+                 verify_budget: float = DEFAULT_VERIFY_BUDGET):
         self.input_path = input_path
         self.template_path = template_path
         self.output_dir = output_dir
+        self.template_cache = TemplateCache(cache_dir) if cache_dir else None
+        self.refresh_template = refresh_template
+        self.interactive = interactive
+        self.overwrite = overwrite
+        self.template_analysis = template_analysis
+        self.output_claims = output_claims
+        self.log_prefix = log_prefix
+        self.stream = stream
+        self.file_workers = file_workers
+        # Shared by concurrent stages, so file_workers caps the uesave processes of the world
+        self._file_slots = threading.BoundedSemaphore(max(1, file_workers))
+        self.result_cache = result_cache
+        self.verify = verify
+        self.verify_budget = verify_budget
+        # Saves served from the result cache, and cache keys of the ones to store afterwards
+        self.cached_files = set()
+        self.pending_cache_keys: Dict[Path, str] = {}
+        # Saves converted by uesave in this run, counted when the output is placed
+        self.converted_count = 0
         self.temp_dir = None
         self.extracted_dir = None
+        self.gvas_header = None
+        self.world_type = None
+        self.player_type = None
+        self.timings: Dict[str, float] = {}
+        self.errors: List[str] = []
+        # Output of finished stages waiting for earlier stages, printed in stage order
+        self._stage_lines: Dict[int, List[str]] = {}
+        self._next_stage = 1
+        # Label of this world's phases in --profile reports
+        self.profile_game = input_path.name if input_path else None
+
+    def echo(self, text: str = ""):
+        """Print a line, prefixed with the world label in batch runs"""
+        line = f"{self.log_prefix}{text}" if text or not self.log_prefix else ""
+        lines = _stage_output.get()
+        if lines is not None:
+            lines.append(line)
+            return
+        with _print_lock:
+            print(line)
+
+    def ask(self, question: str) -> str:
+        """Prompt the user, after printing what the running stage has logged so far"""
+        lines = _stage_output.get()
+        with _print_lock:
+            if lines:
+                for line in lines:
+                    print(line)
+                lines.clear()
+            return input(question)
 
     def log(self, message: str, level: str = "INFO"):
         """Simple logging"""
         prefix = {"INFO": "  ", "SUCCESS": "✓ ", "ERROR": "✗ ", "WARN": "⚠ "}.get(level, "  ")
-        print(f"{prefix}{message}")
+        if level == "ERROR":
+            self.errors.append(message)
+        self.echo(f"{prefix}{message}")
 
     def find_latest_extraction(self) -> Optional[Path]:
         """Find the most recent extraction ZIP in current directory"""
@@ -74,9 +392,27 @@ class AbioticConverter:
         """Auto-detect Steam save template"""
         self.log("Searching for Steam save template...")
 
-        for base_path in STEAM_TEMPLATE_PATHS:
+        # Probe all locations at once so one slow (e.g. network) drive doesn't stall the
+        # others, but still prefer the locations in STEAM_TEMPLATE_PATHS order
+        pool = ThreadPoolExecutor(max_workers=len(STEAM_TEMPLATE_PATHS))
+        try:
+            probes = [pool.submit(self._probe_template_location, base_path) for base_path in STEAM_TEMPLATE_PATHS]
+            for probe in probes:
+                world_dir = probe.result()
+                if world_dir:
+                    self.log(f"Found template: {world_dir}", "SUCCESS")
+                    return world_dir
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return None
+
+    @staticmethod
+    def _probe_template_location(base_path: Path) -> Optional[Path]:
+        """Return the first usable template world folder under base_path"""
+        try:
             if not base_path.exists():
-                continue
+                return None
 
             # Look for world folders
             for world_dir in base_path.iterdir():
@@ -91,22 +427,29 @@ class AbioticConverter:
                 if metadata.exists() and world_save.exists() and player_dir.exists():
                     player_saves = list(player_dir.glob("Player_*.sav"))
                     if player_saves:
-                        self.log(f"Found template: {world_dir}", "SUCCESS")
                         return world_dir
+        except OSError:
+            pass
 
         return None
 
-    def extract_input(self) -> Tuple[bool, Optional[Path]]:
-        """Extract or locate input saves"""
-        self.log("Locating input saves...")
-
-        # If no input specified, find latest ZIP
+    def _resolve_input(self) -> bool:
+        """Use the given input or fall back to the latest extraction ZIP"""
         if not self.input_path:
             self.input_path = self.find_latest_extraction()
             if not self.input_path:
                 self.log("No extraction ZIP found. Run main.py first!", "ERROR")
-                return False, None
+                return False
             self.log(f"Using latest extraction: {self.input_path.name}")
+        return True
+
+    def extract_input(self) -> Tuple[bool, Optional[Path]]:
+        """Extract or locate input saves"""
+        self.log("Locating input saves...")
+
+        # If no input specified, find latest ZIP
+        if not self._resolve_input():
+            return False, None
 
         # If input is a ZIP, extract it
         if self.input_path.suffix == ".zip":
@@ -115,6 +458,10 @@ class AbioticConverter:
 
             with zipfile.ZipFile(self.input_path, 'r') as zf:
                 zf.extractall(self.temp_dir)
+                if profiler.enabled():
+                    members = [info for info in zf.infolist() if not info.is_dir()]
+                    profiler.count(bytes_read=self.input_path.stat().st_size, files=len(members),
+                                   bytes_written=sum(info.file_size for info in members))
 
             # Find the world folder
             world_folders = [d for d in self.temp_dir.iterdir() if d.is_dir()]
@@ -124,18 +471,113 @@ class AbioticConverter:
 
             self.extracted_dir = world_folders[0]
             self.log(f"Extracted to: {self.extracted_dir.name}", "SUCCESS")
-            return True, self.extracted_dir
+            return self._claim_output(self.extracted_dir.name), self.extracted_dir
 
         # Input is already a folder
         elif self.input_path.is_dir():
             self.extracted_dir = self.input_path
             self.log(f"Using folder: {self.extracted_dir}", "SUCCESS")
-            return True, self.extracted_dir
+            return self._claim_output(self.extracted_dir.name), self.extracted_dir
+
+        else:
+            self.log(f"Invalid input: {self.input_path}", "ERROR")
+            return False, None
+
+    def stream_input(self) -> Tuple[bool, Optional[Path]]:
+        """Stream input saves into a staging folder, injecting GVAS headers on the way
+
+        The staging folder lives inside the output directory, so publishing the
+        converted world is a single rename instead of another full copy.
+        """
+        self.log("Streaming input saves...")
+
+        if not self._resolve_input():
+            return False, None
+
+        if self.input_path.suffix == ".zip":
+            with zipfile.ZipFile(self.input_path, 'r') as zf:
+                # The world folder is the first top-level directory in the ZIP
+                world_name = next((info.filename.split('/')[0] for info in zf.infolist()
+                                   if '/' in info.filename), None)
+                if not world_name:
+                    self.log("No world folder found in ZIP", "ERROR")
+                    return False, None
+                if not self._claim_output(world_name):
+                    return False, None
+                self._create_staging(world_name)
+
+                count = 0
+                for info in zf.infolist():
+                    parts = Path(info.filename).parts
+                    if info.is_dir() or parts[0] != world_name or '..' in parts or Path(info.filename).is_absolute():
+                        continue
+                    dst = self.extracted_dir.joinpath(*parts[1:])
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    with zf.open(info) as member:
+                        self._stream_save(member, dst)
+                    count += 1
+
+        elif self.input_path.is_dir():
+            if not self._claim_output(self.input_path.name):
+                return False, None
+            self._create_staging(self.input_path.name)
+            count = 0
+            for src in self.input_path.rglob("*"):
+                if not src.is_file():
+                    continue
+                rel_path = src.relative_to(self.input_path)
+                dst = self.extracted_dir / rel_path
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                with open(src, 'rb') as f:
+                    if src.suffix != ".sav" or f.read(4) != b'GVAS':
+                        f.seek(0)
+                        self._stream_save(f, dst)
+                        count += 1
+                        continue
+                # Already converted; world and player saves are always rewritten by a
+                # later step (which unlinks first), so those can share the input's inode
+                fastcopy.copy_file(src, dst, link=self._will_rewrite(rel_path))
+                count += 1
 
         else:
             self.log(f"Invalid input: {self.input_path}", "ERROR")
             return False, None
 
+        self.log(f"Streamed {count} files into {self.extracted_dir.name}", "SUCCESS")
+        return True, self.extracted_dir
+
+    def _claim_output(self, world_name: str) -> bool:
+        """Claim the world's output folder in a batch, before any conversion work"""
+        output_world = self.output_dir / world_name
+        if self.output_claims and not self.output_claims.claim(output_world):
+            self.log(f"Another world in this batch already writes to {output_world}", "ERROR")
+            return False
+        return True
+
+    def _create_staging(self, world_name: str):
+        """Create a staging folder for a world next to its final output location"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir = Path(tempfile.mkdtemp(prefix=f".{world_name}.", suffix=".partial", dir=self.output_dir))
+        self.extracted_dir = self.temp_dir / world_name
+        self.extracted_dir.mkdir()
+
+    def _stream_save(self, stream, dst: Path):
+        """Copy a stream to dst, adding the GVAS header to saves that lack one"""
+        magic = stream.read(4)
+        if dst.suffix == ".sav" and magic != b'GVAS':
+            # Skip wrapper byte and add GVAS header
+            fastcopy.write_stream(stream, dst, self.gvas_header + magic[1:])
+        else:
+            fastcopy.write_stream(stream, dst, magic)
+
+    @staticmethod
+    def _will_rewrite(rel_path: Path) -> bool:
+        """Whether a later conversion step replaces this file"""
+        if rel_path.parent == Path("PlayerData"):
+            return rel_path.name.startswith("Player_") and rel_path.suffix == ".sav"
+        return (rel_path.parent == Path(".") and rel_path.name.startswith("WorldSave_")
+                and rel_path.suffix == ".sav" and rel_path.name != "WorldSave_MetaData.sav")
+
     def get_template_headers(self) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
         """Extract headers from template saves"""
         self.log("Extracting template headers...")
@@ -150,14 +592,45 @@ class AbioticConverter:
         metadata_template = self.template_path / "WorldSave_MetaData.sav"
         world_template = self.template_path / "WorldSave_Facility.sav"
         player_dir = self.template_path / "PlayerData"
-        player_saves = list(player_dir.glob("Player_*.sav"))
+        # Sorted so the same template file is picked (and cached) every run
+        player_saves = sorted(player_dir.glob("Player_*.sav"))
 
         if not all([metadata_template.exists(), world_template.exists(), player_saves]):
             self.log("Template missing required files", "ERROR")
             return None, None, None
 
         player_template = player_saves[0]
+        template_files = [metadata_template, world_template, player_template]
+
+        cache_key = None
+        if self.template_cache:
+            try:
+                cache_key = self.template_cache.make_key(template_files)
+            except OSError as e:
+                self.log(f"Could not fingerprint template files: {e}", "WARN")
+
+        if cache_key and not self.refresh_template:
+            cached = self.template_cache.get(cache_key)
+            if cached:
+                gvas_header, world_type, player_type = cached
+                self.log(f"Using cached template analysis ({len(gvas_header)} byte GVAS header)", "SUCCESS")
+                self.log(f"World type: {world_type.split('.')[-1]}")
+                self.log(f"Player type: {player_type.split('.')[-1]}")
+                return gvas_header, world_type, player_type
+
+        gvas_header, world_type, player_type = self._analyze_template(metadata_template, world_template, player_template)
+
+        if gvas_header and cache_key:
+            try:
+                self.template_cache.put(cache_key, self.template_path, gvas_header, world_type, player_type)
+            except OSError as e:
+                self.log(f"Could not write template cache: {e}", "WARN")
+
+        return gvas_header, world_type, player_type
 
+    def _analyze_template(self, metadata_template: Path, world_template: Path,
+                          player_template: Path) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """Slice the GVAS header and read the save types from template files"""
         try:
             # Extract GVAS header from MetaData
             with open(metadata_template, 'rb') as f:
@@ -184,29 +657,15 @@ class AbioticConverter:
                 self.log(f"Extracted header too small ({len(gvas_header)} bytes)", "ERROR")
                 return None, None, None
 
-            # Get save_game_type from templates using uesave
-            try:
-                result = subprocess.run(['uesave', 'to-json', '-i', str(world_template)],
-                                      capture_output=True, text=True, check=True)
-                world_data = json.loads(result.stdout)
-                world_type = world_data['root']['save_game_type']
-            except subprocess.CalledProcessError as e:
-                self.log(f"uesave failed for world template: {e.stderr}", "ERROR")
-                return None, None, None
-            except (json.JSONDecodeError, KeyError) as e:
-                self.log(f"Invalid world template data: {e}", "ERROR")
-                return None, None, None
-
-            try:
-                result = subprocess.run(['uesave', 'to-json', '-i', str(player_template)],
-                                      capture_output=True, text=True, check=True)
-                player_data = json.loads(result.stdout)
-                player_type = player_data['root']['save_game_type']
-            except subprocess.CalledProcessError as e:
-                self.log(f"uesave failed for player template: {e.stderr}", "ERROR")
-                return None, None, None
-            except (json.JSONDecodeError, KeyError) as e:
-                self.log(f"Invalid player template data: {e}", "ERROR")
+            # Get save_game_type from templates using uesave, both decodes at once
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                world_future = pool.submit(contextvars.copy_context().run,
+                                           self._read_template_type, world_template, "world")
+                player_future = pool.submit(contextvars.copy_context().run,
+                                            self._read_template_type, player_template, "player")
+                world_type = world_future.result()
+                player_type = player_future.result()
+            if not world_type or not player_type:
                 return None, None, None
 
             self.log(f"Extracted {len(gvas_header)} byte GVAS header", "SUCCESS")
@@ -229,30 +688,41 @@ class AbioticConverter:
             self.log(f"Error extracting headers: {e}", "ERROR")
             return None, None, None
 
+    def _read_template_type(self, template: Path, label: str) -> Optional[str]:
+        """Read save_game_type of a template save with uesave"""
+        try:
+            result = run_uesave(['to-json', '-i', str(template)])
+            data = json.loads(result.stdout)
+            return data['root']['save_game_type']
+        except subprocess.CalledProcessError as e:
+            self.log(f"uesave failed for {label} template: {e.stderr}", "ERROR")
+            return None
+        except (json.JSONDecodeError, KeyError) as e:
+            self.log(f"Invalid {label} template data: {e}", "ERROR")
+            return None
+
     def apply_headers(self, gvas_header: bytes) -> bool:
         """Apply GVAS headers to extracted saves"""
         self.log("Applying GVAS headers...")
 
         # Process all .sav files
         save_files = list(self.extracted_dir.rglob("*.sav"))
-        player_dir = self.extracted_dir / "PlayerData"
+        applied = 0
 
         for save_file in save_files:
             with open(save_file, 'rb') as f:
-                raw_data = f.read()
-
-            # Skip if already has GVAS header
-            if raw_data[:4] == b'GVAS':
-                continue
-
-            # Skip wrapper byte and add GVAS header
-            xbox_properties = raw_data[1:]
-            fixed_data = gvas_header + xbox_properties
+                # Skip if already has GVAS header
+                if f.read(4) == b'GVAS':
+                    continue
 
-            with open(save_file, 'wb') as f:
-                f.write(fixed_data)
+                # Skip wrapper byte and add GVAS header
+                f.seek(1)
+                tmp_path = save_file.with_name(save_file.name + ".tmp")
+                fastcopy.write_stream(f, tmp_path, gvas_header)
+            os.replace(tmp_path, save_file)
+            applied += 1
 
-        self.log(f"Applied headers to {len(save_files)} files", "SUCCESS")
+        self.log(f"Applied headers to {applied} files ({len(save_files) - applied} already had one)", "SUCCESS")
         return True
 
     def fix_save_types(self, world_type: str, player_type: str) -> bool:
@@ -262,17 +732,15 @@ class AbioticConverter:
         try:
             # Fix world saves (not MetaData)
             world_saves = [s for s in self.extracted_dir.glob("WorldSave_*.sav")
-                          if s.name != "WorldSave_MetaData.sav"]
-
-            for save_path in world_saves:
-                self._fix_save_type(save_path, world_type)
+                          if s.name != "WorldSave_MetaData.sav" and s not in self.cached_files]
 
             # Fix player saves
             player_dir = self.extracted_dir / "PlayerData"
-            player_saves = list(player_dir.glob("Player_*.sav"))
+            player_saves = [s for s in player_dir.glob("Player_*.sav") if s not in self.cached_files]
 
-            for save_path in player_saves:
-                self._fix_save_type(save_path, player_type)
+            jobs = [(save_path, world_type) for save_path in world_saves]
+            jobs += [(save_path, player_type) for save_path in player_saves]
+            self._map_files(lambda job: self._fix_save_type(*job), jobs)
 
             self.log(f"Fixed {len(world_saves)} world + {len(player_saves)} player saves", "SUCCESS")
             return True
@@ -284,8 +752,7 @@ class AbioticConverter:
     def _fix_save_type(self, save_path: Path, correct_type: str):
         """Fix save_game_type for a single file"""
         try:
-            result = subprocess.run(['uesave', 'to-json', '-i', str(save_path)],
-                                  capture_output=True, text=True, check=True)
+            result = run_uesave(['to-json', '-i', str(save_path)])
             data = json.loads(result.stdout)
         except subprocess.CalledProcessError as e:
             self.log(f"uesave to-json failed for {save_path.name}: {e.stderr}", "ERROR")
@@ -306,8 +773,7 @@ class AbioticConverter:
                 json.dump(data, f, indent=2)
 
             save_path.unlink()
-            subprocess.run(['uesave', 'from-json', '-i', str(json_path), '-o', str(save_path)],
-                         capture_output=True, text=True, check=True)
+            run_uesave(['from-json', '-i', str(json_path), '-o', str(save_path)])
         except subprocess.CalledProcessError as e:
             self.log(f"uesave from-json failed for {save_path.name}: {e.stderr}", "ERROR")
             raise
@@ -326,10 +792,12 @@ class AbioticConverter:
         if not metadata_path.exists():
             self.log("MetaData not found", "WARN")
             return True
+        if metadata_path in self.cached_files:
+            self.log("MetaData served from cache", "INFO")
+            return True
 
         try:
-            result = subprocess.run(['uesave', 'to-json', '-i', str(metadata_path)],
-                                  capture_output=True, text=True, check=True)
+            result = run_uesave(['to-json', '-i', str(metadata_path)])
             data = json.loads(result.stdout)
         except subprocess.CalledProcessError as e:
             self.log(f"uesave to-json failed for MetaData: {e.stderr}", "ERROR")
@@ -348,8 +816,7 @@ class AbioticConverter:
                         json.dump(data, f, indent=2)
 
                     metadata_path.unlink()
-                    subprocess.run(['uesave', 'from-json', '-i', str(json_path), '-o', str(metadata_path)],
-                                 capture_output=True, text=True, check=True)
+                    run_uesave(['from-json', '-i', str(json_path), '-o', str(metadata_path)])
 
                     self.log("Removed compression flag", "SUCCESS")
                 except subprocess.CalledProcessError as e:
@@ -375,42 +842,11 @@ class AbioticConverter:
         self.log("Fixing player af_data...")
 
         player_dir = self.extracted_dir / "PlayerData"
-        player_saves = list(player_dir.glob("Player_*.sav"))
+        player_saves = [s for s in player_dir.glob("Player_*.sav") if s not in self.cached_files]
 
         try:
-            for save_path in player_saves:
-                try:
-                    result = subprocess.run(['uesave', 'to-json', '-i', str(save_path)],
-                                          capture_output=True, text=True, check=True)
-                    data = json.loads(result.stdout)
-                except subprocess.CalledProcessError as e:
-                    self.log(f"uesave to-json failed for {save_path.name}: {e.stderr}", "ERROR")
-                    return False
-                except json.JSONDecodeError as e:
-                    self.log(f"Invalid JSON from uesave for {save_path.name}: {e}", "ERROR")
-                    return False
-
-                if 'root' in data and 'af_data' in data['root']:
-                    if data['root']['af_data']['variant'] != 'None':
-                        data['root']['af_data']['variant'] = 'None'
-
-                        json_path = save_path.with_suffix('.json')
-                        try:
-                            with open(json_path, 'w') as f:
-                                json.dump(data, f, indent=2)
-
-                            save_path.unlink()
-                            subprocess.run(['uesave', 'from-json', '-i', str(json_path), '-o', str(save_path)],
-                                         capture_output=True, text=True, check=True)
-                        except subprocess.CalledProcessError as e:
-                            self.log(f"uesave from-json failed for {save_path.name}: {e.stderr}", "ERROR")
-                            return False
-                        except IOError as e:
-                            self.log(f"Failed to write JSON for {save_path.name}: {e}", "ERROR")
-                            return False
-                        finally:
-                            if json_path.exists():
-                                json_path.unlink()
+            if not all(self._map_files(self._fix_player_af_data, player_saves)):
+                return False
 
             self.log(f"Fixed {len(player_saves)} player saves", "SUCCESS")
             return True
@@ -419,6 +855,41 @@ class AbioticConverter:
             self.log(f"Error fixing player data: {e}", "ERROR")
             return False
 
+    def _fix_player_af_data(self, save_path: Path) -> bool:
+        """Fix af_data variant for a single player save"""
+        try:
+            result = run_uesave(['to-json', '-i', str(save_path)])
+            data = json.loads(result.stdout)
+        except subprocess.CalledProcessError as e:
+            self.log(f"uesave to-json failed for {save_path.name}: {e.stderr}", "ERROR")
+            return False
+        except json.JSONDecodeError as e:
+            self.log(f"Invalid JSON from uesave for {save_path.name}: {e}", "ERROR")
+            return False
+
+        if 'root' in data and 'af_data' in data['root']:
+            if data['root']['af_data']['variant'] != 'None':
+                data['root']['af_data']['variant'] = 'None'
+
+                json_path = save_path.with_suffix('.json')
+                try:
+                    with open(json_path, 'w') as f:
+                        json.dump(data, f, indent=2)
+
+                    save_path.unlink()
+                    run_uesave(['from-json', '-i', str(json_path), '-o', str(save_path)])
+                except subprocess.CalledProcessError as e:
+                    self.log(f"uesave from-json failed for {save_path.name}: {e.stderr}", "ERROR")
+                    return False
+                except IOError as e:
+                    self.log(f"Failed to write JSON for {save_path.name}: {e}", "ERROR")
+                    return False
+                finally:
+                    if json_path.exists():
+                        json_path.unlink()
+
+        return True
+
     def copy_output(self) -> bool:
         """Copy converted saves to output directory"""
         self.log("Copying to output directory...")
@@ -427,91 +898,219 @@ class AbioticConverter:
         output_world = self.output_dir / world_name
 
         if output_world.exists():
-            self.log(f"Output already exists: {output_world}", "WARN")
-            response = input("  Overwrite? (y/n): ")
-            if response.lower() != 'y':
-                self.log("Cancelled", "INFO")
+            if self.overwrite:
+                self.log(f"Overwriting existing output: {output_world}", "WARN")
+            elif not self.interactive:
+                self.log(f"Output already exists: {output_world} (use --overwrite)", "ERROR")
                 return False
+            else:
+                self.log(f"Output already exists: {output_world}", "WARN")
+                response = self.ask("  Overwrite? (y/n): ")
+                if response.lower() != 'y':
+                    self.log("Cancelled", "INFO")
+                    return False
             shutil.rmtree(output_world)
 
-        shutil.copytree(self.extracted_dir, output_world)
+        self.converted_count = len(self._converted_saves()) - len(self.cached_files)
+        # Files we extracted or staged ourselves are moved, a user's folder is copied
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        fastcopy.place_tree(self.extracted_dir, output_world, move=self.temp_dir is not None)
         self.log(f"Saved to: {output_world}", "SUCCESS")
         return True
 
-    def cleanup(self):
-        """Clean up temp files"""
-        if self.temp_dir and self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+    def _converted_saves(self) -> List[Tuple[Path, str]]:
+        """Saves changed by the uesave fixes, with the save type they end up with"""
+        targets = [(s, self.world_type) for s in sorted(self.extracted_dir.glob("WorldSave_*.sav"))
+                   if s.name != "WorldSave_MetaData.sav"]
+        targets += [(s, self.player_type) for s in sorted((self.extracted_dir / "PlayerData").glob("Player_*.sav"))]
+        metadata_path = self.extracted_dir / "WorldSave_MetaData.sav"
+        if metadata_path.exists():
+            targets.append((metadata_path, "metadata"))
+        return targets
 
-    def convert(self) -> bool:
-        """Run complete conversion"""
-        print("=" * 80)
-        print("ABIOTIC FACTOR: XBOX → STEAM CONVERTER")
-        print("=" * 80)
-        print()
+    def load_cached_results(self) -> bool:
+        """Replace saves with previously converted results where possible"""
+        self.log("Checking result cache...")
+
+        for save_path, target_type in self._converted_saves():
+            with open(save_path, 'rb') as f:
+                data = f.read()
+            key = self.result_cache.make_key(data, self.gvas_header, target_type)
+            cached = self.result_cache.get(key)
+            if cached is None:
+                self.pending_cache_keys[save_path] = key
+                continue
+            tmp_path = save_path.with_name(save_path.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(cached)
+            os.replace(tmp_path, save_path)
+            self.cached_files.add(save_path)
+
+        self.log(f"{len(self.cached_files)} saves served from cache, "
+                 f"{len(self.pending_cache_keys)} to convert", "SUCCESS")
+        return True
+
+    def store_cached_results(self) -> bool:
+        """Store newly converted saves in the result cache"""
+        self.log("Updating result cache...")
 
         try:
-            # Step 1: Extract/locate input
-            print("STEP 1: Locate Input Saves")
-            print("-" * 80)
-            success, extracted_dir = self.extract_input()
-            if not success:
-                return False
-            print()
+            for save_path, key in self.pending_cache_keys.items():
+                with open(save_path, 'rb') as f:
+                    self.result_cache.put(key, f.read())
+            self.result_cache.evict()
+        except OSError as e:
+            # A cache failure doesn't make the conversion itself fail
+            self.log(f"Could not update result cache: {e}", "WARN")
+            return True
 
-            # Step 2: Get template headers
-            print("STEP 2: Extract Template Headers")
-            print("-" * 80)
-            gvas_header, world_type, player_type = self.get_template_headers()
-            if not gvas_header:
-                return False
-            print()
+        stats = self.result_cache.stats
+        self.log(f"Stored {len(self.pending_cache_keys)} results "
+                 f"(cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions)", "SUCCESS")
+        return True
 
-            # Step 3: Apply headers
-            print("STEP 3: Apply GVAS Headers")
-            print("-" * 80)
-            if not self.apply_headers(gvas_header):
-                return False
-            print()
+    def verify_output(self) -> bool:
+        """Re-parse converted saves before they are published
+
+        Every save gets the cheap checks: GVAS magic, the engine/custom version part of
+        the header matching the template, save_game_type and, for MetaData, the removed
+        compression flag. The saves are then fully decoded with uesave to check that
+        they still parse and that af_data was fixed. In "sample" mode only a random
+        subset is decoded, within verify_budget seconds.
+        """
+        self.log(f"Verifying converted saves ({self.verify} mode)...")
+
+        template_header = parse_gvas_header(self.gvas_header)
+        header_prefix = self.gvas_header[:template_header["type_offset"]]
+        expected_types = {"metadata": template_header["save_game_type"]}
+
+        saves = self._converted_saves()
+        if self.verify == "sample":
+            random.shuffle(saves)
+        deadline = time.monotonic() + self.verify_budget
+        skipped = []
+
+        def check(item: Tuple[Path, str]) -> List[str]:
+            save_path, target_type = item
+            expected_type = expected_types.get(target_type, target_type)
+            with open(save_path, 'rb') as f:
+                data = f.read()
+            try:
+                header = parse_gvas_header(data)
+            except (ValueError, UnicodeDecodeError) as e:
+                return [f"{save_path.name}: invalid GVAS header ({e})"]
+            problems = []
+            if data[:header["type_offset"]] != header_prefix:
+                problems.append(f"{save_path.name}: header differs from template")
+            if header["save_game_type"] != expected_type:
+                problems.append(f"{save_path.name}: save_game_type is {header['save_game_type']}")
+            if target_type == "metadata" and b'bHasBeenCompressed_0' in data:
+                problems.append(f"{save_path.name}: compression flag still present")
+            if problems:
+                return problems
+
+            if self.verify == "sample" and time.monotonic() > deadline:
+                skipped.append(save_path)
+                return []
+            try:
+                result = run_uesave(['to-json', '-i', str(save_path)])
+                root = json.loads(result.stdout)['root']
+            except subprocess.CalledProcessError as e:
+                return [f"{save_path.name}: uesave can't decode it: {e.stderr.strip()}"]
+            except (json.JSONDecodeError, KeyError) as e:
+                return [f"{save_path.name}: invalid uesave output ({e})"]
+            if root.get('save_game_type') != expected_type:
+                problems.append(f"{save_path.name}: decoded save_game_type is {root.get('save_game_type')}")
+            if target_type == "metadata" and 'bHasBeenCompressed_0' in root.get('properties', {}):
+                problems.append(f"{save_path.name}: decoded compression flag still present")
+            if save_path.parent.name == "PlayerData" and root.get('af_data', {}).get('variant', 'None') != 'None':
+                problems.append(f"{save_path.name}: af_data variant is {root['af_data']['variant']}")
+            return problems
 
-            # Step 4: Fix save types
-            print("STEP 4: Fix save_game_type")
-            print("-" * 80)
-            if not self.fix_save_types(world_type, player_type):
-                return False
-            print()
+        try:
+            problems = [p for result in self._map_files(check, saves) for p in result]
+        except OSError as e:
+            self.log(f"Could not read converted saves: {e}", "ERROR")
+            return False
 
-            # Step 5: Fix metadata
-            print("STEP 5: Fix MetaData")
-            print("-" * 80)
-            if not self.fix_metadata():
-                return False
-            print()
+        for problem in problems:
+            self.log(problem, "ERROR")
+        if problems:
+            self.log(f"Verification failed for {len(problems)} checks, output not saved", "ERROR")
+            return False
 
-            # Step 6: Fix player data
-            print("STEP 6: Fix Player Data")
-            print("-" * 80)
-            if not self.fix_player_data():
-                return False
-            print()
+        decoded = len(saves) - len(skipped)
+        self.log(f"Verified {len(saves)} saves ({decoded} fully decoded)", "SUCCESS")
+        return True
 
-            # Step 7: Copy output
-            print("STEP 7: Save Output")
-            print("-" * 80)
-            if not self.copy_output():
+    def cleanup(self):
+        """Clean up temp files"""
+        if self.temp_dir and self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def conversion_stages(self) -> List[Tuple[str, List[str], Any]]:
+        """Conversion stages as (title, dependencies, function)
+
+        Stages only wait for the stages they actually depend on. Locating the input
+        and analyzing the template are independent, and the MetaData fix touches a
+        different file than the save type and player data fixes.
+        """
+        if self.stream:
+            # Headers are injected while streaming, so the template is needed first
+            locate = ("Stream Input Saves", ["Extract Template Headers"], lambda: self.stream_input()[0])
+        else:
+            locate = ("Locate Input Saves", [], lambda: self.extract_input()[0])
+        stages = [
+            locate,
+            ("Extract Template Headers", [], self._load_template),
+            ("Apply GVAS Headers", [locate[0], "Extract Template Headers"],
+             lambda: self.apply_headers(self.gvas_header)),
+        ]
+        fixed = "Apply GVAS Headers"
+        if self.result_cache:
+            stages.append(("Check Result Cache", ["Apply GVAS Headers"], self.load_cached_results))
+            fixed = "Check Result Cache"
+        stages += [
+            ("Fix save_game_type", [fixed],
+             lambda: self.fix_save_types(self.world_type, self.player_type)),
+            ("Fix MetaData", [fixed], self.fix_metadata),
+            ("Fix Player Data", ["Fix save_game_type"], self.fix_player_data),
+        ]
+        converted = ["Fix MetaData", "Fix Player Data"]
+        if self.verify:
+            stages.append(("Verify Output", converted, self.verify_output))
+            converted = ["Verify Output"]
+        if self.result_cache:
+            # Only verified results make it into the cache
+            stages.append(("Update Result Cache", converted, self.store_cached_results))
+            converted = ["Update Result Cache"]
+        stages.append(("Save Output", converted, self.copy_output))
+        return stages
+
+    def convert(self) -> bool:
+        """Run complete conversion"""
+        self.echo("=" * 80)
+        self.echo("ABIOTIC FACTOR: XBOX → STEAM CONVERTER")
+        self.echo("=" * 80)
+        self.echo()
+
+        started = time.perf_counter()
+        success = False
+        try:
+            if not run_stages(self.conversion_stages(), self._run_stage):
                 return False
-            print()
 
             # Success!
-            print("=" * 80)
-            print("✓ CONVERSION COMPLETE!")
-            print("=" * 80)
-            print()
-            print(f"Converted saves: {self.output_dir / self.extracted_dir.name}")
-            print()
-            print("Your saves are now ready for Steam!")
-            print()
-
+            self.echo("=" * 80)
+            self.echo("✓ CONVERSION COMPLETE!")
+            self.echo("=" * 80)
+            self.echo()
+            self.echo(f"Converted saves: {self.output_dir / self.extracted_dir.name}")
+            self.echo()
+            self.echo("Your saves are now ready for Steam!")
+            self.echo()
+
+            success = True
             return True
 
         except Exception as e:
@@ -521,7 +1120,192 @@ class AbioticConverter:
             return False
 
         finally:
+            self._flush_stages()
             self.cleanup()
+            self.print_timings(time.perf_counter() - started)
+            self.record_metrics(success, time.perf_counter() - started)
+
+    def _run_stage(self, number: int, title: str, func) -> bool:
+        """Run one stage, buffering its output so concurrent stages don't interleave"""
+        lines = [f"{self.log_prefix}STEP {number}: {title}", f"{self.log_prefix}{'-' * 80}"]
+        token = _stage_output.set(lines)
+        started = time.perf_counter()
+        try:
+            with profiler.phase(title, self.profile_game):
+                success = func()
+        except Exception as e:
+            self.log(f"Unexpected error: {e}", "ERROR")
+            success = False
+        finally:
+            self.timings[title] = time.perf_counter() - started
+            _stage_output.reset(token)
+            lines.append("")
+            self._stage_finished(number, lines)
+        return success
+
+    def _stage_finished(self, number: int, lines: List[str]):
+        """Print a stage's output once the output of all earlier stages is printed"""
+        with _print_lock:
+            self._stage_lines[number] = lines
+            while self._next_stage in self._stage_lines:
+                for line in self._stage_lines.pop(self._next_stage):
+                    print(line)
+                self._next_stage += 1
+
+    def _flush_stages(self):
+        """Print the output still waiting for earlier stages that never ran"""
+        with _print_lock:
+            for number in sorted(self._stage_lines):
+                for line in self._stage_lines.pop(number):
+                    print(line)
+
+    def print_timings(self, total: float):
+        """Print how long each stage took"""
+        if not self.timings:
+            return
+        self.echo("Stage timings:")
+        for title, seconds in self.timings.items():
+            self.echo(f"  {title:<28} {seconds:8.2f}s")
+        self.echo(f"  {'Total (wall)':<28} {total:8.2f}s")
+        self.echo()
+
+    def record_metrics(self, success: bool, seconds: float):
+        """Record this world's gauges for --metrics-file"""
+        if not metrics.enabled():
+            return
+        world = (self.extracted_dir.name if self.extracted_dir
+                 else self.input_path.name if self.input_path else "unknown")
+        metrics.gauge("xgp_world_duration_seconds", round(seconds, 3), world=world)
+        metrics.gauge("xgp_world_failures", 0 if success else 1, world=world)
+        for title, stage_seconds in self.timings.items():
+            metrics.gauge("xgp_world_stage_seconds", round(stage_seconds, 3), world=world, stage=title)
+        if success:
+            saves = [p for p in (self.output_dir / world).rglob("*") if p.is_file()]
+            metrics.gauge("xgp_world_bytes", sum(p.stat().st_size for p in saves), world=world)
+            metrics.gauge("xgp_world_saves", self.converted_count, world=world, state="converted")
+            metrics.gauge("xgp_world_saves", len(self.cached_files), world=world, state="cached")
+
+    def _map_files(self, func, items: List[Any]) -> List[Any]:
+        """Apply func to independent files concurrently, file_workers at a time across all stages"""
+        def limited(item):
+            with self._file_slots:
+                return func(item)
+
+        if self.file_workers <= 1 or len(items) <= 1:
+            return [limited(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.file_workers) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, limited, item) for item in items]
+            return [future.result() for future in futures]
+
+    def _load_template(self) -> bool:
+        """Use the pre-analyzed template if one was given, otherwise analyze it"""
+        if self.template_analysis is None:
+            self.template_analysis = self.get_template_headers()
+        self.gvas_header, self.world_type, self.player_type = self.template_analysis
+        return self.gvas_header is not None
+
+
+class OutputClaims:
+    """Output folders claimed by the worlds of one batch run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claimed = set()
+
+    def claim(self, path: Path) -> bool:
+        with self._lock:
+            key = os.path.normcase(os.path.abspath(path))
+            if key in self._claimed:
+                return False
+            self._claimed.add(key)
+            return True
+
+
+def expand_batch_inputs(patterns: List[str]) -> List[Path]:
+    """Expand batch input arguments (ZIPs, folders or glob patterns) into paths"""
+    inputs = []
+    for pattern in patterns:
+        if Path(pattern).exists():
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern))
+        for match in matches:
+            path = Path(match)
+            if path not in inputs and (path.suffix == ".zip" or path.is_dir()):
+                inputs.append(path)
+    return inputs
+
+
+def run_batch(inputs: List[Path], template_path: Optional[Path], output_dir: Path, jobs: int,
+              summary_path: Path, cache_dir: Optional[Path] = CACHE_DIR,
+              refresh_template: bool = False, overwrite: bool = False, stream: bool = False,
+              result_cache: Optional[ResultCache] = None, verify: Optional[str] = None,
+              verify_budget: float = DEFAULT_VERIFY_BUDGET, file_workers: int = 1) -> bool:
+    """Convert many worlds against one template analysis"""
+    batch_started = time.perf_counter()
+
+    # Analyze the template once for every world
+    analyzer = AbioticConverter(None, template_path, output_dir, cache_dir=cache_dir,
+                                refresh_template=refresh_template, interactive=False)
+    started = time.perf_counter()
+    with profiler.phase("Analyze Template"):
+        template_analysis = analyzer.get_template_headers()
+    template_seconds = time.perf_counter() - started
+    if template_analysis[0] is None:
+        return False
+
+    claims = OutputClaims()
+
+    def convert_one(input_path: Path) -> Dict[str, Any]:
+        converter = AbioticConverter(input_path, analyzer.template_path, output_dir,
+                                     interactive=False, overwrite=overwrite,
+                                     template_analysis=template_analysis,
+                                     output_claims=claims, log_prefix=f"[{input_path.name}] ",
+                                     stream=stream, file_workers=file_workers, result_cache=result_cache,
+                                     verify=verify, verify_budget=verify_budget)
+        started = time.perf_counter()
+        try:
+            success = converter.convert()
+        except Exception as e:
+            converter.errors.append(str(e))
+            success = False
+        return {
+            "input": str(input_path),
+            "world": converter.extracted_dir.name if converter.extracted_dir else None,
+            "output": str(output_dir / converter.extracted_dir.name) if success else None,
+            "success": success,
+            "seconds": round(time.perf_counter() - started, 3),
+            "steps": {title: round(seconds, 3) for title, seconds in converter.timings.items()},
+            "cached_saves": len(converter.cached_files),
+            "converted_saves": converter.converted_count,
+            "errors": converter.errors,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(convert_one, inputs))
+
+    failed = [r for r in results if not r["success"]]
+    summary = {
+        "template": str(analyzer.template_path),
+        "template_seconds": round(template_seconds, 3),
+        "total_seconds": round(time.perf_counter() - batch_started, 3),
+        "jobs": jobs,
+        "converted": len(results) - len(failed),
+        "failed": len(failed),
+        "result_cache": result_cache.stats if result_cache else None,
+        "worlds": results,
+    }
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print()
+    print(f"Converted {summary['converted']}/{len(results)} worlds in {summary['total_seconds']:.1f}s")
+    for result in failed:
+        reason = result["errors"][-1] if result["errors"] else "unknown error"
+        print(f"✗ {result['input']}: {reason}")
+    print(f"Summary written to: {summary_path}")
+    return not failed
 
 
 def main():
@@ -546,17 +1330,144 @@ def main():
         default=Path("converted_saves"),
         help="Output directory (default: converted_saves)"
     )
-
-    args = parser.parse_args()
-
-    converter = AbioticConverter(
-        input_path=args.input,
-        template_path=args.template,
-        output_dir=args.output
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help=f"Directory for cached template analysis (default: {CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--refresh-template",
+        action="store_true",
+        help="Re-analyze the template even if a cached analysis exists"
+    )
+    parser.add_argument(
+        "--no-result-cache",
+        action="store_true",
+        help="Convert every save from scratch instead of reusing cached results"
     )
+    parser.add_argument(
+        "--result-cache-size",
+        type=int,
+        default=DEFAULT_RESULT_CACHE_MB,
+        metavar="MB",
+        help="Size cap of the converted save cache (default: %(default)s MB)"
+    )
+    parser.add_argument(
+        "--verify",
+        choices=["full", "sample"],
+        help="Re-parse converted saves before saving the output; 'sample' decodes a random subset"
+    )
+    parser.add_argument(
+        "--verify-budget",
+        type=float,
+        default=DEFAULT_VERIFY_BUDGET,
+        metavar="SECONDS",
+        help="Time budget for decoding saves in sample verification mode (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="INPUT",
+        help="Convert many ZIPs, folders or glob patterns against one template without prompting"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Worlds converted concurrently in batch mode (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Saves processed concurrently within a world (default: the number of CPUs, "
+             "1 in batch mode, where --jobs worlds are converted at once)"
+    )
+    parser.add_argument(
+        "--summary",
+        type=Path,
+        help="Batch summary JSON path (default: OUTPUT/batch_summary.json)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream saves from the input straight into the output folder instead of extracting and copying"
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace existing output folders instead of asking"
+    )
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="Never ask for input; an existing output folder fails the run unless --overwrite is given"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        metavar="PROM",
+        help="Write Prometheus metrics of the run to this file (for node_exporter's textfile collector)"
+    )
+    profiler.add_arguments(parser)
 
-    success = converter.convert()
-    sys.exit(0 if success else 1)
+    args = parser.parse_args()
+    if args.verify_budget <= 0:
+        parser.error("--verify-budget must be more than 0 seconds")
+    profile_report = profiler.start_from_args(args, "convert_to_steam.py")
+    if args.metrics_file:
+        metrics.start(args.metrics_file, "convert_to_steam.py")
+
+    success = False
+    try:
+        result_cache = None
+        if args.cache_dir and not args.no_result_cache:
+            result_cache = ResultCache(args.cache_dir, args.result_cache_size * 1024 * 1024)
+
+        if args.batch:
+            inputs = expand_batch_inputs(args.batch)
+            if not inputs:
+                print("✗ No ZIPs or folders matched the batch inputs")
+                sys.exit(1)
+            success = run_batch(
+                inputs,
+                template_path=args.template,
+                output_dir=args.output,
+                jobs=args.jobs,
+                summary_path=args.summary or args.output / "batch_summary.json",
+                cache_dir=args.cache_dir,
+                refresh_template=args.refresh_template,
+                overwrite=args.overwrite,
+                stream=args.stream,
+                result_cache=result_cache,
+                verify=args.verify,
+                verify_budget=args.verify_budget,
+                # Worlds already run in parallel, one uesave per world unless asked for more
+                file_workers=args.workers or 1
+            )
+            sys.exit(0 if success else 1)
+
+        converter = AbioticConverter(
+            input_path=args.input,
+            template_path=args.template,
+            output_dir=args.output,
+            cache_dir=args.cache_dir,
+            refresh_template=args.refresh_template,
+            interactive=not args.non_interactive,
+            overwrite=args.overwrite,
+            stream=args.stream,
+            file_workers=args.workers or os.cpu_count() or 1,
+            result_cache=result_cache,
+            verify=args.verify,
+            verify_budget=args.verify_budget
+        )
+
+        success = converter.convert()
+        sys.exit(0 if success else 1)
+    finally:
+        if profile_report:
+            profiler.finish(profile_report, args.profile_stats)
+        metrics.finish(success)
 
 
 if __name__ == "__main__":
@@ -14,6 +14,9 @@ import sys
 import ctypes
 from pathlib import Path
 
+import profiler
+import throttle
+
 def find_oodle_dll():
     """Find oo2core DLL in current directory or system"""
 
@@ -132,8 +135,11 @@ def parse_toc(data):
 
     entries.append({'path': path, 'size': size, 'class': class_path})
 
-    # Entries 2-31
-    for i in range(30):
+    # Remaining entries. Real archives have 31, so read at least that many unless the
+    # entry sizes already add up to the uncompressed size.
+    max_entries = max(file_count, 31)
+    while len(entries) < max_entries and sum(e['size'] for e in entries) < total_uncomp_size:
+        entry_offset = offset
         try:
             path_len = struct.unpack('<I', data[offset:offset+4])[0]
             if path_len > 500:
@@ -152,6 +158,7 @@ def parse_toc(data):
 
             entries.append({'path': path, 'size': size, 'class': class_path})
         except:
+            offset = entry_offset
             break
 
     print(f"Found {len(entries)} TOC entries")
@@ -191,8 +198,35 @@ def decompress_oodle(decompress_func, compressed_data, uncompressed_size):
     print(f"✓ Decompressed to {result:,} bytes")
     return output_buffer.raw
 
-def extract_archive(archive_path, output_dir, oodle_dll_path=None):
-    """Main extraction function"""
+def write_entries(entries, decompressed, output_dir):
+    """Write each TOC entry's slice of the decompressed data to output_dir"""
+
+    offset = 0
+    for i, entry in enumerate(entries):
+        filename = entry['path'].split('/')[-1]
+        output_path = os.path.join(output_dir, f"{filename}.sav")
+
+        file_data = decompressed[offset:offset+entry['size']]
+        offset += entry['size']
+
+        # Check if it's GVAS
+        is_gvas = file_data[:4] == b'GVAS'
+        status = "GVAS ✓" if is_gvas else "?"
+
+        print(f"  {i+1:2d}. {filename:40s} {entry['size']:9,} bytes [{status}]")
+
+        with open(output_path, 'wb') as f:
+            throttle.writer(f).write(file_data)
+        profiler.count(bytes_written=len(file_data), files=1)
+
+def extract_archive(archive_path, output_dir, oodle_dll_path=None, decompress_func=None, cache=None, cache_key=None):
+    """Main extraction function
+
+    decompress_func can be given instead of a DLL path; it is called with the same
+    arguments as OodleLZ_Decompress (used by the benchmarks' stand-in codec).
+    With an abf_cache.ExtractCache and the archive's key, the TOC entries and the
+    decompressed data are stored in the cache.
+    """
 
     print("="*70)
     print("ABIOTIC FACTOR ABF ARCHIVE EXTRACTOR")
@@ -200,10 +234,10 @@ def extract_archive(archive_path, output_dir, oodle_dll_path=None):
     print()
 
     # Find and load Oodle DLL
-    if not oodle_dll_path:
+    if not oodle_dll_path and not decompress_func:
         oodle_dll_path = find_oodle_dll()
 
-    if not oodle_dll_path:
+    if not oodle_dll_path and not decompress_func:
         print("\n" + "="*70)
         print("ERROR: Oodle DLL not found!")
         print("="*70)
@@ -219,19 +253,23 @@ def extract_archive(archive_path, output_dir, oodle_dll_path=None):
         print("Copy the DLL to this script's directory and run again.")
         return False
 
-    decompress_func = load_oodle_dll(oodle_dll_path)
+    if not decompress_func:
+        decompress_func = load_oodle_dll(oodle_dll_path)
     if not decompress_func:
         return False
 
     # Load archive
     print(f"\nLoading archive: {archive_path}")
-    with open(archive_path, 'rb') as f:
-        data = f.read()
+    with profiler.phase("abf read"):
+        with open(archive_path, 'rb') as f:
+            data = throttle.reader(f).read()
+        profiler.count(bytes_read=len(data), files=1)
 
     print(f"Archive size: {len(data):,} bytes")
 
     # Parse TOC
-    entries, data_offset, expected_size = parse_toc(data)
+    with profiler.phase("abf parse_toc"):
+        entries, data_offset, expected_size = parse_toc(data)
 
     # Parse compression header
     data_section = data[data_offset:]
@@ -245,7 +283,9 @@ def extract_archive(archive_path, output_dir, oodle_dll_path=None):
     compressed_data = data_section[8:8+comp_size]
 
     # Decompress
-    decompressed = decompress_oodle(decompress_func, compressed_data, expected_size)
+    with profiler.phase("oodle decompress"):
+        decompressed = decompress_oodle(decompress_func, compressed_data, expected_size)
+        profiler.count(bytes_read=len(compressed_data), bytes_written=len(decompressed))
 
     # Verify
     if len(decompressed) != expected_size:
@@ -256,6 +296,13 @@ def extract_archive(archive_path, output_dir, oodle_dll_path=None):
     gvas_count = decompressed.count(b'GVAS')
     print(f"\n✓ Found {gvas_count} GVAS signatures in decompressed data")
 
+    if cache is not None:
+        with profiler.phase("abf cache store"):
+            try:
+                cache.put(cache_key, entries, decompressed)
+            except OSError as e:
+                print(f"Warning: could not cache the decompressed archive: {e}")
+
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
 
@@ -265,22 +312,8 @@ def extract_archive(archive_path, output_dir, oodle_dll_path=None):
     print("="*70)
     print()
 
-    offset = 0
-    for i, entry in enumerate(entries):
-        filename = entry['path'].split('/')[-1]
-        output_path = os.path.join(output_dir, f"{filename}.sav")
-
-        file_data = decompressed[offset:offset+entry['size']]
-        offset += entry['size']
-
-        # Check if it's GVAS
-        is_gvas = file_data[:4] == b'GVAS'
-        status = "GVAS ✓" if is_gvas else "?"
-
-        print(f"  {i+1:2d}. {filename:40s} {entry['size']:9,} bytes [{status}]")
-
-        with open(output_path, 'wb') as f:
-            f.write(file_data)
+    with profiler.phase("abf write"):
+        write_entries(entries, decompressed, output_dir)
 
     print(f"\n✓✓✓ Extraction complete!")
     print(f"Output directory: {output_dir}")
@@ -0,0 +1,169 @@
+"""
+Helpers for placing files without rewriting more bytes than needed
+
+Tries the cheapest way to get a file to its destination: a rename, then a hardlink
+(when the caller allows it), then a reflink sharing the data blocks (Linux, on btrfs,
+XFS and other copy-on-write filesystems), then an in-kernel copy_file_range() copy,
+and finally a regular buffered copy.
+"""
+
+import contextlib
+import errno
+import os
+import re
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import profiler
+import throttle
+
+if sys.platform.startswith("linux"):
+    import fcntl
+
+CHUNK_SIZE = 1024 * 1024
+# Names of atomic_target()'s temporary files
+TMP_NAME = re.compile(r"\..+\.[0-9a-f]{8}\.tmp")
+# _IOW(0x94, 9, int), fcntl.FICLONE on Python 3.12+
+FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Clone src's data blocks into dst, returns False if the filesystem can't"""
+    if not sys.platform.startswith("linux"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY,
+                           errno.EBADF, errno.EPERM):
+                return False
+            raise
+    return True
+
+
+def _copy_file_range(src: Path, dst: Path) -> bool:
+    """Copy with os.copy_file_range, returns False if the platform can't do it"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        # Small steps when throttled, so the copy can be paced
+        step = CHUNK_SIZE if throttle.enabled() else 1 << 30
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(remaining, step))
+                if copied == 0:
+                    break
+                remaining -= copied
+                throttle.read(copied)
+                throttle.write(copied)
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                return False
+            raise
+    return remaining == 0
+
+
+def copy_file(src: Path, dst: Path, link: bool = False) -> str:
+    """Copy src to dst, hardlinking if allowed and possible
+
+    Returns how: "link", "reflink" or "copy".
+    """
+    if link:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:
+            pass
+    if _reflink(src, dst):
+        return "reflink"
+    if not _copy_file_range(src, dst):
+        if throttle.enabled():
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                shutil.copyfileobj(throttle.reader(fsrc), throttle.writer(fdst), CHUNK_SIZE)
+        else:
+            shutil.copyfile(src, dst)
+    if profiler.enabled():
+        size = os.path.getsize(dst)
+        profiler.count(bytes_read=size, bytes_written=size, files=1)
+    return "copy"
+
+
+def move_file(src: Path, dst: Path) -> str:
+    """Move src to dst, falling back to a copy across filesystems
+
+    Returns how: "rename", or copy_file()'s answer.
+    """
+    try:
+        os.replace(src, dst)
+        return "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        method = copy_file(src, dst)
+        os.unlink(src)
+        return method
+
+
+@contextlib.contextmanager
+def atomic_target(dst: Path):
+    """Temporary path next to dst, renamed over dst if the block succeeds
+
+    Readers of dst see either the old or the new file, never a partial one.
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, dst)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def remove_stale_tmp(directory: Path) -> int:
+    """Delete the temporary files an interrupted atomic_target() left below directory
+
+    Returns how many were deleted. Only for directories nothing else writes to now.
+    """
+    removed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if TMP_NAME.fullmatch(name):
+                with contextlib.suppress(OSError):
+                    os.unlink(os.path.join(root, name))
+                    removed += 1
+    return removed
+
+
+def place_tree(src: Path, dst: Path, move: bool = False):
+    """Move or copy a directory tree to dst, which must not exist"""
+    if move:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    for root, _, files in os.walk(src):
+        target_root = dst / Path(root).relative_to(src)
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            if move:
+                move_file(Path(root) / name, target_root / name)
+            else:
+                copy_file(Path(root) / name, target_root / name)
+    if move:
+        shutil.rmtree(src, ignore_errors=True)
+
+
+def write_stream(stream, dst: Path, prefix: bytes = b""):
+    """Write prefix followed by the rest of a binary stream to dst"""
+    with open(dst, "wb") as f:
+        f.write(prefix)
+        shutil.copyfileobj(stream, throttle.writer(f), CHUNK_SIZE)
+        written = f.tell()
+    profiler.count(bytes_read=written - len(prefix), bytes_written=written, files=1)
@@ -0,0 +1,186 @@
+"""
+Checkpoint journal of a resumable run (--resume)
+
+A run over many profiles and games can be cut short by a reboot or a crash. With
+--resume, main.py appends a JSON line to the journal whenever it starts on a unit
+(one user's saves of one game in one profile, for one output format) and when it
+leaves a temp directory, a partial archive or an install directory behind, and a
+"done" line with the archive's path and a signature of the containers once the
+archive is complete, or a "skipped" line if it had nothing to archive. Every line is
+flushed to disk before the work it describes.
+
+Running with --resume again skips the units that are done, as long as their
+containers are unchanged and their archive still exists, and deletes what the
+unfinished units of the interrupted run left behind. The journal is deleted when a
+run finishes without failures.
+
+Like catalog.py, the functions are no-ops unless start() was called.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import backends
+import fastcopy
+import records
+
+DEFAULT_PATH = Path("xgp-resume.jsonl")
+
+# Unit key: (profile or "", package, user, output format)
+Key = Tuple[str, str, str, str]
+
+_file = None
+_path: Optional[Path] = None
+_lock = threading.Lock()
+# Done units: {"path": ..., "signature": ...}
+_done: Dict[Key, Dict[str, str]] = {}
+
+
+def unit_key(profile: Optional[str], package: str, user: Any, output_format: str) -> Key:
+    return profile or "", package, str(user), output_format
+
+
+def signature(containers: List[records.ContainerRecord]) -> str:
+    """Hash of the containers' numbers, GUIDs, times and blob GUIDs
+
+    The Xbox app writes a changed container under a new number and new blob GUIDs.
+    """
+    h = hashlib.sha256()
+    for container in sorted(containers, key=lambda container: container.name):
+        h.update(container.name.encode("utf-8") + b"\0")
+        h.update(b"%d %d " % (container.number, container.filetime))
+        h.update(container.guid)
+        for file in container.files:
+            h.update(file.name.encode("utf-8") + b"\0" + file.guid)
+    return h.hexdigest()
+
+
+def _read(path: Path) -> Tuple[Dict[Key, Dict[str, str]], Dict[Key, Dict[str, str]]]:
+    """Done and unfinished units of a journal"""
+    done: Dict[Key, Dict[str, str]] = {}
+    pending: Dict[Key, Dict[str, str]] = {}
+    try:
+        with path.open(encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return done, pending
+    for line in lines:
+        try:
+            event = json.loads(line)
+            key = tuple(event.pop("unit"))
+        except (ValueError, KeyError, TypeError):
+            # The last line of a journal cut off mid-write
+            continue
+        if "done" in event:
+            pending.pop(key, None)
+            done[key] = {"path": event["done"], "signature": event["signature"]}
+        elif "skipped" in event:
+            pending.pop(key, None)
+        else:
+            done.pop(key, None)
+            pending.setdefault(key, {}).update(event)
+    return done, pending
+
+
+def _clean_up(leftovers: Dict[str, str]) -> int:
+    """Delete the temp directory and partial archive of an unfinished unit"""
+    removed = 0
+    for kind in ("temp", "partial"):
+        if kind in leftovers:
+            path = Path(leftovers[kind])
+            if path.exists():
+                backends.remove_path(path)
+                removed += 1
+    if "install" in leftovers:
+        removed += fastcopy.remove_stale_tmp(Path(leftovers["install"]))
+    return removed
+
+
+def start(path: Path) -> Tuple[int, int, int]:
+    """Open the journal, returns the done units, unfinished units and deleted leftovers"""
+    global _file, _path
+    done, pending = _read(path)
+    removed = sum(_clean_up(leftovers) for leftovers in pending.values())
+    # Only the done units are still needed
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        for key, entry in done.items():
+            f.write(json.dumps({"unit": key, "done": entry["path"], "signature": entry["signature"]}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _done.clear()
+    _done.update(done)
+    _path = path
+    _file = path.open("a", encoding="utf-8")
+    return len(done), len(pending), removed
+
+
+def enabled() -> bool:
+    return _file is not None
+
+
+def _write(key: Key, **fields: Any):
+    line = json.dumps({"unit": key, **fields}) + "\n"
+    with _lock:
+        _file.write(line)
+        _file.flush()
+        os.fsync(_file.fileno())
+
+
+def completed(key: Key, unit_signature: str) -> Optional[str]:
+    """Path of the unit's archive if an earlier run finished it with the same containers"""
+    if _file is None:
+        return None
+    with _lock:
+        entry = _done.get(key)
+    if entry is None or entry["signature"] != unit_signature:
+        return None
+    if key[3] != "install" and not os.path.exists(entry["path"]):
+        return None
+    return entry["path"]
+
+
+def begin(key: Key, temp_dir: Path):
+    """Record that work on a unit started, with the temp directory it uses"""
+    if _file is not None:
+        _write(key, temp=str(temp_dir))
+
+
+def writing(key: Key, path: Path, install: bool = False):
+    """Record the partial archive (or with install, the directory) a unit writes"""
+    if _file is not None:
+        _write(key, **{"install" if install else "partial": os.path.abspath(path)})
+
+
+def skipped(key: Key):
+    """Record that a unit had no saves to write, once its temp directory is deleted"""
+    if _file is not None:
+        _write(key, skipped=True)
+
+
+def done(key: Key, unit_signature: str, path: str):
+    """Record that a unit's archive is complete"""
+    if _file is None:
+        return
+    _write(key, done=path, signature=unit_signature)
+    with _lock:
+        _done[key] = {"path": path, "signature": unit_signature}
+
+
+def finish(success: bool):
+    """Close the journal, and delete it if the run is complete"""
+    global _file, _path
+    f, path, _file, _path = _file, _path, None, None
+    if f is None:
+        return
+    f.close()
+    if success:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,16 +1,37 @@
+import argparse
+import contextlib
+import contextvars
+import fnmatch
+import hashlib
 import json
 import os
 import shutil
 import struct
 import subprocess
 import sys
+import tarfile
 import tempfile
+import threading
+import time
 import traceback
 import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path, PurePath
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
+
+import abf_cache
+import archives
+import backends
+import catalog
+import journal
+import manifest
+import metrics
+import profiler
+import records
+import snapshots
+import throttle
 
 # Import Abiotic Factor extraction module
 try:
@@ -31,6 +52,137 @@ packages_root = Path(os.path.expandvars(f"%LOCALAPPDATA%\\Packages"))
 # Abiotic Factor constants (from v1.0, 2025-10-07)
 ABIOTIC_GVAS_HEADER_HEX = "47564153030000000a020000f40300000500040004004c420f80090000002b2b44462b41424600030000004a00000022d5549cbe4f26a846072194d082b4612c000000a35c9162f74b8e1cc7120ea3f79d21c822000000240d40cc7b4ee9e083a2f99b27e0000000e40bb2b0184fe91ec0b953a3c7050a00000000c3751e0639467eb484c87064ecefe7402800000041e8066e44f49482311d72a18e3713250000000609bd37cf80430f734c166a4d63f6c0370000000f64c4b5e0ae44bd39c2f33c2f36a6fc000000005c86c1a3e30f4974cd48ccaeda941339000000007b13f378c24be916df47a4e81cce8e1c14000000292e765da12049fcbdb27f89481c09d830000000a51ec67ba12441d86ec7b5e0f84d075a0d000000f77e3bd8b5354e10a9579852087a0002000000281cf7c26e2d8146a786e0409c540d550100000006ea736cf71047b67c0355826fa50a6a03000000dc2968d716dd4d1de2a0aa64cc8308840300000075ba7dc2264cdfc31718b75e531df71f01000000d4d4686e3ea42c05b179e0c154f0e5c60100000091fb98d664ec494d78e5a9f1dc86ad2211000000d8271baf46bb4f65e48c58cf5daf590f00000000a3e1d4e2e26349c7b5f89e6d0a042048010000004e82d5e9600947aafbb60da0e37aa91f030000006cbbce6cb60740a7e71817c7538f06310e000000d1c3e00b35e8014d8ebf5e38fdbf00230f0000004b066e89974ee02f8d67b38c72e7065a01000000f68c74dd074fab0d718799f2e87913e301000000e2d142d77024427e800aa0f72b46ee980f000000d1d30d72e940416ea4af09742eb064d001000000bafd63b02478fb72810ae6f8b49e20cd86000000bb5a48dbcb6d7f81f8cfa2d60c905b6e08000000ddbb4c5bae5b4b12e9cad67f86aeba550c000000689170e7bb2340587e994ca9bdb0f19e0d0000008806cbd99fff58014ea290d05fc1b810050000003f6b6d12f2e2bf5f6c7e29530cd5e17a01000000a3b3740f4f634d55e6a2e8c1729fd9970a000000c21ecf35ec26254a60a2c948770f79f329000000bde0b468fe6b49479873e380f3b66e1b28000000609e02b3201b1fe5a304b3e3fd26320300000060b77dae6f24fce23a18f73014bc5e07010000006d5f0da6cde13e58211ecc9fb482a71f00000000e4368a7bf9a09548f973219bbf41a77c020000008aceb4303958728f3b4efb7714cf58e901000000075b37716aa64e179c7398c83a7e62107700000000fc0da1f27e5b46f2baa5a1ff701bb8ac33000000d4cc7e89eb41fb9a0959a01884ab85e808000000c261105ec1964c77e1e1f4a4b22ebf8e12000000e1b03a9227624ec5aa7e21e0dd059e9c13000000bd86ff9d494fe201a28812c3a86f77060a000000ac07a1f2aff63e161df39c1742fc3a68010000000b1f742f93174c1009a1cf0c7b09e0f70a00000028f94c35e63a410f8c8d9fcf91f5b55100000027dda3c235f80bc1834c3b1699d37d0e000000a27e74a4e8cda82e0a498d9c60186c4007000000dc087e80952b49bd8b415a81e3fa4f6b05000000eb3fb52e54956a754ae4b59ac4dbb0b805000000f9e510fb4ec9118f1e368f5ab4f9edc301000000e7ac61a10c49fb5ec91dcea3ce76025e320000002edd750a0341bdb96fc66a11f28c16a701000000d0e37afe57b3c14c86990f55f5fcf85658000000040d3e26f0a363e66c044e38e5d7adb20000000081ddae93be1aea4775b7097b3a7df9c609000000ac0b5e2ce69a11117c4bab11a5415411000000bbe11ce2b67ef90020d1c97428b30f5d00000000301dbe5d725f03a39ea4bfd5b3852f6503000000798d5ddc4169460e9c4e56f3fc8fb73909000000bf5c7aa7ea0f5c28b46482cf5d9dbe371e000000b86af06e8e63c2a4047ef6ed463818120000000047567f7d6fec71488c9a23b6e9fb63e503000000fc90f9f8fbe3a0a3c8f1af83802074c204000000dc8e427ea4bd7e0e68490f8fa4eefd1a05000000d0486ff81ed1c2119dfa76f0fa5d2e4a01000000db0379fb5b53dd88e8dbfe9e82403d7502000000e066c19a4f40ffe82127a3ba96bd5f5502000000dcc0f2fc30afdb16e1ae98fcec06570756000000e41b046304a36a9e05005df874d5ed6600000007a0a7e8cb0f1bfb85ef3b8f7fe8594a080000000070caee97d9a8524d9afa6f2e5f00de0005000000ca5ff16dc09c4e4f5f84feead2e1b6e900000000a05d9531a00a5a02add60b96c9ab8fc303000000d2a99adc64534f01b6de0dc02fb96b7009000000bec1a7a0ea072ec8305d9f5ca8c1cd501e000000f6df23f6aa7bbb494e18fff68d6df04702000000b0dd6b2a7f0f4708980f28f996564bf805000000fa14f82d3e99e5c40f5b3f99f1e43e5f01000000c3bb3624e74620051bb6ed50b6e51e7505000000e03c385f91104d14b66e817f6016a95101000000d23dbb22759eaf91023ba8dd52ab2f76020000008a76cf5c99c34e19b3691f71c1d40cfc550000004d021e63f77c3d4e0a0508e41ebe76000000000021c44a72fa8ea27b4be5d1db12e50aa003000000a6eec5db7c30f22f64dfb4cdd60a090600000000"
 ABIOTIC_GVAS_HEADER = bytes.fromhex(ABIOTIC_GVAS_HEADER_HEX)
+# Choices for the batch mode warning policies
+WARNING_POLICIES = ("continue", "skip", "fail")
+
+# Batch mode: what to do on each kind of warning ("sync-warning", "backups", "missing")
+# instead of asking. None in interactive mode.
+batch_policies: Dict[str, str] | None = None
+# Batch mode: JSON-lines event stream
+event_stream = None
+# Output format (--format) and compression level (--compress-level) of the archives
+output_format = backends.DEFAULT_FORMAT
+compress_level: int | None = None
+# Whether the archives get a SHA256SUMS manifest (--no-manifest)
+write_manifest = True
+# Only record the saves in the catalog (--catalog-only)
+catalog_only = False
+# Save directory to install the saves into instead of writing archives (--install-to),
+# and whether files may be hardlinked there (--install-link)
+install_dir: Path | None = None
+install_link = False
+# Directory the archives are written to (--output-dir), in a directory per profile for --packages-root
+output_dir = Path()
+# The (profile, package, user) whose saves went into install_dir, only one may
+_install_owner: Tuple | None = None
+_install_lock = threading.Lock()
+
+# Cache of decompressed Abiotic Factor archives (--abf-cache-dir), None if disabled
+abf_extract_cache: "abf_cache.ExtractCache | None" = None
+
+# What to extract (--game, --user, --container, --since), None for everything
+selection: "Selection | None" = None
+
+# Game (and profile) the events emitted in the current context belong to
+_event_fields: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("event_fields", default={})
+_event_lock = threading.Lock()
+
+# Serializes the output of concurrently extracted games
+_print_lock = threading.Lock()
+# Output of the game being extracted in the current context, printed when it is done
+_game_output: contextvars.ContextVar[List[str] | None] = contextvars.ContextVar("game_output", default=None)
+
+# Offline scans (--packages-root): a user profile is a copied or mounted Packages
+# directory, somewhere below one of the roots
+MAX_SCAN_DEPTH = 8
+PROFILE_SUFFIX = ("AppData", "Local", "Packages")
+
+# A game to extract: (profile label or None for the local user, Packages directory, package name)
+Unit = Tuple[str | None, Path, str]
+
+
+class BufferedStdout:
+    """Stands in for sys.stdout while games are extracted concurrently
+
+    Whatever is printed while a game is extracted goes into that game's buffer and is
+    written in one piece once the game is done, so the output of games does not
+    interleave.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        lines = _game_output.get()
+        if lines is not None:
+            lines.append(text)
+            return len(text)
+        with _print_lock:
+            return self.stream.write(text)
+
+    def write_buffer(self, lines: List[str]):
+        with _print_lock:
+            self.stream.write("".join(lines))
+            self.stream.flush()
+
+    def flush(self):
+        self.stream.flush()
+
+
+class Selection:
+    """Games, users and containers to extract
+
+    Games and containers are matched with case-insensitive globs, users by gamertag or
+    user ID (decimal or hex). Containers can also be limited to the ones whose time in
+    containers.index is at or after since.
+    """
+
+    def __init__(self, games: List[str] | None = None, users: List[str] | None = None,
+                 containers: List[str] | None = None, since: datetime | None = None):
+        self.games = [pattern.casefold() for pattern in games or []]
+        self.users = {user.casefold() for user in users or []}
+        self.containers = [pattern.casefold() for pattern in containers or []]
+        self.since = since
+
+    def match_game(self, package_name: str, name: str) -> bool:
+        return not self.games or any(
+            fnmatch.fnmatchcase(name.casefold(), pattern) or fnmatch.fnmatchcase(package_name.casefold(), pattern)
+            for pattern in self.games
+        )
+
+    def match_user(self, user: int | str, user_dir: Path) -> bool:
+        if not self.users:
+            return True
+        user_id_hex = user_dir.name.split("_")[0]
+        return bool({str(user).casefold(), str(int(user_id_hex, 16)), user_id_hex.casefold()} & self.users)
+
+    def match_container(self, name: str, modified: datetime) -> bool:
+        if self.since is not None and modified < self.since:
+            return False
+        return not self.containers or any(fnmatch.fnmatchcase(name.casefold(), pattern) for pattern in self.containers)
+
+
+def parse_since(value: str) -> datetime:
+    """--since value: a duration before now (90s, 30m, 1h, 2d, 1w) or an ISO 8601 time"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    try:
+        if value[-1:].lower() in units and value[:-1].replace(".", "", 1).isdigit():
+            return datetime.now(timezone.utc) - timedelta(seconds=float(value[:-1]) * units[value[-1].lower()])
+        # Times without a time zone are local
+        return datetime.fromisoformat(value).astimezone(timezone.utc)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time {value!r}, expected e.g. 1h, 2d or 2025-01-31T12:00")
+
+
+class GameWarning(Exception):
+    """A warning whose batch policy is to skip or fail the game"""
+
+    def __init__(self, kind: str, message: str, policy: str):
+        super().__init__(message)
+        self.kind = kind
+        self.policy = policy
+
+
 ABIOTIC_SAVE_TYPES = {
     "metadata": "/Game/Blueprints/Saves/Abiotic_WorldMetadataSave.Abiotic_WorldMetadataSave_C",
     "world": "/Game/Blueprints/Saves/Abiotic_WorldSave.Abiotic_WorldSave_C",
@@ -65,15 +217,157 @@ def read_game_list() -> Dict[str, Any] | None:
         return None
 
 
-def discover_games(supported_games: Dict[str, Any]) -> List[str]:
+def discover_games(supported_games: Dict[str, Any], root: Path | None = None) -> List[str]:
+    root = root or packages_root
     found_games = []
     for pkg_name in supported_games.keys():
-        pkg_path = packages_root / pkg_name
+        pkg_path = root / pkg_name
         if pkg_path.exists():
             found_games.append(pkg_name)
     return found_games
 
 
+def map_parallel(func, items: List[Any], workers: int) -> List[Any]:
+    """map() with up to workers threads"""
+    if workers <= 1 or len(items) <= 1:
+        return list(map(func, items))
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def _scan_profile_dir(path: Path, package_names: Iterable[str]) -> Tuple[bool, List[Path]]:
+    """Whether path is a Packages directory with supported games, else where to look next"""
+    try:
+        if isinstance(path, snapshots.ArchivePath):
+            subdirs = {child.name for child in path.iterdir() if child.is_dir()}
+        else:
+            with os.scandir(path) as entries:
+                subdirs = {entry.name for entry in entries if entry.is_dir()}
+    except OSError:
+        return False, []
+    if any(name in subdirs for name in package_names):
+        return True, []
+    if path.name.lower() == "packages":
+        # Packages directory without supported games, don't look through every app
+        return False, []
+    if "AppData" in subdirs:
+        # User profile, only its own Packages directory can have saves
+        return False, [path.joinpath(*PROFILE_SUFFIX)]
+    return False, [path / name for name in subdirs]
+
+
+def find_packages_dirs(roots: List[Path], package_names: Iterable[str], workers: int) -> List[Tuple[Path, Path]]:
+    """Packages directories below the roots as (root, directory)
+
+    A root can be a Packages directory, a user profile or anything above them, like a
+    backup of many machines' Users directories, or a ZIP or tar snapshot of one of
+    those, which is read in place. The roots are walked level by level, the
+    directories of each level in parallel.
+    """
+    found = []
+    seen = set()
+    level = []
+    for root in roots:
+        if snapshots.is_archive(root):
+            try:
+                root = snapshots.open_root(root)
+            except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                print(f"Failed to open snapshot {root}: {e}")
+                emit_event("error", message=f"Failed to open snapshot {root}: {e}")
+                continue
+        level.append((root, root))
+    for _ in range(MAX_SCAN_DEPTH + 1):
+        if not level:
+            break
+        results = map_parallel(lambda item: _scan_profile_dir(item[1], package_names), level, workers)
+        next_level = []
+        for (root, path), (is_packages_dir, subdirs) in zip(level, results):
+            if is_packages_dir:
+                # Roots may overlap
+                key = path if isinstance(path, snapshots.ArchivePath) else os.path.realpath(path)
+                if key not in seen:
+                    seen.add(key)
+                    found.append((root, path))
+            else:
+                next_level.extend((root, subdir) for subdir in subdirs)
+        level = next_level
+    return found
+
+
+def root_names(roots: Iterable[Path]) -> Dict[Path, str]:
+    """Label of every root: its name, and a hash of its path if another root has the same name"""
+    paths = {root: str(root.resolve()) for root in roots}
+    names = {root: root.resolve().name or "root" for root in roots}
+    shared = {name for name in names.values() if len({paths[root] for root in names if names[root] == name}) > 1}
+    return {root: f"{name}-{hashlib.sha256(paths[root].encode('utf-8')).hexdigest()[:8]}" if name in shared else name
+            for root, name in names.items()}
+
+
+def profile_label(root_name: str, root: Path, packages_dir: Path) -> str:
+    """Name of a user profile: the root's label and the path to the profile below it"""
+    parts = list(packages_dir.relative_to(root).parts)
+    suffix = list(PROFILE_SUFFIX)
+    while parts and suffix and parts[-1].lower() == suffix[-1].lower():
+        parts.pop()
+        suffix.pop()
+    return "/".join([root_name, *parts])
+
+
+def discover_units(games: Dict[str, Any], roots: List[Path] | None = None, workers: int = 1) -> List[Unit]:
+    """Installed supported games of the current user, or of every profile below the roots"""
+    if selection is not None:
+        # Games that aren't selected are not even looked for
+        games = {package_name: game for package_name, game in games.items()
+                 if selection.match_game(package_name, game["name"])}
+    if not roots:
+        return [(None, packages_root, package_name) for package_name in discover_games(games)]
+    packages_dirs = find_packages_dirs(roots, games.keys(), workers)
+    found = map_parallel(lambda item: discover_games(games, item[1]), packages_dirs, workers)
+    names = root_names({root for root, _ in packages_dirs})
+    units = [
+        (profile_label(names[root], root, packages_dir), packages_dir, package_name)
+        for (root, packages_dir), package_names in zip(packages_dirs, found)
+        for package_name in package_names
+    ]
+    return sorted(units, key=lambda unit: (unit[0], games[unit[2]]["name"]))
+
+
+def unit_labels(unit: Unit) -> Dict[str, str]:
+    """Extra metrics labels and event fields of a unit"""
+    return {"profile": unit[0]} if unit[0] else {}
+
+
+def container_signature(pkg_name: str, root: Path | None = None) -> Tuple | None:
+    """Cheap fingerprint of a game's WGS save data, None if it has none
+
+    Only stats the user directories, their containers.index and the container (blob)
+    directories; the Xbox app writes new blobs under new names, which changes the
+    modification time of the container directory.
+    """
+    wgs_dir = (root or packages_root) / pkg_name / "SystemAppData/wgs"
+    if isinstance(wgs_dir, snapshots.ArchivePath):
+        # Snapshots only change as a whole
+        return snapshots.signature(wgs_dir) if wgs_dir.is_dir() else None
+    signature = []
+    try:
+        with os.scandir(wgs_dir) as user_dirs:
+            for user_dir in user_dirs:
+                if not user_dir.is_dir():
+                    continue
+                try:
+                    index = os.stat(os.path.join(user_dir.path, "containers.index"))
+                    signature.append((user_dir.name, "containers.index", index.st_mtime_ns, index.st_size))
+                except FileNotFoundError:
+                    pass
+                with os.scandir(user_dir.path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            signature.append((user_dir.name, entry.name, entry.stat().st_mtime_ns, 0))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return tuple(sorted(signature))
+
+
 def read_utf16_str(f, str_len=None) -> str:
     if not str_len:
         str_len = struct.unpack("<i", f.read(4))[0]
@@ -86,20 +380,46 @@ def read_filetime(f) -> datetime:
     return filetime_epoch + timedelta(seconds=filetime_seconds)
 
 
+def emit_event(event: str, **fields):
+    """Write one JSON line to the batch mode event stream"""
+    if event_stream is None:
+        return
+    record = {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), "event": event}
+    if "game" not in fields:
+        record.update(_event_fields.get())
+    record.update(fields)
+    line = json.dumps(record, default=str) + "\n"
+    with _event_lock:
+        event_stream.write(line)
+        event_stream.flush()
+
+
+def handle_warning(kind: str, message: str, prompt: str):
+    """Wait for the user, or apply the batch policy for this kind of warning"""
+    if batch_policies is None:
+        print(f"     {prompt}")
+        input()
+        return
+    policy = batch_policies[kind]
+    emit_event("warning", kind=kind, message=message, policy=policy)
+    if policy != "continue":
+        raise GameWarning(kind, message, policy)
+
+
 def print_sync_warning(title: str):
+    metrics.add("xgp_game_sync_warnings")
     print()
     print(f"  !! {title} !!")
     print("     Xbox cloud save syncing might not be complete, try again later.")
     print("     Extracted saves for this game might be corrupted!")
-    print("     Press enter to skip and continue.")
-    input()
+    handle_warning("sync-warning", title, "Press enter to skip and continue.")
 
 
-def get_xbox_user_name(user_id: int) -> str | None:
+def get_xbox_user_name(user_id: int, root: Path | None = None) -> str | None:
     xbox_app_package = "Microsoft.XboxApp_8wekyb3d8bbwe"
     try:
         live_gamer_path = (
-            packages_root / xbox_app_package / "LocalState/XboxLiveGamer.xml"
+            (root or packages_root) / xbox_app_package / "LocalState/XboxLiveGamer.xml"
         )
         with live_gamer_path.open("r", encoding="utf-8") as f:
             gamer = json.load(f)
@@ -111,9 +431,9 @@ def get_xbox_user_name(user_id: int) -> str | None:
         return None
 
 
-def find_user_containers(pkg_name: str) -> List[Tuple[int | str, Path]]:
+def find_user_containers(pkg_name: str, root: Path | None = None) -> List[Tuple[int | str, Path]]:
     # Find container dir
-    wgs_dir = packages_root / pkg_name / "SystemAppData/wgs"
+    wgs_dir = (root or packages_root) / pkg_name / "SystemAppData/wgs"
     if not wgs_dir.is_dir():
         return []
     # Get the correct user directory
@@ -133,8 +453,7 @@ def find_user_containers(pkg_name: str) -> List[Tuple[int | str, Path]]:
     if has_backups:
         print("  !! The save directory contains backups !!")
         print("     This script will currently skip backups made by the Xbox app.")
-        print("     Press enter to continue.")
-        input()
+        handle_warning("backups", "The save directory contains backups", "Press enter to continue.")
 
     if len(valid_user_dirs) == 0:
         # No saves for any users
@@ -145,13 +464,20 @@ def find_user_containers(pkg_name: str) -> List[Tuple[int | str, Path]]:
     for valid_user_dir in valid_user_dirs:
         user_id_hex, title_id_hex = valid_user_dir.name.split("_", 1)
         user_id = int(user_id_hex, 16)
-        user_name = get_xbox_user_name(user_id)
+        user_name = get_xbox_user_name(user_id, root)
         user_dirs.append((user_name or user_id, valid_user_dir))
 
     return user_dirs
 
 
-def read_user_containers(user_wgs_dir: Path) -> Tuple[str, List[Dict[str, Any]]]:
+def read_user_containers(
+    user_wgs_dir: Path, container_filter: Selection | None = None
+) -> Tuple[str, List[records.ContainerRecord]]:
+    """Read the containers of a user from containers.index
+
+    Containers that container_filter doesn't match are skipped right after their index
+    entry is read, without opening their container file or checking their blobs.
+    """
     containers_dir = user_wgs_dir
     containers_idx_path = containers_dir / "containers.index"
 
@@ -191,21 +517,27 @@ def read_user_containers(user_wgs_dir: Path) -> Tuple[str, List[Dict[str, Any]]]
             # Unknown
             f.read(4)
             # Read container (folder) GUID
-            container_guid = uuid.UUID(bytes_le=f.read(16))
+            container_guid = records.guid_bytes(f.read(16))
             # Creation date, FILETIME
-            container_creation_date = read_filetime(f)
-            # print(f"Container created at {container_creation_date}")
+            container_filetime = struct.unpack("<Q", f.read(8))[0]
             # Unknown
             f.read(16)
 
-            files = []
+            container = records.ContainerRecord(containers_dir, container_name, container_num, container_guid,
+                                                container_filetime)
+            if container_filter is not None and not container_filter.match_container(
+                container_name, container.modified
+            ):
+                metrics.add("xgp_game_skipped_containers", reason="filtered")
+                continue
 
             # Read the container file in the container directory
-            container_path = containers_dir / container_guid.hex.upper()
+            container_path = container.path
             container_file_path = container_path / f"container.{container_num}"
 
             if not container_file_path.is_file():
                 print_sync_warning(f'Missing container "{container_name}"')
+                metrics.add("xgp_game_skipped_containers", reason="missing")
                 continue
 
             with container_file_path.open("rb") as cf:
@@ -217,28 +549,28 @@ def read_user_containers(user_wgs_dir: Path) -> Tuple[str, List[Dict[str, Any]]]
                     # File name, 0x80 (128) bytes UTF-16 = 64 characters
                     file_name = read_utf16_str(cf, 64)
                     # Read file GUID
-                    file_guid = uuid.UUID(bytes_le=cf.read(16))
+                    file_guid = records.guid_bytes(cf.read(16))
                     # Read the copy of the GUID
-                    file_guid_2 = uuid.UUID(bytes_le=cf.read(16))
+                    file_guid_2 = records.guid_bytes(cf.read(16))
 
                     if file_guid == file_guid_2:
-                        file_path = container_path / file_guid.hex.upper()
+                        file_guid_used = file_guid
                     else:
                         # Check if one of the file paths exist
-                        file_guid_1_path = container_path / file_guid.hex.upper()
-                        file_guid_2_path = container_path / file_guid_2.hex.upper()
+                        file_guid_1_path = container_path / file_guid.hex().upper()
+                        file_guid_2_path = container_path / file_guid_2.hex().upper()
 
                         file_1_exists = file_guid_1_path.is_file()
                         file_2_exists = file_guid_2_path.is_file()
 
                         if file_1_exists and not file_2_exists:
-                            file_path = file_guid_1_path
+                            file_guid_used = file_guid
                         elif not file_1_exists and file_2_exists:
-                            file_path = file_guid_2_path
+                            file_guid_used = file_guid_2
                         elif file_1_exists and file_2_exists:
                             # Which one to use?
                             print_sync_warning(
-                                f'Two files exist for container "{container_name}" file "{file_name}": {file_guid} and {file_guid_2}, can\'t choose one'
+                                f'Two files exist for container "{container_name}" file "{file_name}": {uuid.UUID(bytes=file_guid)} and {uuid.UUID(bytes=file_guid_2)}, can\'t choose one'
                             )
                             continue
                         else:
@@ -247,22 +579,13 @@ def read_user_containers(user_wgs_dir: Path) -> Tuple[str, List[Dict[str, Any]]]
                             )
                             continue
 
-                    files.append(
-                        {
-                            "name": file_name,
-                            # "guid": file_guid,
-                            "path": file_path,
-                        }
-                    )
+                    container.add_file(file_name, file_guid_used)
 
-            containers.append(
-                {
-                    "name": container_name,
-                    "number": container_num,
-                    # "guid": container_guid,
-                    "files": files,
-                }
-            )
+                profiler.count(bytes_read=cf.tell(), files=1)
+
+            containers.append(container)
+
+        profiler.count(bytes_read=f.tell(), files=1)
 
     return (store_pkg_name, containers)
 
@@ -458,12 +781,14 @@ def get_save_paths(
             sfs_path = temp_folder / sfs_name
             with sfs_path.open("wb") as sfs_f:
                 for idx, part_path in sorted(parts.items(), key=lambda t: t[0]):
-                    with open(part_path, "rb") as part_f:
+                    with part_path.open("rb") as part_f:
                         data = part_f.read()
                     size = sfs_f.write(data)
                     pad = 16 - (size % 16)
                     if pad != 16:
                         sfs_f.write(pad_str[:pad].encode("ascii"))
+                    profiler.count(bytes_read=size, files=1)
+                profiler.count(bytes_written=sfs_f.tell(), files=1)
 
             save_meta.append((sfs_name, sfs_path))
 
@@ -585,14 +910,6 @@ def get_save_paths(
         if not ABIOTIC_FACTOR_AVAILABLE:
             raise Exception("Abiotic Factor extraction requires extract_abf_saves.py module")
 
-        # Check for Oodle DLL
-        oodle_dll_path = Path(__file__).parent / "oo2core_9_win64.dll"
-        if not oodle_dll_path.exists():
-            raise Exception(
-                "Abiotic Factor extraction requires oo2core_9_win64.dll\n"
-                "Place the DLL in the same directory as main.py"
-            )
-
         # Get world name from container or handler_args
         world_name = handler_args.get("world_name", "AbioticFactorWorld")
         if len(containers) > 0 and containers[0]["name"]:
@@ -601,25 +918,51 @@ def get_save_paths(
             world_name = container_name.split("-")[0] if "-" in container_name else container_name
 
         # Find bundled archive
-        bundled_archive = None
+        bundled_file = None
         for container in containers:
             if len(container["files"]) > 0:
-                bundled_archive = container["files"][0]["path"]
+                bundled_file = container["files"][0]
                 break
 
-        if not bundled_archive:
+        if not bundled_file:
             raise Exception("No bundled archive found in Abiotic Factor save container")
+        bundled_archive = bundled_file["path"]
 
         # Create extraction temp dir
         extract_temp = Path(temp_dir.name) / "abf_extract"
         extract_temp.mkdir(exist_ok=True)
 
-        # Extract and decompress bundled archive
-        success = extract_abf_saves.extract_archive(
-            str(bundled_archive),
-            str(extract_temp),
-            str(oodle_dll_path)
-        )
+        # An unchanged world is written from the decompressed archive cache
+        cache_key = cached = None
+        if abf_extract_cache is not None:
+            with profiler.phase("abf cache lookup"):
+                cache_key = abf_extract_cache.key_for(bundled_archive, bundled_file.guid)
+                cached = abf_extract_cache.get(cache_key)
+
+        if cached is not None:
+            entries, decompressed = cached
+            print(f"  Using the cached decompressed archive ({len(entries)} files)")
+            with profiler.phase("abf write"):
+                extract_abf_saves.write_entries(entries, decompressed, str(extract_temp))
+            success = True
+        else:
+            # Check for Oodle DLL
+            oodle_dll_path = Path(__file__).parent / "oo2core_9_win64.dll"
+            if not oodle_dll_path.exists():
+                raise Exception(
+                    "Abiotic Factor extraction requires oo2core_9_win64.dll\n"
+                    "Place the DLL in the same directory as main.py"
+                )
+
+            # Extract and decompress bundled archive, which has to be a real file
+            bundled_archive = snapshots.local_path(bundled_archive, Path(temp_dir.name))
+            success = extract_abf_saves.extract_archive(
+                str(bundled_archive),
+                str(extract_temp),
+                str(oodle_dll_path),
+                cache=abf_extract_cache,
+                cache_key=cache_key
+            )
 
         if not success:
             raise Exception("Failed to extract Abiotic Factor bundled archive")
@@ -645,6 +988,8 @@ def get_save_paths(
 
                 # Copy to organized location
                 shutil.copy(save_file, output_path)
+                size = output_path.stat().st_size
+                profiler.count(bytes_read=size, bytes_written=size, files=1)
             except (IOError, OSError) as e:
                 print(f"  ERROR: Failed to copy {save_file.name}: {e}")
                 raise
@@ -662,88 +1007,651 @@ def get_save_paths(
     return save_meta
 
 
+# Commands run with "main.py <command> ...", instead of extracting saves
+COMMANDS = {
+    "verify": archives.verify_command,
+    "diff": archives.diff_command,
+    "list": lambda argv: catalog.list_command(argv, parse_since),
+    "query": catalog.query_command,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Xbox Game Pass for PC savefile extractor",
+        epilog="Commands: \"main.py verify PATH...\" checks archives against their manifests, "
+               "\"main.py diff OLD NEW\" lists the save files that differ between two archives, "
+               "\"main.py list\" and \"main.py query SQL\" read the --catalog "
+               "(see \"main.py <command> --help\")"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        metavar="PROM",
+        help="Write Prometheus metrics of the run to this file (for node_exporter's textfile collector)"
+    )
+    parser.add_argument(
+        "--catalog",
+        type=Path,
+        nargs="?",
+        const=catalog.DEFAULT_PATH,
+        metavar="FILE",
+        help=f"Record the games, users, containers, files and archives of the run in an SQLite "
+             f"catalog, read by \"main.py list\" and \"main.py query\" (FILE defaults to {catalog.DEFAULT_PATH})"
+    )
+    parser.add_argument(
+        "--catalog-only",
+        action="store_true",
+        help="Only update the --catalog, don't write archives"
+    )
+    parser.add_argument(
+        "--format",
+        choices=backends.FORMATS,
+        default=backends.DEFAULT_FORMAT,
+        help="Output: ZIP files, zstd-compressed tar files (Python 3.14+ or the zstandard package), "
+             "plain directories, or one tar stream on stdout (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        metavar="N",
+        help="Compression level: 0-9 for zip (default 6), 1-22 for tar.zst (default 3)"
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Don't add a SHA256SUMS manifest of the save files to the archives"
+    )
+    parser.add_argument(
+        "--install-to",
+        type=Path,
+        metavar="DIR",
+        help="Place the save files straight into DIR, e.g. the Steam or Epic save directory of "
+             "the game, instead of writing archives. Existing files with the same names are "
+             "replaced. Only one game and user can be installed per run"
+    )
+    parser.add_argument(
+        "--install-link",
+        action="store_true",
+        help="With --install-to, hardlink files when possible. The installed saves then share "
+             "their data with the Xbox app's copy, so only use this if the game replaces its "
+             "save files instead of rewriting them in place"
+    )
+    parser.add_argument(
+        "--resume",
+        type=Path,
+        nargs="?",
+        const=journal.DEFAULT_PATH,
+        metavar="JOURNAL",
+        help=f"Keep a journal of the finished archives, and skip the ones an interrupted run with "
+             f"--resume already wrote if their saves are unchanged. Leftovers of the interrupted "
+             f"run are deleted, the journal is deleted once a run succeeds "
+             f"(JOURNAL defaults to {journal.DEFAULT_PATH})"
+    )
+    parser.add_argument(
+        "--abf-cache-dir",
+        type=Path,
+        default=abf_cache.DEFAULT_DIR,
+        metavar="DIR",
+        help="Directory for decompressed Abiotic Factor world archives, so an unchanged world "
+             "is not decompressed again (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--abf-cache-size",
+        type=int,
+        default=abf_cache.DEFAULT_MAX_MB,
+        metavar="MB",
+        help="Size cap of the decompressed Abiotic Factor archive cache (default: %(default)s MB)"
+    )
+    parser.add_argument(
+        "--no-abf-cache",
+        action="store_true",
+        help="Always decompress Abiotic Factor world archives, don't read or fill the cache"
+    )
+    parser.add_argument(
+        "--game",
+        action="append",
+        metavar="GLOB",
+        help="Only extract games whose name or package name matches, e.g. Palworld or \"Forza*\" "
+             "(can be given several times)"
+    )
+    parser.add_argument(
+        "--user",
+        action="append",
+        metavar="USER",
+        help="Only extract the saves of this Xbox user: gamertag or user ID (can be given several times)"
+    )
+    parser.add_argument(
+        "--container",
+        action="append",
+        metavar="GLOB",
+        help="Only extract containers whose name matches, e.g. \"Slot*\" (can be given several times)"
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_since,
+        metavar="TIME",
+        help="Only extract containers saved at or after TIME: a duration before now (30m, 1h, 2d) "
+             "or an ISO 8601 time such as 2025-01-31T12:00"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Never wait for input: apply the --on-* policies to warnings, print a JSON-lines event "
+             "stream to stdout (or --events) and the human-readable output to stderr"
+    )
+    parser.add_argument(
+        "--events",
+        type=Path,
+        metavar="JSONL",
+        help="Write the batch mode event stream to this file instead of stdout"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and extract games again whenever their saves change (implies --batch)"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="Time between checks for changed saves in watch mode (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="In watch mode, wait until a game's saves have not changed for this long before "
+             "extracting them, to let cloud syncs finish (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--packages-root",
+        type=Path,
+        action="extend",
+        nargs="+",
+        metavar="DIR",
+        help="Extract the saves of copied or mounted user profiles instead of the current user's. "
+             "DIR can be a Packages directory, a user profile, a directory of many of them, or a "
+             "ZIP or tar snapshot of any of those, which is read without unpacking it; "
+             "can be given several times"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path(),
+        metavar="DIR",
+        help="Write the archives into DIR, with --packages-root in a directory per profile; it must "
+             "be outside the --packages-root directories (default: the current directory)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Scan directories and extract games with up to N threads; more than 1 implies --batch "
+             "(default: %(default)s)"
+    )
+    for kind, default, description in (
+        ("sync-warning", "continue", "a container or file is missing or ambiguous (cloud sync in progress)"),
+        ("backups", "continue", "a save directory contains Xbox app backups"),
+        ("missing", "skip", "no supported game is installed, or a game has no containers"),
+    ):
+        parser.add_argument(
+            f"--on-{kind}",
+            choices=WARNING_POLICIES,
+            default=default,
+            help=f"Batch mode policy when {description}: continue as the interactive mode does, "
+                 f"skip the game, or fail it (non-zero exit status) (default: %(default)s)"
+        )
+    profiler.add_arguments(parser)
+    throttle.add_arguments(parser)
+    args = parser.parse_args()
+    if args.format == "stdout" and (args.batch or args.watch or args.workers > 1) and not args.events:
+        parser.error("--format stdout in batch mode needs --events FILE, stdout is taken by the archive")
+    if args.install_to and args.format != backends.DEFAULT_FORMAT:
+        parser.error("--install-to writes no archives, it can't be combined with --format")
+    if args.catalog_only and not args.catalog:
+        parser.error("--catalog-only needs --catalog")
+    if args.install_link and not args.install_to:
+        parser.error("--install-link needs --install-to")
+    if args.resume and (args.watch or args.format == "stdout"):
+        parser.error("--resume can't be combined with --watch or --format stdout")
+    for option, limit in (("--read-limit", args.read_limit), ("--write-limit", args.write_limit)):
+        if limit is not None and limit <= 0:
+            parser.error(f"{option} must be more than 0 MB/s")
+    # Only archives go into --output-dir
+    if args.packages_root and args.format != "stdout" and not args.install_to and not args.catalog_only:
+        for root in args.packages_root:
+            # Archives written into a scanned tree would be picked up by the next scan
+            if not snapshots.is_archive(root) and (args.output_dir.resolve().is_relative_to(root.resolve())
+                                                   or root.resolve().is_relative_to(args.output_dir.resolve())):
+                parser.error(f"--output-dir {args.output_dir} overlaps --packages-root {root}, "
+                             f"pass an --output-dir outside of it")
+    if args.compress_level is not None and args.format in backends.COMPRESS_LEVELS:
+        lowest, highest = backends.COMPRESS_LEVELS[args.format]
+        if not lowest <= args.compress_level <= highest:
+            parser.error(f"--compress-level must be {lowest}-{highest} for --format {args.format}")
+    try:
+        backends.check_format(args.format)
+    except RuntimeError as e:
+        parser.error(str(e))
+    return args
+
+
 def main():
-    print("Xbox Game Pass for PC savefile extractor")
-    print("========================================")
+    global batch_policies, event_stream, selection, output_format, compress_level, write_manifest
+    global install_dir, install_link, catalog_only, abf_extract_cache, output_dir
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+    args = parse_args()
+    # Before any threads are started, they inherit the lowered priority
+    throttle.start_from_args(args)
+    if args.background:
+        manifest.set_workers(1)
+    output_format, compress_level = args.format, args.compress_level
+    write_manifest = not args.no_manifest
+    install_dir, install_link = args.install_to, args.install_link
+    output_dir = args.output_dir
+    if not args.no_abf_cache:
+        abf_extract_cache = abf_cache.ExtractCache(args.abf_cache_dir, args.abf_cache_size * 1024 * 1024)
+    if args.game or args.user or args.container or args.since:
+        selection = Selection(args.game, args.user, args.container, args.since)
+    if args.watch or args.workers > 1:
+        # Nobody is there to answer prompts, or several games would ask at once
+        args.batch = True
+    profile_report = profiler.start_from_args(args, "main.py")
+    if args.metrics_file and not args.watch:
+        metrics.start(args.metrics_file, "main.py")
+    if args.catalog:
+        catalog.start(args.catalog)
+        catalog_only = args.catalog_only
+
+    with contextlib.ExitStack() as stack:
+        if output_format == "stdout":
+            # The archive takes stdout, everything else goes to stderr
+            backends.start_stream(sys.stdout.buffer)
+            stack.callback(backends.finish_stream)
+            if not args.batch:
+                stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        if args.batch:
+            batch_policies = {"sync-warning": args.on_sync_warning, "backups": args.on_backups,
+                              "missing": args.on_missing}
+            if args.events:
+                event_stream = stack.enter_context(args.events.open("a", encoding="utf-8"))
+            else:
+                event_stream = sys.stdout
+            # Keep stdout for the event stream
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        if args.workers > 1:
+            stack.enter_context(contextlib.redirect_stdout(BufferedStdout(sys.stdout)))
+        if args.resume:
+            done, unfinished, removed = journal.start(args.resume)
+            if done or unfinished:
+                print(f"Resuming from {args.resume}: {done} archive(s) already written, "
+                      f"{unfinished} unfinished ({removed} leftover(s) deleted)")
+
+        success = False
+        try:
+            if args.watch:
+                success = watch(args.watch_interval, args.debounce, args.metrics_file,
+                                args.packages_root, args.workers)
+            else:
+                success = extract_all(args.packages_root, args.workers)
+        finally:
+            if profile_report:
+                profiler.finish(profile_report, args.profile_stats)
+            metrics.finish(success)
+            catalog.finish()
+            journal.finish(success)
+            throttle_report = throttle.finish()
+            if throttle_report:
+                emit_event("throttle", **throttle_report)
+            emit_event("finish", success=success)
+
+    if args.batch or output_format == "stdout":
+        sys.exit(0 if success else 1)
 
-    games = read_game_list()
-    if games is None:
-        print("Failed to read game list. Check that games.json exists and is valid.")
+    print()
+    print("Press enter to quit")
+    input()
+
+
+def exit_early(message: str, missing: bool = False):
+    """Quit before any game was extracted
+
+    In batch mode nothing being installed is not an error unless --on-missing is "fail".
+    """
+    print(message)
+    if batch_policies is None:
         print()
         print("Press enter to quit")
         input()
         sys.exit(1)
+    if missing and batch_policies["missing"] != "fail":
+        emit_event("warning", kind="missing", message=message, policy=batch_policies["missing"])
+        return
+    emit_event("error", message=message)
+    sys.exit(1)
+
+
+def load_games() -> Dict[str, Any]:
+    print("Xbox Game Pass for PC savefile extractor")
+    print("========================================")
+
+    games = read_game_list()
+    if games is None:
+        exit_early("Failed to read game list. Check that games.json exists and is valid.")
+    return games
+
+
+def extract_all(roots: List[Path] | None = None, workers: int = 1) -> bool:
+    games = load_games()
 
     # Discover supported games
-    found_games = discover_games(games)
+    with profiler.phase("discovery"):
+        units = discover_units(games, roots, workers)
 
-    if len(found_games) == 0:
-        print("No supported games installed")
-        print()
-        print("Press enter to quit")
-        input()
-        sys.exit(1)
+    if len(units) == 0:
+        exit_early("No supported games installed", missing=True)
+        return True
 
-    print("Installed supported games:")
-    for package_name in found_games:
-        name: str = games[package_name]["name"]
-        print("- %s" % name)
+    if roots:
+        profiles = len({unit[1] for unit in units})
+        print(f"Found {len(units)} game(s) in {profiles} profile(s):")
+    else:
+        print("Installed supported games:")
+    statuses = extract_games(games, units, workers)
+    return "failed" not in statuses.values()
+
+
+def watch(interval: float, debounce: float, metrics_file: Path | None = None,
+          roots: List[Path] | None = None, workers: int = 1) -> bool:
+    """Extract games whenever their saves change, until interrupted
+
+    The games table is read once. Every interval the save data of the installed games
+    is fingerprinted with container_signature(), which only stats files and
+    directories. A game is extracted when its fingerprint differs from the one at its
+    last extraction attempt and has then stayed the same for debounce seconds, so
+    cloud syncs that are still writing are waited out. Between checks the process
+    just sleeps.
+    """
+    games = load_games()
+    print(f"Watching for changed saves every {interval:g}s (Ctrl+C to stop)")
+    emit_event("watch", interval=interval, debounce=debounce)
+
+    # Fingerprint at the last extraction attempt. Failed or skipped games are tried
+    # again once their saves change; a cloud sync that finishes changes them too.
+    attempted: Dict[Unit, Tuple] = {}
+    # Containers read at the last successful extraction
+    containers: Dict[Unit, int] = {}
+    # Changed games as (fingerprint, when it was first seen)
+    changed: Dict[Unit, Tuple[Tuple, float]] = {}
+    success = True
+    try:
+        while True:
+            now = time.monotonic()
+            ready = []
+            with profiler.phase("change scan"):
+                units = discover_units(games, roots, workers)
+                signatures = map_parallel(lambda unit: container_signature(unit[2], unit[1]), units, workers)
+                for unit, signature in zip(units, signatures):
+                    if signature is None or signature == attempted.get(unit):
+                        changed.pop(unit, None)
+                        continue
+                    seen = changed.get(unit)
+                    if seen is None or seen[0] != signature:
+                        changed[unit] = (signature, now)
+                    elif now - seen[1] >= debounce:
+                        ready.append(unit)
+
+            if ready:
+                if metrics_file:
+                    metrics.start(metrics_file, "main.py")
+                    for unit, count in containers.items():
+                        if unit not in ready:
+                            metrics.add("xgp_game_skipped_containers", count, game=games[unit[2]]["name"],
+                                        reason="unchanged", **unit_labels(unit))
+                print()
+                print(f"Saves changed for {len(ready)} game(s):")
+                statuses = extract_games(games, ready, workers)
+                round_success = "failed" not in statuses.values()
+                success = success and round_success
+                for unit, status in statuses.items():
+                    attempted[unit], _ = changed.pop(unit)
+                    if status == "extracted":
+                        containers[unit] = int(metrics.value(
+                            "xgp_game_containers", game=games[unit[2]]["name"], **unit_labels(unit)))
+                metrics.finish(round_success)
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    return success
+
+
+def extract_games(games: Dict[str, Any], units: List[Unit], workers: int = 1) -> Dict[Unit, str]:
+    """Extract the given games with up to workers threads, returns the extract_game() status of each"""
+    if workers <= 1 or len(units) <= 1:
+        return {unit: extract_unit(games, unit) for unit in units}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each game gets its own copy of the context for its event, metrics and output labels
+        futures = {unit: pool.submit(contextvars.copy_context().run, extract_unit, games, unit) for unit in units}
+        return {unit: future.result() for unit, future in futures.items()}
+
+
+def extract_unit(games: Dict[str, Any], unit: Unit) -> str:
+    """Extract one game with its events and metrics labelled, returns the extract_game() status"""
+    profile, _, package_name = unit
+    name: str = games[package_name]["name"]
+    labels = unit_labels(unit)
+    buffered = isinstance(sys.stdout, BufferedStdout)
+    lines: List[str] = []
+    output_token = _game_output.set(lines if buffered else None)
+    fields_token = _event_fields.set({"game": name, **labels})
+    try:
+        print("- %s" % name if profile is None else "- %s (%s)" % (name, profile))
+        with metrics.game(name, **labels):
+            started = time.perf_counter()
+            status = extract_game(games, unit)
+            seconds = round(time.perf_counter() - started, 3)
+            metrics.gauge("xgp_game_duration_seconds", seconds)
+        emit_event("game", package=package_name, status=status, seconds=seconds)
+    finally:
+        _event_fields.reset(fields_token)
+        _game_output.reset(output_token)
+        if buffered:
+            sys.stdout.write_buffer(lines)
+    return status
+
+
+def claim_install_dir(profile: str | None, package_name: str, user: str) -> Tuple | None:
+    """Reserve --install-to for one user's saves of one game
+
+    Returns None if they may be installed, or else the (profile, package, user) that
+    already was. Saves of different games or users would overwrite each other there.
+    """
+    global _install_owner
+    with _install_lock:
+        if _install_owner is None:
+            _install_owner = (profile, package_name, user)
+        if _install_owner == (profile, package_name, user):
+            return None
+        return _install_owner
 
-        try:
-            user_containers = find_user_containers(package_name)
-            if len(user_containers) == 0:
-                print(
-                    "  No containers for the game, maybe the game is not installed anymore"
-                )
+
+def extract_game(games: Dict[str, Any], unit: Unit) -> str:
+    """Write a ZIP file of the game's saves for each user
+
+    ZIP files of other profiles' games (--packages-root) go into a directory named
+    after the profile. With --install-to the files go into that directory instead.
+    Returns "extracted", "skipped" (by a batch policy, or no containers) or "failed".
+    """
+    profile, root, package_name = unit
+    name: str = games[package_name]["name"]
+    # Report every game, also the ones without anything to alert on
+    for metric in ("xgp_game_containers", "xgp_game_files", "xgp_game_bytes_archived",
+                   "xgp_game_archive_bytes", "xgp_game_sync_warnings", "xgp_game_failures"):
+        metrics.add(metric, 0)
+
+    temp_dir = None
+    try:
+        with profiler.phase("find containers", name):
+            user_containers = find_user_containers(package_name, root)
+        if len(user_containers) == 0:
+            print(
+                "  No containers for the game, maybe the game is not installed anymore"
+            )
+            print()
+            if batch_policies is not None:
+                handle_warning("missing", "No containers for the game", "")
+            return "skipped"
+
+        written = 0
+        for xbox_username_or_id, container_dir in user_containers:
+            if selection is not None and not selection.match_user(xbox_username_or_id, container_dir):
+                continue
+            with profiler.phase("index parsing", name):
+                read_result = read_user_containers(container_dir, selection)
+            store_pkg_name, containers = read_result
+            metrics.add("xgp_game_containers", len(containers))
+            # Filtered out containers aren't gone
+            partial = selection is not None and bool(selection.containers or selection.since)
+            user_ref = catalog.record_user(profile, package_name, name, xbox_username_or_id, container_dir,
+                                           store_pkg_name, containers, partial)
+            if selection is not None and len(containers) == 0:
+                continue
+            if catalog_only:
+                print(f"  Recorded {len(containers)} container(s) of user {xbox_username_or_id} in the catalog")
                 print()
+                # Counted as done for the selection
+                written += 1
                 continue
 
-            for xbox_username_or_id, container_dir in user_containers:
-                read_result = read_user_containers(container_dir)
-                store_pkg_name, containers = read_result
+            # With --resume, users whose archive an interrupted run finished are skipped
+            unit_key = journal.unit_key(profile, package_name, xbox_username_or_id,
+                                        "install" if install_dir is not None else output_format)
+            unit_signature = journal.signature(containers)
+            done_path = journal.completed(unit_key, unit_signature)
+            if done_path is not None:
+                print(f'  Saves of user {xbox_username_or_id} were already written to "{done_path}" (--resume)')
+                print()
+                emit_event("resumed", user=xbox_username_or_id, path=done_path)
+                written += 1
+                continue
 
-                # Create tempfile directory
-                # Some save files need this, as we need to create files that do not exist in the XGP save data
-                temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+            # Create tempfile directory
+            # Some save files need this, as we need to create files that do not exist in the XGP save data
+            temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+            journal.begin(unit_key, Path(temp_dir.name))
 
-                # Get save file paths
+            # Get save file paths
+            with profiler.phase("handler staging", name):
                 save_paths = get_save_paths(games, store_pkg_name, containers, temp_dir)
-                if len(save_paths) == 0:
-                    continue
-                print(f"  Save files for user {xbox_username_or_id}:")
-                for file_name, _ in save_paths:
-                    print(f"  - {file_name}")
-
-                # Create a ZIP file
-                formatted_game_name = (
-                    name.replace(" ", "_")
-                    .replace(":", "_")
-                    .replace("'", "")
-                    .replace("!", "")
-                    .lower()
-                )
-                timestamp = datetime.now().strftime("%Y-%m-%d_%H_%M_%S")
-                zip_name = "{}_{}_{}.zip".format(
+            if len(save_paths) == 0:
+                temp_dir.cleanup()
+                journal.skipped(unit_key)
+                continue
+            print(f"  Save files for user {xbox_username_or_id}:")
+            for file_name, _ in save_paths:
+                print(f"  - {file_name}")
+
+            # Create an archive (a ZIP file by default)
+            formatted_game_name = (
+                name.replace(" ", "_")
+                .replace(":", "_")
+                .replace("'", "")
+                .replace("!", "")
+                .lower()
+            )
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H_%M_%S")
+            zip_dir = output_dir / profile if profile else output_dir
+            if install_dir is not None:
+                owner = claim_install_dir(profile, package_name, xbox_username_or_id)
+                if owner is not None:
+                    message = (f"{install_dir} already has the saves of {games[owner[1]]['name']} for "
+                               f"user {owner[2]}, select one game and user with --game and --user")
+                    print(f"  Not installing: {message}")
+                    print()
+                    metrics.add("xgp_game_failures")
+                    emit_event("error", message=message)
+                    temp_dir.cleanup()
+                    return "failed"
+                journal.writing(unit_key, install_dir, install=True)
+                with profiler.phase("installing", name):
+                    with backends.open_installer(install_dir, install_link, Path(temp_dir.name)) as writer:
+                        for file_name, file_path in save_paths:
+                            writer.add(file_path, file_name)
+                archive_format = "install"
+            else:
+                if output_format != "stdout":
+                    zip_dir.mkdir(parents=True, exist_ok=True)
+                archive_base = zip_dir / "{}_{}_{}".format(
                     formatted_game_name, xbox_username_or_id, timestamp
                 )
-                with zipfile.ZipFile(zip_name, "x", zipfile.ZIP_DEFLATED) as save_zip:
-                    for file_name, file_path in save_paths:
-                        save_zip.write(file_path, arcname=file_name)
+                with profiler.phase("archive writing", name):
+                    with backends.open_writer(output_format, archive_base, compress_level,
+                                             write_manifest) as writer:
+                        journal.writing(unit_key, writer.partial_path)
+                        for file_name, file_path in save_paths:
+                            writer.add(file_path, file_name)
+                archive_format = output_format
+            archive_size = writer.archive_bytes
+            metrics.add("xgp_game_files", writer.files)
+            metrics.add("xgp_game_bytes_archived", writer.bytes_archived)
+            metrics.add("xgp_game_archive_bytes", archive_size)
+            extra = {"methods": dict(writer.methods)} if archive_format == "install" else {}
+            archive_path = writer.path.as_posix() if archive_format == "stdout" else os.path.abspath(writer.path)
+            emit_event("archive", user=xbox_username_or_id, format=archive_format, path=archive_path,
+                       files=writer.files, bytes=writer.bytes_archived, archive_bytes=archive_size, **extra)
+            catalog.record_archive(user_ref, archive_format, archive_path, writer)
+            journal.done(unit_key, unit_signature, archive_path)
+
+            temp_dir.cleanup()
 
-                temp_dir.cleanup()
-
-                print()
-                print('  Save files written to "%s"' % zip_name)
-                print()
+            print()
+            if archive_format == "install":
+                methods = ", ".join(f"{count} {method}" for method, count in sorted(writer.methods.items()))
+                print('  Save files installed to "%s" (%s)' % (writer.path, methods))
+            elif archive_format == "stdout":
+                print('  Save files written to stdout under "%s/"' % writer.path.as_posix())
+            else:
+                print('  Save files written to "%s"' % writer.path)
+            print()
+            written += 1
 
-        except Exception:
-            print(f"  Failed to extract saves:")
-            traceback.print_exc()
+        if selection is not None and written == 0:
+            print("  No saves match the selection")
             print()
+            return "skipped"
+        return "extracted"
 
-    print()
-    print("Press enter to quit")
-    input()
+    except GameWarning as e:
+        print(f"  {'Skipped' if e.policy == 'skip' else 'Failed'} by the --on-{e.kind} policy: {e}")
+        print()
+        if e.policy == "skip":
+            return "skipped"
+        metrics.add("xgp_game_failures")
+        return "failed"
+
+    except Exception as e:
+        print(f"  Failed to extract saves:")
+        traceback.print_exc(file=sys.stdout)
+        print()
+        metrics.add("xgp_game_failures")
+        emit_event("error", message=str(e))
+        return "failed"
+
+    finally:
+        # Cleaning up twice is fine, this catches the failures
+        if temp_dir is not None:
+            temp_dir.cleanup()
+        if metrics.enabled():
+            archive_bytes = metrics.value("xgp_game_archive_bytes")
+            if archive_bytes:
+                metrics.gauge("xgp_game_compression_ratio",
+                              round(metrics.value("xgp_game_bytes_archived") / archive_bytes, 4))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""
+Integrity manifests of the written archives
+
+Each archive gets a SHA256SUMS member listing the SHA-256 of every other member, in
+the format of sha256sum, so a dir archive can also be checked with "sha256sum -c".
+Writers hash the data while they read it: HashingReader hands every chunk to a
+thread pool and the writer compresses it meanwhile, as hashlib and zlib both release
+the GIL for large buffers.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional
+
+MANIFEST_NAME = "SHA256SUMS"
+CHUNK_SIZE = 1024 * 1024
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Hashing threads, None for one per CPU (set_workers())
+_workers: Optional[int] = None
+
+
+def set_workers(workers: int):
+    """Limit the hashing threads, before anything is hashed"""
+    global _workers
+    _workers = workers
+
+
+def _hash_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_workers or os.cpu_count() or 1, thread_name_prefix="sha256")
+        return _pool
+
+
+class HashingReader:
+    """Binary file wrapper that hashes everything read from it on the hash pool
+
+    Only one chunk per file is hashed at a time, so the hash sees the chunks in order
+    while the caller processes the next one.
+    """
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        self._sha = hashlib.sha256()
+        self._pending: Optional[Future] = None
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        if data:
+            if self._pending is not None:
+                self._pending.result()
+            self._pending = _hash_pool().submit(self._sha.update, data)
+        return data
+
+    def hexdigest(self) -> str:
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+        return self._sha.hexdigest()
+
+
+def hash_stream(f: BinaryIO) -> str:
+    """SHA-256 of the rest of a binary stream"""
+    sha = hashlib.sha256()
+    while chunk := f.read(CHUNK_SIZE):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def format_manifest(hashes: Dict[str, str]) -> bytes:
+    """SHA256SUMS contents for {member name: hex digest}"""
+    lines = []
+    for name, digest in sorted(hashes.items()):
+        if "\\" in name or "\n" in name:
+            # sha256sum escapes these and marks the line with a backslash
+            lines.append("\\%s  %s\n" % (digest, name.replace("\\", "\\\\").replace("\n", "\\n")))
+        else:
+            lines.append("%s  %s\n" % (digest, name))
+    return "".join(lines).encode("utf-8")
+
+
+def parse_manifest(data: bytes) -> Dict[str, str]:
+    """{member name: hex digest} of SHA256SUMS contents, raises ValueError if malformed"""
+    hashes = {}
+    for number, line in enumerate(data.decode("utf-8").splitlines(), 1):
+        if not line:
+            continue
+        escaped = line.startswith("\\")
+        if escaped:
+            line = line[1:]
+        digest, sep, name = line.partition("  ")
+        if not sep or len(digest) != 64:
+            # "hash *name" is sha256sum's binary mode marker
+            digest, sep, name = line.partition(" *")
+        if not sep or len(digest) != 64 or not name:
+            raise ValueError(f"Malformed {MANIFEST_NAME} line {number}")
+        if escaped:
+            name = name.replace("\\\\", "\0").replace("\\n", "\n").replace("\0", "\\")
+        hashes[name] = digest.lower()
+    return hashes
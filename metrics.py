@@ -0,0 +1,168 @@
+"""
+Prometheus textfile metrics (--metrics-file)
+
+Scheduled runs can leave their numbers for node_exporter's textfile collector.
+While enabled, main.py and convert_to_steam.py record gauges per game (or world) as
+they go, and the whole file is written atomically at the end of the run (temporary
+file in the same directory, then a rename), so the collector never reads a partial
+file. Every sample carries a "tool" label, so both scripts can write into the same
+collector directory. Games of copied profiles (main.py --packages-root) also carry a
+"profile" label.
+
+All values describe the last run only; the file is replaced on every run.
+"""
+
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Metric name -> help text. All metrics are gauges.
+METRICS = {
+    "xgp_run_success": "Whether the last run finished without failures",
+    "xgp_run_duration_seconds": "Wall time of the last run",
+    "xgp_run_timestamp_seconds": "Unix time the last run finished",
+    "xgp_game_duration_seconds": "Time spent extracting the game's saves",
+    "xgp_game_containers": "Containers read from the game's containers.index",
+    "xgp_game_files": "Save files written into the game's archives",
+    "xgp_game_bytes_archived": "Uncompressed bytes of the save files written into the game's archives",
+    "xgp_game_archive_bytes": "Size of the game's archives on disk",
+    "xgp_game_compression_ratio": "Uncompressed bytes archived divided by archive size",
+    "xgp_game_sync_warnings": "Cloud sync warnings (missing or ambiguous containers and files)",
+    "xgp_game_skipped_containers": "Containers that were not extracted, by reason",
+    "xgp_game_failures": "Failed extractions of the game's saves",
+    "xgp_world_duration_seconds": "Time spent converting the world",
+    "xgp_world_stage_seconds": "Time spent in each conversion stage",
+    "xgp_world_bytes": "Size of the converted world",
+    "xgp_world_saves": "Saves in the converted world, by how they were produced",
+    "xgp_world_failures": "Whether the world failed to convert",
+}
+
+_active: Optional["MetricsFile"] = None
+# Game (and profile) labels added to samples recorded inside game()
+_game: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("metrics_game", default={})
+
+
+def _format(value: float) -> str:
+    # Integral values (byte counts, timestamps) are written in full, not in exponent form
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsFile:
+    """Gauges of one run, rendered in the Prometheus text exposition format"""
+
+    def __init__(self, path: Path, tool: str):
+        self.path = Path(path)
+        self.tool = tool
+        self.started = time.monotonic()
+        self.samples: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted({"tool": self.tool, **labels}.items()))
+
+    def set(self, name: str, value: float, **labels: str):
+        with self._lock:
+            self.samples.setdefault(name, {})[self._key(labels)] = value
+
+    def add(self, name: str, value: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self.samples.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def get(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self.samples.get(name, {}).get(self._key(labels), 0)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self.samples):
+                lines.append(f"# HELP {name} {METRICS[name]}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(self.samples[name].items()):
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                    lines.append(f"{name}{{{label_text}}} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Replace the metrics file atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The collector only reads *.prom files, so the temporary file is ignored
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+
+
+def start(path: Path, tool: str) -> MetricsFile:
+    """Enable metrics for the rest of the run"""
+    global _active
+    _active = MetricsFile(path, tool)
+    return _active
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+@contextlib.contextmanager
+def game(name: str, **labels: str):
+    """Label the samples recorded inside the block with game=name and the extra labels"""
+    token = _game.set({"game": name, **labels})
+    try:
+        yield
+    finally:
+        _game.reset(token)
+
+
+def _labels(labels: Dict[str, str]) -> Dict[str, str]:
+    current = _game.get()
+    if current and "game" not in labels:
+        return {**current, **labels}
+    return labels
+
+
+def gauge(name: str, value: float, **labels: str):
+    """Set a gauge, a no-op while metrics are disabled"""
+    if _active is None:
+        return
+    _active.set(name, value, **_labels(labels))
+
+
+def add(name: str, value: float = 1, **labels: str):
+    """Add to a gauge, a no-op while metrics are disabled"""
+    if _active is None:
+        return
+    _active.add(name, value, **_labels(labels))
+
+
+def value(name: str, **labels: str) -> float:
+    """Current value of a gauge, 0 while metrics are disabled"""
+    if _active is None:
+        return 0
+    return _active.get(name, **_labels(labels))
+
+
+def finish(success: bool):
+    """Record the run-level gauges, write the file and disable metrics"""
+    global _active
+    metrics_file, _active = _active, None
+    if metrics_file is None:
+        return
+    metrics_file.set("xgp_run_success", 1 if success else 0)
+    metrics_file.set("xgp_run_duration_seconds", round(time.monotonic() - metrics_file.started, 3))
+    metrics_file.set("xgp_run_timestamp_seconds", int(time.time()))
+    try:
+        metrics_file.write()
+    except OSError as e:
+        print(f"Failed to write metrics to {metrics_file.path}: {e}")
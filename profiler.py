@@ -0,0 +1,304 @@
+"""
+Per-phase run profiling (--profile)
+
+A phase is a named block of work, optionally for one game. While profiling is
+enabled every phase records its wall time, the process CPU time and child process
+CPU time spent while it ran, and the bytes read and written, files and subprocesses
+counted inside it. Times include nested phases; counters only go to the innermost
+running phase. Nested phases inherit the game of the phase around them, also in
+worker threads started with contextvars.copy_context(). Concurrent phases each
+count their full wall time, so per-game totals can exceed the run's wall time.
+
+The report is written as JSON. Optionally the phases are also run under cProfile
+(one profile per thread, merged into a single pstats dump) and tracemalloc, which
+adds the peak traced memory of each phase to the report.
+
+When profiling is disabled phase() returns a shared no-op context manager and
+count() returns right away, so the hooks can stay in the hot paths.
+"""
+
+import argparse
+import contextlib
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_REPORT = Path("profile.json")
+COUNTERS = ("bytes_read", "bytes_written", "files", "subprocesses")
+
+_NO_PHASE = contextlib.nullcontext()
+# The profiler of this run, None while profiling is disabled
+_active: Optional["Profiler"] = None
+# Innermost running phase as (record, game)
+_current: contextvars.ContextVar[Optional[Tuple[Dict[str, Any], Optional[str]]]] = \
+    contextvars.ContextVar("profile_phase", default=None)
+
+
+def _child_cpu() -> float:
+    # Only finished (waited for) children are included; always 0 on Windows
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Profiler:
+    """Collects phase records for one run"""
+
+    def __init__(self, tool: str, cprofile: bool = False, trace_memory: bool = False):
+        self.tool = tool
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.records: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._lock = threading.Lock()
+        # Records of running phases, for tracemalloc peaks
+        self._open: List[Dict[str, Any]] = []
+        self._thread = threading.local()
+        self._profiles: List[cProfile.Profile] = []
+        self._peak_traced = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _record(self, game: Optional[str], name: str, nested: bool) -> Dict[str, Any]:
+        with self._lock:
+            record = self.records.get((game, name))
+            if record is None:
+                record = {"phase": name, "game": game, "nested": nested, "calls": 0,
+                          "wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0, **{c: 0 for c in COUNTERS}}
+                if self.trace_memory:
+                    record["peak_traced_bytes"] = 0
+                self.records[(game, name)] = record
+            return record
+
+    def _update_peaks(self, reset: bool):
+        """Credit the traced memory peak so far to every running phase"""
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._peak_traced = max(self._peak_traced, peak)
+            for record in self._open:
+                record["peak_traced_bytes"] = max(record["peak_traced_bytes"], peak)
+            if reset:
+                tracemalloc.reset_peak()
+
+    def _start_cprofile(self):
+        depth = getattr(self._thread, "depth", 0)
+        if depth == 0:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active; on Python 3.12+ it already covers every thread
+                profile = None
+            self._thread.profile = profile
+        self._thread.depth = depth + 1
+
+    def _stop_cprofile(self):
+        self._thread.depth -= 1
+        if self._thread.depth == 0 and self._thread.profile:
+            self._thread.profile.disable()
+            with self._lock:
+                self._profiles.append(self._thread.profile)
+            self._thread.profile = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str, game: Optional[str] = None):
+        parent = _current.get()
+        if game is None and parent:
+            game = parent[1]
+        record = self._record(game, name, nested=parent is not None)
+        token = _current.set((record, game))
+        if self.cprofile:
+            self._start_cprofile()
+        if self.trace_memory:
+            self._update_peaks(reset=True)
+            with self._lock:
+                self._open.append(record)
+        started = time.perf_counter()
+        started_cpu = time.process_time()
+        started_child = _child_cpu()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - started_cpu
+            child = _child_cpu() - started_child
+            if self.trace_memory:
+                self._update_peaks(reset=False)
+                with self._lock:
+                    self._open.remove(record)
+            if self.cprofile:
+                self._stop_cprofile()
+            _current.reset(token)
+            with self._lock:
+                record["calls"] += 1
+                record["wall_s"] += wall
+                record["cpu_s"] += cpu
+                record["child_cpu_s"] += child
+
+    def count(self, **amounts: int):
+        current = _current.get()
+        if current is None:
+            # Work outside of any phase
+            record = self._record(None, "(other)", nested=False)
+        else:
+            record = current[0]
+        with self._lock:
+            for counter, amount in amounts.items():
+                record[counter] += amount
+
+    def report(self) -> Dict[str, Any]:
+        """The run's phases, per-game totals and overall numbers"""
+        with self._lock:
+            phases = [dict(record) for record in self.records.values()]
+        for record in phases:
+            for key in ("wall_s", "cpu_s", "child_cpu_s"):
+                record[key] = round(record[key], 6)
+
+        games: Dict[str, Dict[str, Any]] = {}
+        for record in phases:
+            if record["game"] is None:
+                continue
+            totals = games.setdefault(record["game"], {"wall_s": 0.0, **{c: 0 for c in COUNTERS}})
+            # Nested phase times are already part of the phase around them
+            if not record["nested"]:
+                totals["wall_s"] = round(totals["wall_s"] + record["wall_s"], 6)
+            for counter in COUNTERS:
+                totals[counter] += record[counter]
+
+        report = {
+            "tool": self.tool,
+            "started": self.started_at.isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._started, 6),
+            "cpu_s": round(time.process_time() - self._started_cpu, 6),
+            "child_cpu_s": round(_child_cpu(), 6),
+            "phases": phases,
+            "games": games,
+        }
+        if self.trace_memory:
+            # Phases reset the tracemalloc peak, so combine it with the peaks seen so far
+            report["peak_traced_bytes"] = max(self._peak_traced, tracemalloc.get_traced_memory()[1])
+        return report
+
+    def dump_stats(self, path: Path) -> bool:
+        """Merge the per-thread cProfile profiles into one pstats file"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
+
+
+def start(tool: str, cprofile: bool = False, trace_memory: bool = False) -> Profiler:
+    """Enable profiling for the rest of the run"""
+    global _active
+    _active = Profiler(tool, cprofile, trace_memory)
+    return _active
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def phase(name: str, game: Optional[str] = None):
+    """Context manager timing a phase, a no-op while profiling is disabled"""
+    if _active is None:
+        return _NO_PHASE
+    return _active.phase(name, game)
+
+
+def count(bytes_read: int = 0, bytes_written: int = 0, files: int = 0, subprocesses: int = 0):
+    """Add I/O and subprocess counts to the innermost running phase"""
+    if _active is None:
+        return
+    _active.count(bytes_read=bytes_read, bytes_written=bytes_written, files=files, subprocesses=subprocesses)
+
+
+def finish(report_path: Path, stats_path: Optional[Path] = None):
+    """Write the report (and the pstats dump), print a summary and disable profiling"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return
+    report = profiler.report()
+    if profiler.trace_memory:
+        tracemalloc.stop()
+
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = report_path.with_name(report_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, report_path)
+
+    phases: Dict[str, Dict[str, Any]] = {}
+    for record in report["phases"]:
+        totals = phases.setdefault(record["phase"], {"calls": 0, "wall_s": 0.0, **{c: 0 for c in COUNTERS}})
+        totals["calls"] += record["calls"]
+        totals["wall_s"] += record["wall_s"]
+        for counter in COUNTERS:
+            totals[counter] += record[counter]
+
+    def print_row(label: str, totals: Dict[str, Any]):
+        io_mb = (totals["bytes_read"] + totals["bytes_written"]) / 1e6
+        print(f"  {label[:36]:<36} {totals['wall_s']:9.3f}s {io_mb:9.1f} MB I/O "
+              f"{totals['files']:6d} files {totals['subprocesses']:5d} procs")
+
+    print()
+    print(f"Profile ({report['wall_s']:.2f}s wall, {report['cpu_s']:.2f}s CPU), per phase:")
+    for name, totals in sorted(phases.items(), key=lambda item: item[1]["wall_s"], reverse=True):
+        print_row(f"{name} ({totals['calls']}x)", totals)
+    if report["games"]:
+        print("Per game:")
+        for game, totals in sorted(report["games"].items(), key=lambda item: item[1]["wall_s"], reverse=True):
+            print_row(game, totals)
+    print(f"Profile written to: {report_path}")
+    if stats_path:
+        if profiler.dump_stats(Path(stats_path)):
+            print(f"cProfile stats written to: {stats_path}")
+        else:
+            print("No cProfile stats were collected")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the --profile options to a script's argument parser"""
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_REPORT,
+        metavar="REPORT",
+        help=f"Record time, I/O and subprocesses per phase and game into a JSON report (default: {DEFAULT_REPORT})"
+    )
+    parser.add_argument(
+        "--profile-stats",
+        type=Path,
+        metavar="PSTATS",
+        help="Also run the phases under cProfile and dump the stats here (implies --profile)"
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also record the tracemalloc peak of each phase (implies --profile)"
+    )
+
+
+def start_from_args(args: argparse.Namespace, tool: str) -> Optional[Path]:
+    """Start profiling if requested on the command line, returns the report path"""
+    if not (args.profile or args.profile_stats or args.profile_memory):
+        return None
+    start(tool, cprofile=args.profile_stats is not None, trace_memory=args.profile_memory)
+    return args.profile or DEFAULT_REPORT
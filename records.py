@@ -0,0 +1,105 @@
+"""
+Compact records of the containers and files read from containers.index
+
+A profile can have tens of thousands of container files, and batch runs keep many
+users' lists in memory at once, so the records use __slots__, keep GUIDs as 16 bytes
+and FILETIMEs as ints, and share the file names through sys.intern(). Paths are not
+stored: a file's blob path is derived from its container when it is asked for.
+
+Both records also work as read-only mappings with the keys of the dicts that
+read_user_containers() used to return ("name", "number", "guid", "modified" and
+"files"; "name", "guid" and "path"), so handlers can keep using container["files"]
+and file["path"].
+"""
+
+import sys
+import uuid
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List
+
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def filetime_to_datetime(filetime: int) -> datetime:
+    return FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
+
+
+def guid_bytes(data: bytes) -> bytes:
+    """GUID stored little-endian (as in containers.index) in the byte order of uuid.UUID.bytes"""
+    return data[3::-1] + data[5:3:-1] + data[7:5:-1] + data[8:16]
+
+
+class ContainerRecord(Mapping):
+    """A container: its name, container.N number, GUID (16 bytes) and time (FILETIME)"""
+
+    __slots__ = ("name", "number", "guid", "filetime", "files", "_user_dir")
+    _keys = ("name", "number", "guid", "modified", "files")
+
+    def __init__(self, user_dir: Path, name: str, number: int, guid: bytes, filetime: int):
+        self.name = name
+        self.number = number
+        self.guid = guid
+        self.filetime = filetime
+        self.files: List["FileRecord"] = []
+        self._user_dir = user_dir
+
+    @property
+    def path(self) -> Path:
+        """Directory of the container's blobs"""
+        return self._user_dir / self.guid.hex().upper()
+
+    @property
+    def modified(self) -> datetime:
+        return filetime_to_datetime(self.filetime)
+
+    def add_file(self, name: str, guid: bytes):
+        self.files.append(FileRecord(sys.intern(name), guid, self))
+
+    def __getitem__(self, key: str):
+        if key not in self._keys:
+            raise KeyError(key)
+        value = getattr(self, key)
+        return uuid.UUID(bytes=value) if key == "guid" else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"ContainerRecord({self.name!r}, {self.number}, {self.guid.hex().upper()}, {len(self.files)} files)"
+
+
+class FileRecord(Mapping):
+    """A file of a container: its name and blob GUID (16 bytes)"""
+
+    __slots__ = ("name", "guid", "container")
+    _keys = ("name", "guid", "path")
+
+    def __init__(self, name: str, guid: bytes, container: ContainerRecord):
+        self.name = name
+        self.guid = guid
+        self.container = container
+
+    @property
+    def path(self) -> Path:
+        """The blob with the file's data"""
+        return self.container.path / self.guid.hex().upper()
+
+    def __getitem__(self, key: str):
+        if key not in self._keys:
+            raise KeyError(key)
+        value = getattr(self, key)
+        return uuid.UUID(bytes=value) if key == "guid" else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.name!r}, {self.guid.hex().upper()})"
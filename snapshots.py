@@ -0,0 +1,259 @@
+"""
+Read-only access to Packages snapshots archived as ZIP or tar files
+
+An ArchivePath works like a read-only pathlib.Path for the directories and files
+inside an archive, so the save data of a snapshot can be read in place instead of
+unpacking it first. Opening an archive only reads its member list (the ZIP central
+directory, or the tar headers); files are opened as seekable streams over their own
+members, so reading a game's saves touches only the bytes of that game.
+
+Compressed tar files (.tar.gz, .tar.xz, ...) can't be read at random offsets, so
+listing them decompresses the whole archive and every member read decompresses from
+the start again. Prefer ZIP or plain tar for large snapshots.
+"""
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, Set, Tuple
+
+import profiler
+import throttle
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# First bytes of the compression formats tarfile understands
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+# Open archives by path, reused while the file is unchanged
+_archives: Dict[str, Tuple[Tuple[int, int], "Archive"]] = {}
+_archives_lock = threading.Lock()
+
+
+def member_name(name: str) -> str:
+    """Archive member name without a leading "./" or slashes"""
+    while name.startswith("./"):
+        name = name[2:]
+    return name.strip("/")
+
+
+def is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) and path.is_file()
+
+
+class _MemberReader(io.RawIOBase):
+    """Seekable reader over a byte range of a file, with its own file handle"""
+
+    def __init__(self, path: Path, offset: int, size: int):
+        self._file = open(path, "rb")
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._size
+        self._pos = max(0, pos)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._size - self._pos)
+        if size <= 0:
+            return 0
+        self._file.seek(self._offset + self._pos)
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._pos += read
+        return read
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class Archive:
+    """Member index of a ZIP or tar file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Tuple[int, datetime]] = {}
+        # CRC-32 of each file of a ZIP archive, from its central directory
+        self.crcs: Dict[str, int] = {}
+        self.dirs: Dict[str, Set[str]] = {"": set()}
+        self._lock = threading.Lock()
+        self.compressed = False
+        self._zip = None
+        self._tar = None
+        self._members: Dict[str, object] = {}
+
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            for info in self._zip.infolist():
+                name = member_name(info.filename)
+                if info.is_dir():
+                    self._add_dir(name)
+                else:
+                    self._add_file(name, info.file_size, datetime(*info.date_time), info)
+                    self.crcs[name] = info.CRC
+        else:
+            with open(self.path, "rb") as f:
+                self.compressed = f.read(6).startswith(_COMPRESSED_MAGIC)
+            self._tar = tarfile.open(self.path, "r:*")
+            for member in self._tar.getmembers():
+                name = member_name(member.name)
+                if member.isdir():
+                    self._add_dir(name)
+                elif member.isfile():
+                    self._add_file(name, member.size, datetime.fromtimestamp(member.mtime), member)
+
+    def _add_dir(self, name: str):
+        parts = PurePosixPath(name).parts
+        for i in range(len(parts)):
+            parent, child = "/".join(parts[:i]), parts[i]
+            self.dirs.setdefault(parent, set()).add(child)
+            self.dirs.setdefault("/".join(parts[:i + 1]), set())
+
+    def _add_file(self, name: str, size: int, mtime: datetime, member):
+        parent, _, _ = name.rpartition("/")
+        if parent:
+            self._add_dir(parent)
+        self.dirs[parent].add(name.rpartition("/")[2])
+        self.files[name] = (size, mtime)
+        self._members[name] = member
+
+    def open(self, name: str) -> io.BufferedIOBase:
+        member = self._members[name]
+        if self._zip is not None:
+            # ZipFile serializes reads of its shared file handle itself
+            return self._zip.open(member)
+        if not self.compressed and not member.issparse():
+            return io.BufferedReader(_MemberReader(self.path, member.offset_data, member.size))
+        with self._lock:
+            return io.BytesIO(self._tar.extractfile(member).read())
+
+
+class ArchivePath:
+    """Read-only path to a directory or file inside an archive"""
+
+    def __init__(self, archive: Archive, at: str = ""):
+        self.archive = archive
+        self.at = at
+
+    def __truediv__(self, other) -> "ArchivePath":
+        return self.joinpath(other)
+
+    def joinpath(self, *others) -> "ArchivePath":
+        parts = [self.at, *(str(other).replace("\\", "/") for other in others)]
+        return ArchivePath(self.archive, "/".join(part.strip("/") for part in parts if part))
+
+    def __str__(self) -> str:
+        return f"{self.archive.path}/{self.at}" if self.at else str(self.archive.path)
+
+    def __repr__(self) -> str:
+        return f"ArchivePath({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ArchivePath) and (self.archive.path, self.at) == (other.archive.path, other.at)
+
+    def __hash__(self) -> int:
+        return hash((self.archive.path, self.at))
+
+    @property
+    def name(self) -> str:
+        if not self.at:
+            # The archive itself, named like the directory it was made of
+            name = self.archive.path.name
+            for suffix in ARCHIVE_SUFFIXES:
+                if name.lower().endswith(suffix):
+                    return name[:-len(suffix)]
+            return name
+        return self.at.rpartition("/")[2]
+
+    @property
+    def parts(self) -> Tuple[str, ...]:
+        return PurePosixPath(self.at).parts
+
+    def resolve(self) -> "ArchivePath":
+        return self
+
+    def relative_to(self, other: "ArchivePath") -> PurePosixPath:
+        return PurePosixPath(self.at).relative_to(PurePosixPath(other.at or "."))
+
+    def is_dir(self) -> bool:
+        return self.at in self.archive.dirs
+
+    def is_file(self) -> bool:
+        return self.at in self.archive.files
+
+    def exists(self) -> bool:
+        return self.is_dir() or self.is_file()
+
+    def iterdir(self) -> Iterator["ArchivePath"]:
+        if not self.is_dir():
+            raise NotADirectoryError(str(self))
+        for child in sorted(self.archive.dirs[self.at]):
+            yield self / child
+
+    def size(self) -> int:
+        return self.archive.files[self.at][0]
+
+    def mtime(self) -> datetime:
+        return self.archive.files[self.at][1]
+
+    def open(self, mode: str = "r", encoding: str | None = None):
+        if mode not in ("r", "rb"):
+            raise ValueError(f"Archive members are read-only, can't open with mode {mode!r}")
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        stream = self.archive.open(self.at)
+        return stream if mode == "rb" else io.TextIOWrapper(stream, encoding=encoding)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as f:
+            return f.read()
+
+
+def open_root(path: Path) -> ArchivePath:
+    """Top directory of an archive, opened once for as long as the file is unchanged"""
+    st = os.stat(path)
+    key = os.path.realpath(path)
+    with _archives_lock:
+        cached = _archives.get(key)
+        if cached is None or cached[0] != (st.st_mtime_ns, st.st_size):
+            cached = ((st.st_mtime_ns, st.st_size), Archive(Path(path)))
+            _archives[key] = cached
+    return ArchivePath(cached[1])
+
+
+def signature(path: ArchivePath) -> Tuple:
+    """Fingerprint of the archive a path is in, like main.container_signature()"""
+    st = os.stat(path.archive.path)
+    return ((str(path.archive.path), path.at, st.st_mtime_ns, st.st_size),)
+
+
+def local_path(path, directory: Path) -> Path:
+    """A real file with the contents of path, copied into directory if it is in an archive"""
+    if not isinstance(path, ArchivePath):
+        return path
+    fd, target = tempfile.mkstemp(prefix=f"{path.name}.", dir=directory)
+    with path.open("rb") as src, os.fdopen(fd, "wb") as dst:
+        shutil.copyfileobj(throttle.reader(src), throttle.writer(dst), 1024 * 1024)
+    profiler.count(bytes_read=path.size(), bytes_written=path.size(), files=1)
+    return Path(target)
+
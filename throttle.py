@@ -0,0 +1,286 @@
+"""
+Background mode: bandwidth caps and low priority (--background)
+
+Backups are often started while a game is running, and then the bulk reads,
+compression and Oodle work compete with it for the disk and the CPU. In background
+mode the process lowers its CPU and I/O priority (nice 10 and the idle I/O class on
+Linux, nice 10 elsewhere on Unix, the background processing mode on Windows), uses
+one hashing thread, and reads and writes save data at no more than the configured
+MB/s.
+
+The caps are token buckets (GCRA) shared by all threads: every chunk read or written
+through reader() and writer(), or passed to read() and write(), reserves its bytes
+and sleeps until they fit, with at most BURST_SECONDS of data ahead of the rate.
+Chunks are at most CHUNK_SIZE, so even a single large save is paced.
+
+When throttling is disabled reader() and writer() return the file itself and read()
+and write() return right away, so the hooks can stay in the hot paths. finish()
+reports the average and busiest-second rates against the caps, and how many full
+seconds of the run went over them (the first and last second are partial).
+"""
+
+import argparse
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Dict, List, Optional
+
+CHUNK_SIZE = 256 * 1024
+BURST_SECONDS = 0.1
+# A second counts as over the cap above this share of it, for rounding and timer slack
+TOLERANCE = 1.05
+# MB/s caps of --background when --read-limit or --write-limit is not given
+DEFAULT_READ_LIMIT = 25.0
+DEFAULT_WRITE_LIMIT = 25.0
+
+# ioprio_set() syscall numbers, it has no libc wrapper
+_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "aarch64": 30, "arm64": 30, "i386": 289, "i686": 289}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+_IDLE_PRIORITY_CLASS = 0x00000040
+
+
+class Bucket:
+    """Byte rate cap shared by threads, with the statistics of what went through it"""
+
+    def __init__(self, name: str, mb_per_s: float):
+        self.name = name
+        self.rate = mb_per_s * 1e6
+        self._lock = threading.Lock()
+        # Time at which everything reserved so far has been paid for
+        self._paid_until = time.monotonic()
+        self._started = self._paid_until
+        self.bytes = 0
+        self.waited = 0.0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        # Bytes per second of the run, for the busiest second
+        self._seconds: Dict[int, int] = {}
+
+    def consume(self, size: int):
+        if size <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._paid_until = max(self._paid_until, now) + size / self.rate
+            wait = self._paid_until - now - BURST_SECONDS
+            if self.first is None:
+                self.first = now
+            self.bytes += size
+            # Counted in the second the bytes are let through
+            second = int(now + max(wait, 0.0) - self._started)
+            self._seconds[second] = self._seconds.get(second, 0) + size
+            if wait > 0:
+                self.waited += wait
+            # Active until the bytes are paid for at the cap, so a paced run averages the cap
+            self.last = self._paid_until
+        if wait > 0:
+            time.sleep(wait)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            active = (self.last - self.first) if self.first is not None else 0.0
+            # Only full seconds can be compared with the cap
+            full = sorted(self._seconds)[1:-1]
+            busiest = max((self._seconds[second] for second in full), default=0)
+            over = sum(1 for second in full if self._seconds[second] > self.rate * TOLERANCE)
+            return {
+                "limit_mb_s": round(self.rate / 1e6, 3),
+                "bytes": self.bytes,
+                "active_s": round(active, 3),
+                "average_mb_s": round(self.bytes / active / 1e6, 3) if active > 0 else None,
+                "busiest_second_mb_s": round(busiest / 1e6, 3) if full else None,
+                "waited_s": round(self.waited, 3),
+                "seconds": len(full),
+                "seconds_over": over,
+            }
+
+
+class _Reader:
+    """Binary file wrapper that paces reads through a bucket"""
+
+    def __init__(self, f: BinaryIO, bucket: Bucket):
+        self._f = f
+        self._bucket = bucket
+
+    def read(self, size: int = -1) -> bytes:
+        # Whole reads as asked for, tarfile takes a short read for the end of the data
+        remaining = None if size is None or size < 0 else size
+        chunks = []
+        while remaining is None or remaining > 0:
+            chunk = self._f.read(CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE))
+            if not chunk:
+                break
+            self._bucket.consume(len(chunk))
+            chunks.append(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def __getattr__(self, name: str):
+        return getattr(self._f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._f.close()
+
+
+class _Writer:
+    """Binary file wrapper that paces writes through a bucket"""
+
+    def __init__(self, f: BinaryIO, bucket: Bucket):
+        self._f = f
+        self._bucket = bucket
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        for offset in range(0, len(view), CHUNK_SIZE):
+            chunk = view[offset:offset + CHUNK_SIZE]
+            self._bucket.consume(len(chunk))
+            self._f.write(chunk)
+        return len(view)
+
+    def __getattr__(self, name: str):
+        return getattr(self._f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._f.close()
+
+
+# Caps of this run, None while they are disabled
+_read: Optional[Bucket] = None
+_write: Optional[Bucket] = None
+_priority: List[str] = []
+
+
+def lower_priority() -> List[str]:
+    """Lower the CPU and I/O priority of the process and its future threads and children
+
+    Returns what was changed, for the report. Call it before starting threads: on
+    Linux the priorities are per thread and only inherited by new ones.
+    """
+    changed = []
+    if sys.platform == "win32":
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        kernel32.SetPriorityClass.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+        process = kernel32.GetCurrentProcess()
+        # Background mode lowers the CPU, I/O and memory priority
+        if kernel32.SetPriorityClass(process, _PROCESS_MODE_BACKGROUND_BEGIN):
+            changed.append("background processing mode")
+        elif kernel32.SetPriorityClass(process, _IDLE_PRIORITY_CLASS):
+            changed.append("idle CPU priority")
+        return changed
+    try:
+        os.nice(10)
+        changed.append("nice 10")
+    except OSError:
+        pass
+    syscall = _IOPRIO_SET.get(platform.machine().lower())
+    if sys.platform.startswith("linux") and syscall is not None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.syscall(syscall, _IOPRIO_WHO_PROCESS, 0, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) == 0:
+            changed.append("idle I/O class")
+    return changed
+
+
+def start(read_limit: Optional[float], write_limit: Optional[float], low_priority: bool = True):
+    """Enable the caps (MB/s, None for no cap) and lower the priority"""
+    global _read, _write, _priority
+    _read = Bucket("read", read_limit) if read_limit else None
+    _write = Bucket("write", write_limit) if write_limit else None
+    _priority = lower_priority() if low_priority else []
+
+
+def enabled() -> bool:
+    return _read is not None or _write is not None
+
+
+def reader(f: BinaryIO) -> BinaryIO:
+    """f, with reads paced by the read cap"""
+    return f if _read is None else _Reader(f, _read)
+
+
+def writer(f: BinaryIO) -> BinaryIO:
+    """f, with writes paced by the write cap"""
+    return f if _write is None else _Writer(f, _write)
+
+
+def read(size: int):
+    """Wait until size bytes read elsewhere (e.g. by the kernel) fit the read cap"""
+    if _read is not None:
+        _read.consume(size)
+
+
+def write(size: int):
+    """Wait until size bytes written elsewhere fit the write cap"""
+    if _write is not None:
+        _write.consume(size)
+
+
+def finish() -> Optional[Dict[str, Any]]:
+    """Print how the run kept to the caps, returns the numbers and disables throttling"""
+    global _read, _write, _priority
+    buckets, priority = [b for b in (_read, _write) if b is not None], _priority
+    _read = _write = None
+    _priority = []
+    if not buckets and not priority:
+        return None
+    report: Dict[str, Any] = {"priority": priority}
+    print()
+    print(f"Throttling ({', '.join(priority) or 'priority unchanged'}):")
+    for bucket in buckets:
+        numbers = report[bucket.name] = bucket.report()
+        line = f"  {bucket.name:5} {numbers['bytes'] / 1e6:9.1f} MB, limit {numbers['limit_mb_s']:g} MB/s"
+        if numbers["average_mb_s"] is not None:
+            line += f", average {numbers['average_mb_s']:.1f} MB/s"
+        if numbers["busiest_second_mb_s"] is not None:
+            line += f", busiest second {numbers['busiest_second_mb_s']:.1f} MB/s"
+        print(f"{line}, {numbers['waited_s']:.1f}s waited")
+        if numbers["seconds"]:
+            print(f"        {numbers['seconds_over']} of {numbers['seconds']} full second(s) over the limit")
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the --background options to a script's argument parser"""
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help=f"Go easy on a running game: lower the CPU and I/O priority, hash on one thread and "
+             f"cap reads and writes at {DEFAULT_READ_LIMIT:g}/{DEFAULT_WRITE_LIMIT:g} MB/s unless "
+             f"--read-limit/--write-limit are given"
+    )
+    parser.add_argument(
+        "--read-limit",
+        type=float,
+        metavar="MB/S",
+        help="Read save data at no more than this many MB per second"
+    )
+    parser.add_argument(
+        "--write-limit",
+        type=float,
+        metavar="MB/S",
+        help="Write archives at no more than this many MB per second"
+    )
+
+
+def start_from_args(args: argparse.Namespace):
+    """Start throttling if requested on the command line"""
+    read_limit, write_limit = args.read_limit, args.write_limit
+    if args.background:
+        read_limit = read_limit or DEFAULT_READ_LIMIT
+        write_limit = write_limit or DEFAULT_WRITE_LIMIT
+    if read_limit or write_limit or args.background:
+        start(read_limit, write_limit, low_priority=args.background)